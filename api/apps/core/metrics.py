@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import os
+
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+from apps.jobs.metrics_api import JobsDbMetricsCollector
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    What /metrics exposes: this process's registry, or under gunicorn multiprocess mode
+    (PROMETHEUS_MULTIPROC_DIR) the merged metric files of every worker plus the job gauges.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    # Read from the database, so identical in every worker: collected once, not merged.
+    registry.register(JobsDbMetricsCollector())
+    return registry
+
+
+def metrics(_request: HttpRequest) -> HttpResponse:
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+
+from django.conf import settings
+from django.utils import timezone
+
+from .admission import IN_FLIGHT_STATUSES, finish_job
+from .estimates import RuntimeModel
+from .models import Job
+
+logger = logging.getLogger("k2p.jobs")
+
+# last_seen_at is rewritten at most this often per job, so UI polling stays read-mostly.
+SEEN_WRITE_INTERVAL_SECS = 15
+
+
+def abandoned_policy() -> str:
+    """off (default) | deprioritize | cancel (deprioritize, then cancel)."""
+    return str(getattr(settings, "ABANDONED_JOB_POLICY", "off"))
+
+
+def mark_seen(job: Job, now: datetime.datetime | None = None) -> None:
+    """Record that job's client is still watching it (status poll, log read, by-hash match)."""
+    if job.status not in IN_FLIGHT_STATUSES:
+        return
+    now = now or timezone.now()
+    Job.objects.filter(
+        id=job.id, last_seen_at__lt=now - datetime.timedelta(seconds=SEEN_WRITE_INTERVAL_SECS)
+    ).update(last_seen_at=now)
+
+
+def unwatched_cutoff(now: datetime.datetime | None = None) -> datetime.datetime | None:
+    """Non-detached jobs last seen before this are claimed after all watched ones; None when the policy is off."""
+    if abandoned_policy() not in ("deprioritize", "cancel"):
+        return None
+    now = now or timezone.now()
+    return now - datetime.timedelta(seconds=int(getattr(settings, "ABANDONED_AFTER_SECS", 300)))
+
+
+def cancel_abandoned_jobs(now: datetime.datetime | None = None) -> tuple[int, float]:
+    """
+    Cancel QUEUED, non-detached jobs nobody has watched for ABANDONED_CANCEL_AFTER_SECS
+    (policy cancel only); returns (jobs cancelled, predicted run seconds saved).
+    """
+    if abandoned_policy() != "cancel":
+        return 0, 0.0
+    now = now or timezone.now()
+    after_s = int(getattr(settings, "ABANDONED_CANCEL_AFTER_SECS", 1800))
+    candidates = Job.objects.filter(
+        status=Job.Status.QUEUED,
+        detached=False,
+        last_seen_at__lt=now - datetime.timedelta(seconds=after_s),
+    ).values_list("id", "input_size")[:100]
+
+    model = RuntimeModel()
+    cancelled, saved_secs = 0, 0.0
+    for job_id, input_size in candidates:
+        if finish_job(
+            job_id,
+            from_statuses=[Job.Status.QUEUED],
+            status=Job.Status.CANCELLED,
+            finished_at=now,
+            error_code="abandoned",
+            error_message=f"Cancelled: no client checked on this job for {after_s}s.",
+        ):
+            cancelled += 1
+            saved_secs += model.predict(input_size)
+    if cancelled:
+        logger.info(
+            json.dumps({"event": "abandoned_jobs_cancelled", "count": cancelled, "saved_seconds": round(saved_secs, 1)})
+        )
+    return cancelled, saved_secs
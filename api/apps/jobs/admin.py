@@ -1,19 +1,140 @@
+import datetime
+import uuid
+
 from django.contrib import admin
+from django.http import JsonResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .models import FactoryUsage, Job, JobArtifact, JobDiagnostics, JobEvent, JobNodeMeta, NodeFactory
+from .nodemeta import load_node_meta, usage_summary
+
+
+class JobDiagnosticsInline(admin.StackedInline):
+    # Only on the change page: the changelist reads the narrow Job rows alone.
+    model = JobDiagnostics
+    can_delete = False
+    readonly_fields = ("updated_at", "stdout_tail", "stderr_tail")
+
+
+class JobEventInline(admin.TabularInline):
+    model = JobEvent
+    ordering = ("at", "id")
+    can_delete = False
+    extra = 0
+    fields = ("at", "kind", "source", "monotonic_ns", "payload")
+    readonly_fields = fields
 
-from .models import Job, JobSettingsMeta
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
 
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
     list_display = ("id", "status", "created_at", "started_at", "finished_at")
+    inlines = [JobDiagnosticsInline, JobEventInline]
     list_filter = ("status",)
     search_fields = ("id", "k8s_job_name", "original_filename")
 
 
-@admin.register(JobSettingsMeta)
-class JobSettingsMetaAdmin(admin.ModelAdmin):
-    list_display = ("id", "job", "file_name", "factory", "node_name", "name", "created_at")
+@admin.register(JobEvent)
+class JobEventAdmin(admin.ModelAdmin):
+    # job_id, not job: the events of a deleted job stay listed.
+    list_display = ("at", "job_id", "kind", "source", "payload")
+    list_filter = ("kind",)
+    search_fields = ("job_id",)
+    date_hierarchy = "at"
+    fields = ("job_id", "kind", "at", "source", "monotonic_ns", "payload")
+    readonly_fields = fields
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Exact match on the event's own column: no join on Job (swept jobs keep their events)
+        # and no cast to text, so the (job, at) index serves it.
+        if not search_term.strip():
+            return queryset, False
+        try:
+            return queryset.filter(job_id=uuid.UUID(search_term.strip())), False
+        except ValueError:
+            return queryset.none(), False
+
+
+@admin.register(JobNodeMeta)
+class JobNodeMetaAdmin(admin.ModelAdmin):
+    list_display = ("job", "node_count", "created_at")
+    list_select_related = ("job",)
     list_filter = ("created_at",)
-    search_fields = ("file_name", "factory", "node_name", "name", "job__id")
+    search_fields = ("job__id",)
+    fields = ("job", "node_count", "created_at", "nodes")
+    readonly_fields = fields
+
+    @admin.display(description="Nodes (file | factory | node name | name)")
+    def nodes(self, obj: JobNodeMeta) -> str:
+        lines = "\n".join(
+            " | ".join(str(v or "") for v in (n.file_name, n.factory, n.node_name, n.name))
+            for n in load_node_meta(obj.job)
+        )
+        return format_html("<pre>{}</pre>", lines)
+
+
+@admin.register(NodeFactory)
+class NodeFactoryAdmin(admin.ModelAdmin):
+    list_display = ("id", "name")
+    search_fields = ("name",)
+
+
+@admin.register(FactoryUsage)
+class FactoryUsageAdmin(admin.ModelAdmin):
+    list_display = ("factory", "day", "job_count", "node_count", "failure_count", "failure_rate")
+    list_select_related = ("factory",)
+    date_hierarchy = "day"
+    ordering = ("-day", "-job_count")
+    search_fields = ("factory__name",)
+    # Maintained at ingest and job completion (nodemeta.record_usage / record_failure).
+    readonly_fields = ("factory", "day", "job_count", "node_count", "failure_count")
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    @admin.display(description="Failure rate")
+    def failure_rate(self, obj: FactoryUsage) -> str:
+        return f"{obj.failure_count / obj.job_count:.0%}" if obj.job_count else "-"
+
+    def get_urls(self):
+        summary = path(
+            "summary.json", self.admin_site.admin_view(self.summary_view), name="jobs_factoryusage_summary"
+        )
+        return [summary, *super().get_urls()]
+
+    def summary_view(self, request):
+        """GET ?days=30&limit=100: per-factory totals over the last days (UTC), most used first."""
+        try:
+            days = int(request.GET.get("days", 30))
+            limit = int(request.GET.get("limit", 100))
+        except ValueError:
+            days = limit = 0
+        if not 1 <= days <= 3660 or not 1 <= limit <= 10_000:
+            return JsonResponse(
+                {"error": {"code": "invalid_request", "message": "days must be 1..3660 and limit 1..10000."}},
+                status=400,
+            )
+        until = timezone.now().astimezone(datetime.timezone.utc).date()
+        since = until - datetime.timedelta(days=days - 1)
+        return JsonResponse(
+            {
+                "since": since.isoformat(),
+                "until": until.isoformat(),
+                "factories": usage_summary(since, until, limit=limit),
+            }
+        )
+
+
+@admin.register(JobArtifact)
+class JobArtifactAdmin(admin.ModelAdmin):
+    list_display = ("id", "job", "path", "size", "content_type")
+    search_fields = ("path", "sha256", "job__id")
 
 # Register your models here.
@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import math
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .events import record_event
+from .models import AdmissionCounter, Job, JobEvent, WorkerHeartbeat
+from .nodemeta import record_failure
+
+logger = logging.getLogger("k2p.jobs")
+
+IN_FLIGHT_STATUSES = [Job.Status.QUEUED, Job.Status.RUNNING]
+
+JOBS_COUNTER = "jobs"
+CLIENT_COUNTER_PREFIX = "client:"
+
+
+@dataclass(frozen=True)
+class AdmissionDecision:
+    admitted: bool
+    cost: float
+    policy: str
+    client_hash: str = ""
+    # queue_full | queue_wait_exceeded | client_limit when rejected.
+    reason: str = ""
+    # Set when the rejection comes from a wait estimate (adaptive policy with throughput history).
+    estimated_wait_secs: float | None = None
+    wait_slo_secs: float | None = None
+    worker_slots: int | None = None
+    retry_after_secs: int | None = None
+
+
+def admission_cost(input_size: int) -> float:
+    """Predicted work for a bundle: one unit per job plus one per ADMISSION_COST_UNIT_BYTES of input."""
+    unit = max(int(getattr(settings, "ADMISSION_COST_UNIT_BYTES", 1024 * 1024)), 1)
+    return 1.0 + max(int(input_size or 0), 0) / unit
+
+
+def client_hash(request) -> str:
+    """
+    Stable, non-reversible client identity for fair-share accounting.
+
+    The API key header (FAIR_SHARE_API_KEY_HEADER, off by default: only enable it behind a
+    gateway that validates keys) or else the client IP nginx passes in X-Real-IP.
+    """
+    header = str(getattr(settings, "FAIR_SHARE_API_KEY_HEADER", "") or "")
+    api_key = request.headers.get(header, "").strip() if header else ""
+    if api_key:
+        identity = f"key:{api_key}"
+    else:
+        ip = request.headers.get("X-Real-IP") or request.META.get("REMOTE_ADDR") or ""
+        identity = f"ip:{ip.strip()}"
+    return hmac.new(settings.SECRET_KEY.encode(), identity.encode(), hashlib.sha256).hexdigest()
+
+
+def client_counter(client: str) -> str:
+    return f"{CLIENT_COUNTER_PREFIX}{client}"
+
+
+def _in_flight_jobs(name: str):
+    jobs = Job.objects.filter(status__in=IN_FLIGHT_STATUSES)
+    if name.startswith(CLIENT_COUNTER_PREFIX):
+        jobs = jobs.filter(client_hash=name[len(CLIENT_COUNTER_PREFIX) :])
+    return jobs
+
+
+def try_admit(limit: int, cost: float = 1.0, max_inflight_cost: float | None = None, *, name: str = JOBS_COUNTER) -> bool:
+    """
+    Reserve one in-flight slot on counter name if fewer than limit are taken (limit < 0
+    means unlimited) and, when max_inflight_cost is given, the queued work does not exceed it.
+
+    A single conditional UPDATE on the counter row: concurrent submissions contend on
+    one row lock for the duration of the statement instead of a global mutex + COUNT.
+    """
+    qs = AdmissionCounter.objects.filter(name=name)
+    if limit >= 0:
+        qs = qs.filter(inflight__lt=limit)
+    if max_inflight_cost is not None:
+        qs = qs.filter(inflight_cost__lte=max_inflight_cost)
+    if qs.update(inflight=F("inflight") + 1, inflight_cost=F("inflight_cost") + cost):
+        return True
+    if not ensure_counter(name):
+        return False
+    # First admission for this counter: it was just seeded from the real count; retry once.
+    return bool(qs.update(inflight=F("inflight") + 1, inflight_cost=F("inflight_cost") + cost))
+
+
+def ensure_counter(name: str) -> bool:
+    """Create counter name seeded from the real in-flight jobs; False if it already existed."""
+    if AdmissionCounter.objects.filter(name=name).exists():
+        return False
+    actual = _in_flight_jobs(name).aggregate(count=Count("id"), cost=Coalesce(Sum("admission_cost"), Value(0.0)))
+    _, created = AdmissionCounter.objects.get_or_create(
+        name=name, defaults={"inflight": actual["count"], "inflight_cost": actual["cost"]}
+    )
+    return created
+
+
+def reserve_blob_bytes(client: str, nbytes: int, now: datetime.datetime | None = None) -> bool:
+    """
+    Charge nbytes of new delta-upload blobs to client; False if that exceeds BLOB_MAX_BYTES_PER_CLIENT.
+
+    The charge is dropped once the client's window is BLOB_RETENTION_DAYS old: by then the
+    blobs it paid for were either used by a bundle (and refunded) or removed by the worker.
+    """
+    limit = int(getattr(settings, "BLOB_MAX_BYTES_PER_CLIENT", 500 * 1024 * 1024))
+    if limit < 0 or nbytes <= 0:
+        return True
+    now = now or timezone.now()
+    name = client_counter(client)
+    ensure_counter(name)
+    AdmissionCounter.objects.filter(~_blob_window_open(now), name=name).update(blob_bytes=0, blob_window_at=now)
+    return bool(
+        AdmissionCounter.objects.filter(name=name, blob_bytes__lte=limit - nbytes).update(
+            blob_bytes=F("blob_bytes") + nbytes
+        )
+    )
+
+
+def _blob_window_open(now: datetime.datetime) -> Q:
+    """Counter rows whose blob charge still counts (window younger than BLOB_RETENTION_DAYS)."""
+    retention_days = int(getattr(settings, "BLOB_RETENTION_DAYS", 7))
+    if retention_days < 0:
+        return Q(blob_window_at__isnull=False)
+    return Q(blob_window_at__gte=now - datetime.timedelta(days=retention_days))
+
+
+def release_blob_bytes(client: str, nbytes: int) -> None:
+    """Refund blob bytes that were not stored, or that a bundle of client's has now used."""
+    if nbytes > 0:
+        AdmissionCounter.objects.filter(name=client_counter(client)).update(
+            blob_bytes=Greatest(F("blob_bytes") - nbytes, Value(0))
+        )
+
+
+def reserve_upload_bytes(client: str, nbytes: int) -> bool:
+    """Charge a new upload session's size to client; False if over UPLOAD_MAX_STAGED_BYTES_PER_CLIENT."""
+    limit = int(getattr(settings, "UPLOAD_MAX_STAGED_BYTES_PER_CLIENT", 200 * 1024 * 1024))
+    if limit < 0 or nbytes <= 0:
+        return True
+    name = client_counter(client)
+    ensure_counter(name)
+    return bool(
+        AdmissionCounter.objects.filter(name=name, upload_bytes__lte=limit - nbytes).update(
+            upload_bytes=F("upload_bytes") + nbytes
+        )
+    )
+
+
+def release_upload_bytes(client: str, nbytes: int) -> None:
+    """Refund an upload session's charge once it is committed or deleted."""
+    if nbytes > 0:
+        AdmissionCounter.objects.filter(name=client_counter(client)).update(
+            upload_bytes=Greatest(F("upload_bytes") - nbytes, Value(0))
+        )
+
+
+def release(cost: float = 1.0, client: str | None = None) -> None:
+    """
+    Give back one slot and its cost (job rejected after admission, or reached a terminal
+    state), on the global counter and, when client is given, on that client's counter.
+    """
+    names = [JOBS_COUNTER] if client is None else [JOBS_COUNTER, client_counter(client)]
+    _release_counters(names, cost)
+
+
+def _release_counters(names: list[str], cost: float) -> None:
+    AdmissionCounter.objects.filter(name__in=names, inflight__gte=1).update(
+        inflight=F("inflight") - 1,
+        inflight_cost=Greatest(F("inflight_cost") - cost, Value(0.0)),
+    )
+
+
+def worker_throughput(now: datetime.datetime | None = None) -> tuple[int, float]:
+    """Return (live worker slots, cost units per second across them); throughput is 0 without history."""
+    now = now or timezone.now()
+    stale_s = int(getattr(settings, "WORKER_HEARTBEAT_STALE_SECS", 30))
+    rates = list(
+        WorkerHeartbeat.objects.filter(last_seen_at__gte=now - datetime.timedelta(seconds=stale_s)).values_list(
+            "secs_per_cost", flat=True
+        )
+    )
+    return len(rates), sum(1.0 / r for r in rates if r and r > 0)
+
+
+def admit(input_size: int, client: str = "") -> AdmissionDecision:
+    """
+    Reserve capacity for a new job of input_size bytes from client (a client_hash).
+
+    The client's own slot (MAX_INFLIGHT_PER_CLIENT) is taken first, then the global one:
+    static (default): at most MAX_QUEUED_JOBS in flight.
+    adaptive: admit while the predicted wait (in-flight cost / worker throughput EWMA)
+    stays within ADMISSION_WAIT_SLO_SECS, capped at ADMISSION_MAX_INFLIGHT jobs. Until
+    workers have reported throughput it falls back to the static limit.
+    """
+    cost = admission_cost(input_size)
+    policy = str(getattr(settings, "ADMISSION_POLICY", "static"))
+    per_client = int(getattr(settings, "MAX_INFLIGHT_PER_CLIENT", 10))
+    if not try_admit(per_client, cost, name=client_counter(client)):
+        return AdmissionDecision(False, cost, policy, client, reason="client_limit")
+
+    decision = _admit_global(cost, policy, client)
+    if not decision.admitted:
+        _release_counters([client_counter(client)], cost)
+    return decision
+
+
+def _admit_global(cost: float, policy: str, client: str) -> AdmissionDecision:
+    max_queued = int(getattr(settings, "MAX_QUEUED_JOBS", 50))
+    if policy != "adaptive":
+        admitted = try_admit(max_queued, cost)
+        return AdmissionDecision(admitted, cost, policy, client, reason="" if admitted else "queue_full")
+
+    slots, throughput = worker_throughput()
+    if throughput <= 0:
+        admitted = try_admit(max_queued, cost)
+        return AdmissionDecision(admitted, cost, "static", client, reason="" if admitted else "queue_full")
+
+    slo_s = float(getattr(settings, "ADMISSION_WAIT_SLO_SECS", 300))
+    hard_max = int(getattr(settings, "ADMISSION_MAX_INFLIGHT", 500))
+    if try_admit(hard_max, cost, max_inflight_cost=slo_s * throughput):
+        return AdmissionDecision(True, cost, policy, client)
+
+    counter = AdmissionCounter.objects.filter(name=JOBS_COUNTER).values("inflight", "inflight_cost").first()
+    inflight_cost = counter["inflight_cost"] if counter else 0.0
+    wait_s = inflight_cost / throughput
+    if wait_s > slo_s:
+        # Time until enough queued work drains for the estimate to fall back under the SLO.
+        retry_after = wait_s - slo_s
+    else:
+        # Rejected by the job-count cap: roughly one average job has to finish.
+        retry_after = inflight_cost / max(counter["inflight"] if counter else 1, 1) / throughput
+    return AdmissionDecision(
+        False,
+        cost,
+        policy,
+        client,
+        reason="queue_wait_exceeded",
+        estimated_wait_secs=round(wait_s, 1),
+        wait_slo_secs=slo_s,
+        worker_slots=slots,
+        retry_after_secs=max(1, math.ceil(retry_after)),
+    )
+
+
+def finish_job(job_id, *, from_statuses=IN_FLIGHT_STATUSES, **fields) -> bool:
+    """
+    Move an in-flight job to a terminal state and release its slot.
+
+    Returns False (and releases nothing) if the job had already left from_statuses
+    (QUEUED/RUNNING by default), so a terminal transition is counted once however many
+    paths race to it. That includes the job's "finished" event and a FAILED job's count in
+    its factories' usage rows.
+    """
+    with transaction.atomic():
+        in_flight = Job.objects.filter(id=job_id, status__in=from_statuses)
+        row = in_flight.values_list("admission_cost", "client_hash", "created_at").first()
+        if row is None:
+            return False
+        updated = in_flight.update(**fields)
+        if updated:
+            release(row[0], row[1])
+            record_event(
+                job_id,
+                JobEvent.Kind.FINISHED,
+                status=fields.get("status"),
+                error_code=fields.get("error_code", ""),
+                exit_code=fields.get("exit_code"),
+            )
+            if fields.get("status") == Job.Status.FAILED:
+                record_failure(job_id, row[2])
+    return bool(updated)
+
+
+def cancel_job(job_id) -> bool:
+    """
+    Cancel a QUEUED job at once (its slot is released immediately), or flag a RUNNING one
+    for its worker, which kills the container and records CANCELLED.
+
+    Returns False if the job had already reached a terminal state.
+    """
+    now = timezone.now()
+    if finish_job(
+        job_id,
+        from_statuses=[Job.Status.QUEUED],
+        status=Job.Status.CANCELLED,
+        cancel_requested_at=now,
+        finished_at=now,
+        error_code="cancelled",
+        error_message="Job was cancelled before it started.",
+    ):
+        return True
+    running = Job.objects.filter(id=job_id, status=Job.Status.RUNNING)
+    if running.filter(cancel_requested_at__isnull=True).update(cancel_requested_at=now):
+        return True
+    # A repeated request for a job that is already being cancelled.
+    return running.exists()
+
+
+def reconcile() -> int:
+    """
+    Reset the global and per-client counters to the real QUEUED+RUNNING counts and costs;
+    returns the global count drift corrected.
+
+    Admission reserves a slot before the job row exists, so drift of a few in-progress
+    submissions is expected here and is corrected on the next pass.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        counter, _ = AdmissionCounter.objects.select_for_update().get_or_create(name=JOBS_COUNTER)
+        actual = _in_flight_jobs(JOBS_COUNTER).aggregate(
+            count=Count("id"), cost=Coalesce(Sum("admission_cost"), Value(0.0))
+        )
+        drift = counter.inflight - actual["count"]
+        AdmissionCounter.objects.filter(name=JOBS_COUNTER).update(
+            inflight=actual["count"], inflight_cost=actual["cost"], reconciled_at=now
+        )
+
+        per_client = {
+            client_counter(row["client_hash"]): row
+            for row in _in_flight_jobs(JOBS_COUNTER)
+            .values("client_hash")
+            .annotate(count=Count("id"), cost=Sum("admission_cost"))
+        }
+        clients = AdmissionCounter.objects.select_for_update().filter(name__startswith=CLIENT_COUNTER_PREFIX)
+        for row in clients:
+            real = per_client.pop(row.name, None)
+            row.inflight = real["count"] if real else 0
+            row.inflight_cost = real["cost"] if real else 0.0
+            row.reconciled_at = now
+        AdmissionCounter.objects.bulk_update(clients, ["inflight", "inflight_cost", "reconciled_at"])
+        AdmissionCounter.objects.bulk_create(
+            [
+                AdmissionCounter(name=name, inflight=real["count"], inflight_cost=real["cost"], reconciled_at=now)
+                for name, real in per_client.items()
+            ],
+            ignore_conflicts=True,
+        )
+        # Idle clients keep their row (and last_served_at) for a day, then are forgotten; a
+        # row still holding a blob or upload session charge stays until that is released.
+        AdmissionCounter.objects.filter(name__startswith=CLIENT_COUNTER_PREFIX, inflight=0, upload_bytes=0).filter(
+            Q(last_served_at__isnull=True) | Q(last_served_at__lt=now - datetime.timedelta(days=1))
+        ).exclude(Q(blob_bytes__gt=0) & _blob_window_open(now)).delete()
+    if drift:
+        logger.info(json.dumps({"event": "admission_reconciled", "inflight": actual["count"], "drift": drift}))
+    return drift
+
+
+def record_heartbeat(worker_id: str) -> None:
+    WorkerHeartbeat.objects.update_or_create(worker_id=worker_id, defaults={"last_seen_at": timezone.now()})
+
+
+def record_job_run(worker_id: str, cost: float, run_seconds: float) -> None:
+    """Fold one finished run into the worker's seconds-per-cost EWMA."""
+    if cost <= 0 or run_seconds <= 0:
+        return
+    alpha = float(getattr(settings, "ADMISSION_EWMA_ALPHA", 0.2))
+    sample = run_seconds / cost
+    with transaction.atomic():
+        hb, _ = WorkerHeartbeat.objects.select_for_update().get_or_create(
+            worker_id=worker_id, defaults={"last_seen_at": timezone.now()}
+        )
+        hb.secs_per_cost = sample if hb.secs_per_cost is None else alpha * sample + (1 - alpha) * hb.secs_per_cost
+        hb.jobs_finished += 1
+        hb.last_seen_at = timezone.now()
+        hb.save(update_fields=["secs_per_cost", "jobs_finished", "last_seen_at"])
+
+
+def delete_stale_heartbeats(cutoff: datetime.datetime) -> int:
+    deleted, _ = WorkerHeartbeat.objects.filter(last_seen_at__lt=cutoff).delete()
+    return deleted
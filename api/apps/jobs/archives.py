@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tarfile
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from django.conf import settings
+
+from .artifacts import ARCHIVE_DIR, is_result_path
+from .models import Job
+
+logger = logging.getLogger("k2p.jobs")
+
+
+@dataclass(frozen=True)
+class ArchiveFormat:
+    name: str
+    # Download filename suffix, and the cached archive's name under ARCHIVE_DIR.
+    suffix: str
+    cache_name: str
+    content_type: str
+
+
+FORMATS = {
+    f.name: f
+    for f in (
+        ArchiveFormat("zip", ".zip", "result.zip", "application/zip"),
+        ArchiveFormat("zip-stored", ".zip", "result.stored.zip", "application/zip"),
+        ArchiveFormat("tar.gz", ".tar.gz", "result.tar.gz", "application/gzip"),
+        ArchiveFormat("tar.zst", ".tar.zst", "result.tar.zst", "application/zstd"),
+    )
+}
+
+# Accept header media type -> format, for clients that negotiate instead of passing ?format=.
+ACCEPT_FORMATS = {"application/gzip": "tar.gz", "application/x-gtar": "tar.gz", "application/zstd": "tar.zst"}
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def negotiate_format(query_format: str | None, accept: str) -> str:
+    """?format= wins; otherwise the first Accept media type we can produce; zip by default."""
+    if query_format:
+        return query_format
+    for part in (accept or "").split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return "zip"
+
+
+def result_paths(job: Job, results_dir: Path) -> list[str]:
+    """Files that go into a download: the artifact manifest, or a walk for jobs recorded before it."""
+    paths = list(job.artifacts.order_by("path").values_list("path", flat=True))
+    if paths:
+        return paths
+    walked = (p.relative_to(results_dir).as_posix() for p in results_dir.rglob("*") if p.is_file())
+    return sorted(rel for rel in walked if is_result_path(rel))
+
+
+def write_archive(
+    fmt: str,
+    results_dir: Path,
+    paths: Iterable[str],
+    fh: BinaryIO,
+    *,
+    zip_level: int | None = None,
+    gzip_level: int | None = None,
+    zstd_level: int | None = None,
+) -> None:
+    """Write paths (relative to results_dir) to fh as fmt; levels default to the RESULT_*_LEVEL settings."""
+    if fmt in ("zip", "zip-stored"):
+        if fmt == "zip":
+            level = int(getattr(settings, "RESULT_ZIP_LEVEL", 6)) if zip_level is None else zip_level
+            opts = {"compression": zipfile.ZIP_DEFLATED, "compresslevel": level}
+        else:
+            opts = {"compression": zipfile.ZIP_STORED}
+        with zipfile.ZipFile(fh, "w", **opts) as zf:
+            for rel in paths:
+                zf.write(results_dir / rel, arcname=rel)
+    elif fmt == "tar.gz":
+        level = int(getattr(settings, "RESULT_GZIP_LEVEL", 6)) if gzip_level is None else gzip_level
+        with tarfile.open(fileobj=fh, mode="w:gz", compresslevel=level) as tar:
+            for rel in paths:
+                tar.add(results_dir / rel, arcname=rel, recursive=False)
+    elif fmt == "tar.zst":
+        import zstandard
+
+        level = int(getattr(settings, "RESULT_ZSTD_LEVEL", 3)) if zstd_level is None else zstd_level
+        with zstandard.ZstdCompressor(level=level).stream_writer(fh, closefd=False) as zst:
+            with tarfile.open(fileobj=zst, mode="w|") as tar:
+                for rel in paths:
+                    tar.add(results_dir / rel, arcname=rel, recursive=False)
+    else:
+        raise ValueError(f"unknown archive format: {fmt}")
+
+
+def archive_path(results_dir: Path, fmt: str) -> Path:
+    # RESULT_STORAGE_ROOT/jobs/<id>/_archives/result.*, swept with the job's results.
+    return results_dir / ARCHIVE_DIR / FORMATS[fmt].cache_name
+
+
+def ensure_archive(job: Job, results_dir: Path, fmt: str) -> Path:
+    """Return the cached fmt archive of job's results, building it once if missing."""
+    path = archive_path(results_dir, fmt)
+    if path.is_file():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=".tmp-", delete=False) as tmp:
+        try:
+            write_archive(fmt, results_dir, result_paths(job, results_dir), tmp)
+        except BaseException:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+    os.replace(tmp.name, path)
+    return path
+
+
+def prebuild_archives(job: Job, results_dir: Path) -> None:
+    """Worker side: build the RESULT_ARCHIVE_FORMATS archives so downloads only stream a file."""
+    for fmt in getattr(settings, "RESULT_ARCHIVE_FORMATS", ["zip"]):
+        if fmt not in FORMATS or (fmt == "tar.zst" and not zstd_available()):
+            continue
+        try:
+            ensure_archive(job, results_dir, fmt)
+        except OSError as exc:
+            # The download view builds it on demand instead.
+            logger.warning(json.dumps({"event": "archive_build_failed", "job_id": str(job.id), "format": fmt, "error": str(exc)}))
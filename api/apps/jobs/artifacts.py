@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+from .models import Job, JobArtifact
+
+# Extracted input the worker ran from; results written before the scratch/results split can hold it.
+SCRATCH_DIR = "_work"
+# Pre-built download archives (see archives.py); not a result.
+ARCHIVE_DIR = "_archives"
+NON_RESULT_DIRS = {SCRATCH_DIR, ARCHIVE_DIR}
+# Container logs, in the results only with RESULT_INCLUDE_LOGS.
+LOGS_DIR = "logs"
+
+# Where the runner used to write logs, before they moved out of the result tree.
+_LEGACY_LOG_FILES = {"stdout.log", "stderr.log"}
+
+_CONTENT_TYPES = {
+    ".ipynb": "application/x-ipynb+json",
+    ".py": "text/x-python; charset=utf-8",
+    ".log": "text/plain; charset=utf-8",
+}
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def is_result_path(rel: str) -> bool:
+    """False for scratch input, cached archives and top-level runner logs (older result layouts)."""
+    parts = rel.split("/")
+    if parts[0] in NON_RESULT_DIRS:
+        return False
+    return not (len(parts) == 1 and parts[0] in _LEGACY_LOG_FILES)
+
+
+def content_type_for(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix in _CONTENT_TYPES:
+        return _CONTENT_TYPES[suffix]
+    guessed, _ = mimetypes.guess_type(path)
+    return guessed or "application/octet-stream"
+
+
+def _sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def record_artifacts(job: Job, out_dir: Path, paths: Iterable[str] | None = None) -> int:
+    """
+    Store the manifest (path, size, sha256, content type) of job's result files; returns the count.
+
+    paths are relative to out_dir (the runner's artifacts list); out_dir is walked when not given.
+    """
+    if paths is None:
+        paths = [p.relative_to(out_dir).as_posix() for p in out_dir.rglob("*") if p.is_file()]
+    rows = []
+    for rel in sorted(set(paths)):
+        if not is_result_path(rel):
+            continue
+        full = out_dir / rel
+        if not full.is_file() or full.is_symlink():
+            continue
+        rows.append(
+            JobArtifact(
+                job=job,
+                job_created_at=job.created_at,
+                path=rel,
+                size=full.stat().st_size,
+                sha256=_sha256_file(full),
+                content_type=content_type_for(rel),
+            )
+        )
+    JobArtifact.objects.filter(job=job).delete()
+    JobArtifact.objects.bulk_create(rows)
+    return len(rows)
+
+
+def copy_logs_to_results(log_dir: Path, out_dir: Path) -> list[str]:
+    """RESULT_INCLUDE_LOGS: copy the container logs into out_dir/logs/; returns their result paths."""
+    copied = []
+    for name in ("stdout.log", "stderr.log"):
+        src = log_dir / name
+        if src.is_file():
+            (out_dir / LOGS_DIR).mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src, out_dir / LOGS_DIR / name)
+            copied.append(f"{LOGS_DIR}/{name}")
+    return copied
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range "bytes=" Range header into an inclusive (start, end).
+
+    Returns None for a missing or unsupported (multi-range, other unit) header, so the whole
+    file is served; raises RangeNotSatisfiable when the range lies outside the file.
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def iter_file_range(fh, start: int, length: int, chunk_size: int = 64 * 1024):
+    """Yield length bytes of fh from start, then close it."""
+    try:
+        fh.seek(start)
+        while length > 0:
+            data = fh.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        fh.close()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from django.conf import settings
+
+logger = logging.getLogger("k2p.jobs")
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Fixed entry timestamp so the same files always assemble into byte-identical bundles.
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class BlobError(Exception):
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def blob_root() -> Path:
+    root = getattr(settings, "JOB_STORAGE_ROOT", None)
+    if root is None:
+        raise RuntimeError("JOB_STORAGE_ROOT is not configured in Django settings.")
+    return Path(root) / "blobs"
+
+
+def is_valid_digest(digest: str) -> bool:
+    return bool(_DIGEST_RE.match(digest or ""))
+
+
+def blob_path(digest: str) -> Path:
+    # Content-addressed: JOB_STORAGE_ROOT/blobs/<2-char fan-out>/<sha256>
+    if not is_valid_digest(digest):
+        raise BlobError("invalid_digest", "Blob digest must be a lowercase hex sha256.")
+    return blob_root() / digest[:2] / digest
+
+
+def missing_blobs(digests: Iterable[str]) -> list[str]:
+    """Return the digests the store lacks; refresh mtime on the ones it has so GC keeps them."""
+    missing: list[str] = []
+    now = time.time()
+    for digest in dict.fromkeys(digests):
+        path = blob_path(digest)
+        try:
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            missing.append(digest)
+    return missing
+
+
+def put_blob(digest: str, src: BinaryIO, *, max_bytes: int) -> bool:
+    """Store one blob after verifying its content hash. Returns False if it already existed."""
+    path = blob_path(digest)
+    if path.exists():
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as dst:
+            for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                size += len(chunk)
+                if max_bytes >= 0 and size > max_bytes:
+                    raise BlobError("blob_too_large", "Blob is too large.")
+                hasher.update(chunk)
+                dst.write(chunk)
+        if hasher.hexdigest() != digest:
+            raise BlobError("blob_checksum_mismatch", f"Blob content does not match {digest}.")
+        # Atomic publish: concurrent writers of the same digest write identical bytes.
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def assemble_bundle(entries: Iterable[tuple[str, str]], dst: BinaryIO) -> None:
+    """Write a deterministic ZIP of (path, digest) entries from the blob store into dst."""
+    with zipfile.ZipFile(dst, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, digest in sorted(entries):
+            info = zipfile.ZipInfo(name, date_time=_ZIP_EPOCH)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            with open(blob_path(digest), "rb") as src, zf.open(info, "w") as out:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    out.write(chunk)
+
+
+def delete_stale_blobs(cutoff: float) -> int:
+    """Delete blobs not referenced (mtime refreshed) since cutoff."""
+    root = blob_root()
+    if not root.exists():
+        return 0
+    deleted = 0
+    for fanout in os.scandir(root):
+        if not fanout.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(fanout.path):
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+    if deleted:
+        logger.info(json.dumps({"event": "blobs_expired", "count": deleted}))
+    return deleted
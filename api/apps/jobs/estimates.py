@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import statistics
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .admission import client_counter, worker_throughput
+from .models import AdmissionCounter, Job, RuntimeEstimate
+
+logger = logging.getLogger("k2p.jobs")
+
+ALL_SIZES_BUCKET = -1
+
+
+def size_bucket(input_size: int) -> int:
+    """Coarse log-scale bucket: each bucket spans 4x in input size."""
+    return max(int(input_size or 0), 1).bit_length() // 2
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def refresh_runtime_model(now: datetime.datetime | None = None) -> int:
+    """
+    Refit RuntimeEstimate from recent SUCCEEDED jobs' started_at/finished_at; returns samples used.
+
+    Run by the worker every ESTIMATE_REFRESH_INTERVAL_SECS, so detail requests only read the fit.
+    """
+    now = now or timezone.now()
+    window_days = int(getattr(settings, "ESTIMATE_WINDOW_DAYS", 7))
+    max_samples = int(getattr(settings, "ESTIMATE_MAX_SAMPLES", 2000))
+    rows = (
+        Job.objects.filter(
+            status=Job.Status.SUCCEEDED,
+            started_at__isnull=False,
+            finished_at__gte=now - datetime.timedelta(days=window_days),
+        )
+        .order_by("-finished_at")
+        .values_list("input_size", "started_at", "finished_at")[:max_samples]
+    )
+    by_bucket: dict[int, list[float]] = defaultdict(list)
+    for input_size, started_at, finished_at in rows:
+        run_s = max((finished_at - started_at).total_seconds(), 0.0)
+        by_bucket[size_bucket(input_size)].append(run_s)
+        by_bucket[ALL_SIZES_BUCKET].append(run_s)
+
+    fits = []
+    for bucket, samples in by_bucket.items():
+        samples.sort()
+        fits.append(
+            RuntimeEstimate(
+                size_bucket=bucket,
+                sample_count=len(samples),
+                p50_run_secs=statistics.median(samples),
+                p90_run_secs=_percentile(samples, 0.9),
+            )
+        )
+    with transaction.atomic():
+        RuntimeEstimate.objects.all().delete()
+        RuntimeEstimate.objects.bulk_create(fits)
+    samples_used = len(by_bucket.get(ALL_SIZES_BUCKET, []))
+    logger.info(json.dumps({"event": "runtime_model_refreshed", "samples": samples_used, "buckets": len(fits) - 1}))
+    return samples_used
+
+
+class RuntimeModel:
+    """Predicted run seconds by input size, read once from RuntimeEstimate."""
+
+    def __init__(self) -> None:
+        self._p50 = dict(RuntimeEstimate.objects.values_list("size_bucket", "p50_run_secs"))
+        self.default_secs = self._p50.get(
+            ALL_SIZES_BUCKET, float(getattr(settings, "ESTIMATE_DEFAULT_RUN_SECS", 60))
+        )
+
+    def predict(self, input_size: int) -> float:
+        return self._p50.get(size_bucket(input_size), self.default_secs)
+
+
+def queued_ahead(job: Job) -> list[int]:
+    """input_size of each QUEUED job the worker will claim before job (see scheduling.claim_next_job)."""
+    queued = Job.objects.filter(status=Job.Status.QUEUED)
+    if getattr(settings, "JOB_SCHEDULER", "fair") != "fair":
+        return list(queued.filter(created_at__lt=job.created_at).values_list("input_size", flat=True))
+
+    # Round-robin: job is its client's k-th waiting job, so it runs in round k. Every other
+    # client gets up to k - 1 turns before that round, plus one more in round k if it comes
+    # first in the round order: least recently served (never-served first), then oldest job.
+    # Each turn runs that client's oldest remaining job.
+    ahead = list(
+        queued.filter(client_hash=job.client_hash, created_at__lt=job.created_at).values_list("input_size", flat=True)
+    )
+    k = len(ahead) + 1
+    others: dict[str, list[tuple[datetime.datetime, int]]] = defaultdict(list)
+    for client, created_at, input_size in (
+        queued.exclude(client_hash=job.client_hash).order_by("created_at").values_list("client_hash", "created_at", "input_size")
+    ):
+        others[client].append((created_at, input_size))
+    served = dict(
+        AdmissionCounter.objects.filter(
+            name__in=[client_counter(c) for c in [job.client_hash, *others]]
+        ).values_list("name", "last_served_at")
+    )
+    floor = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+    mine = (served.get(client_counter(job.client_hash)) or floor, job.created_at)
+    for client, jobs in others.items():
+        turns = min(len(jobs), k - 1)
+        if len(jobs) >= k and (served.get(client_counter(client)) or floor, jobs[0][0]) < mine:
+            turns += 1
+        ahead.extend(input_size for _, input_size in jobs[:turns])
+    return ahead
+
+
+def queue_eta(job: Job, now: datetime.datetime | None = None) -> dict:
+    """
+    queue_position (1 = next to run), estimated_start_at and estimated_finish_at for job.
+
+    The predicted runtimes of the jobs ahead (each by its own size bucket) and running jobs'
+    remaining time are spread over the live worker slots.
+    """
+    now = now or timezone.now()
+    eta = {"queue_position": None, "estimated_start_at": None, "estimated_finish_at": None}
+    if job.status not in (Job.Status.QUEUED, Job.Status.RUNNING):
+        return eta
+
+    model = RuntimeModel()
+    own_secs = model.predict(job.input_size)
+    if job.status == Job.Status.RUNNING:
+        started = job.started_at or now
+        eta["estimated_finish_at"] = max(started + datetime.timedelta(seconds=own_secs), now)
+        return eta
+
+    ahead = queued_ahead(job)
+    slots = max(worker_throughput(now)[0], 1)
+    busy_secs = 0.0
+    for input_size, started_at in Job.objects.filter(status=Job.Status.RUNNING).values_list(
+        "input_size", "started_at"
+    ):
+        elapsed = (now - started_at).total_seconds() if started_at else 0.0
+        busy_secs += max(model.predict(input_size) - elapsed, 0.0)
+    wait_secs = (busy_secs + sum(model.predict(input_size) for input_size in ahead)) / slots
+    start = now + datetime.timedelta(seconds=wait_secs)
+    eta["queue_position"] = len(ahead) + 1
+    eta["estimated_start_at"] = start
+    eta["estimated_finish_at"] = start + datetime.timedelta(seconds=own_secs)
+    return eta
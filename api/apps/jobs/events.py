@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import datetime
+import os
+import socket
+import time
+
+from django.utils import timezone
+
+from .models import JobEvent
+
+
+def process_source() -> str:
+    """The emitting process, as in WorkerHeartbeat.worker_id."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _event(job_id, kind: str, payload: dict) -> JobEvent:
+    return JobEvent(
+        job_id=job_id,
+        kind=kind,
+        at=timezone.now(),
+        source=process_source(),
+        monotonic_ns=time.monotonic_ns(),
+        payload=payload,
+    )
+
+
+class EventBatch:
+    """Events timestamped when added and written with one INSERT by flush()."""
+
+    def __init__(self) -> None:
+        self._events: list[JobEvent] = []
+
+    def add(self, job_id, kind: str, **payload) -> None:
+        self._events.append(_event(job_id, kind, payload))
+
+    def flush(self) -> None:
+        if self._events:
+            JobEvent.objects.bulk_create(self._events)
+            self._events = []
+
+
+def record_event(job_id, kind: str, **payload) -> None:
+    """One event on its own, for transitions that are not part of a batch."""
+    _event(job_id, kind, payload).save()
+
+
+def delete_old_events(cutoff: datetime.datetime, *, limit: int = 10_000) -> int:
+    """Delete up to limit events older than cutoff (the worker calls this every cleanup cycle)."""
+    ids = list(JobEvent.objects.filter(at__lt=cutoff).order_by("at").values_list("id", flat=True)[:limit])
+    if not ids:
+        return 0
+    return JobEvent.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import PurePosixPath
+from typing import Iterable
+
+# OS clutter that never affects a run; ignored so re-zipping on another machine keeps the fingerprint.
+_IGNORED_NAMES = {".DS_Store", "Thumbs.db", "desktop.ini"}
+
+
+def is_junk_entry(name: str) -> bool:
+    base = PurePosixPath(name).name
+    return (
+        name.startswith("__MACOSX/")
+        or "/__MACOSX/" in name
+        or base.startswith("._")
+        or base in _IGNORED_NAMES
+    )
+
+
+def content_fingerprint(entries: Iterable[tuple[str, str]]) -> str:
+    """
+    Canonical bundle identity: sha256 over sorted "<path>\\0<sha256>\\n" lines.
+
+    Independent of ZIP packaging (entry order, timestamps, compression, directory
+    entries, OS junk). Paths are normalized zip names and sort by code point.
+    """
+    hasher = hashlib.sha256()
+    for path, digest in sorted((p, d) for p, d in entries if not is_junk_entry(p)):
+        hasher.update(f"{path}\0{digest}\n".encode("utf-8"))
+    return hasher.hexdigest()
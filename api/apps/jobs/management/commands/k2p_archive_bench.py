@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.archives import result_paths, write_archive, zstd_available
+from apps.jobs.models import Job
+
+# (format, level) pairs measured by default; level None means the format has no level.
+DEFAULT_CASES = [
+    ("zip-stored", None),
+    ("zip", 1),
+    ("zip", 6),
+    ("zip", 9),
+    ("tar.gz", 1),
+    ("tar.gz", 6),
+    ("tar.zst", 1),
+    ("tar.zst", 3),
+    ("tar.zst", 10),
+]
+
+
+class Command(BaseCommand):
+    help = "Measure result archive size and CPU per format/level over recent succeeded jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=50, help="Most recent SUCCEEDED jobs to sample")
+        parser.add_argument("--repeat", type=int, default=1, help="Runs per case (CPU time is averaged)")
+
+    def handle(self, *args, **opts):
+        root = Path(settings.RESULT_STORAGE_ROOT)
+        samples = []
+        for job in Job.objects.filter(status=Job.Status.SUCCEEDED).order_by("-finished_at")[: opts["jobs"]]:
+            results_dir = root / (job.result_key or f"jobs/{job.id}")
+            if results_dir.is_dir():
+                paths = result_paths(job, results_dir)
+                if paths:
+                    samples.append((results_dir, paths))
+        if not samples:
+            raise CommandError("No succeeded jobs with results on disk.")
+
+        raw_bytes = sum((d / p).stat().st_size for d, paths in samples for p in paths)
+        self.stdout.write(f"{len(samples)} jobs, {raw_bytes} result bytes\n")
+        self.stdout.write(f"{'format':<12}{'level':>6}{'bytes':>14}{'ratio':>8}{'cpu ms/job':>12}{'MB/s':>9}")
+
+        repeat = max(opts["repeat"], 1)
+        for fmt, level in DEFAULT_CASES:
+            if fmt == "tar.zst" and not zstd_available():
+                continue
+            levels = {"zip": {"zip_level": level}, "tar.gz": {"gzip_level": level}, "tar.zst": {"zstd_level": level}}
+            size = 0
+            cpu_s = 0.0
+            for _ in range(repeat):
+                size = 0
+                for results_dir, paths in samples:
+                    with tempfile.TemporaryFile() as fh:
+                        start = time.process_time()
+                        write_archive(fmt, results_dir, paths, fh, **levels.get(fmt, {}))
+                        cpu_s += time.process_time() - start
+                        size += fh.tell()
+            cpu_s /= repeat
+            mb_per_s = raw_bytes / cpu_s / (1024 * 1024) if cpu_s > 0 else float("inf")
+            self.stdout.write(
+                f"{fmt:<12}{'-' if level is None else level:>6}{size:>14}{size / raw_bytes:>8.3f}"
+                f"{cpu_s * 1000 / len(samples):>12.1f}{mb_per_s:>9.1f}"
+            )
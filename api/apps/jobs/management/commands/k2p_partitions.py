@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.jobs.management.commands.k2p_worker import Command as WorkerCommand
+from apps.jobs.partitions import (
+    PARTITIONED,
+    PERIODS,
+    convert,
+    drop_expired_partitions,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    partition_period,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Postgres job history partitioning: status | convert (one-off, from the unpartitioned tables; "
+        "stop the API and worker first) | ensure (create upcoming partitions) | drop-expired."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["status", "convert", "ensure", "drop-expired"])
+        parser.add_argument("--period", choices=PERIODS, help="Partition size for convert (default JOB_PARTITION_PERIOD)")
+        parser.add_argument("--dry-run", action="store_true", help="drop-expired: only list what would be dropped")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs Postgres (DB_ENGINE=postgres).")
+        now = timezone.now()
+        action = opts["action"]
+
+        if action == "status":
+            for model in PARTITIONED:
+                table = model._meta.db_table
+                if not is_partitioned(table):
+                    self.stdout.write(f"{table}: not partitioned")
+                    continue
+                parts = list_partitions(table)
+                self.stdout.write(f"{table}: {len(parts)} partitions")
+                for part in parts:
+                    self.stdout.write(f"  {part.name}  {part.start:%Y-%m-%d} .. {part.end:%Y-%m-%d}")
+        elif action == "convert":
+            period = opts["period"] or partition_period()
+            if period not in PERIODS:
+                raise CommandError("Pass --period day|week or set JOB_PARTITION_PERIOD.")
+            for table, moved in convert(period, now).items():
+                self.stdout.write(self.style.SUCCESS(f"{table}: partitioned by {period}, {moved} rows moved"))
+            if partition_period() != period:
+                self.stdout.write(self.style.WARNING(f"Set JOB_PARTITION_PERIOD={period} for the worker."))
+        elif action == "ensure":
+            if partition_period() not in PERIODS:
+                raise CommandError("Set JOB_PARTITION_PERIOD=day|week.")
+            for name in ensure_partitions(now):
+                self.stdout.write(f"created {name}")
+        else:
+            failed_days = int(getattr(settings, "RETENTION_FAILED_DAYS", 1))
+            succeeded_days = int(getattr(settings, "RETENTION_SUCCEEDED_DAYS", 7))
+            if failed_days < 0 or succeeded_days < 0:
+                raise CommandError("Retention is disabled for some statuses; nothing can be dropped.")
+            cutoff = now - datetime.timedelta(days=max(failed_days, succeeded_days))
+            # Same file sweep as the worker's retention.
+            dropped = drop_expired_partitions(cutoff, sweep=WorkerCommand._delete_job_files, dry_run=opts["dry_run"])
+            verb = "would drop" if opts["dry_run"] else "dropped"
+            for name in dropped:
+                self.stdout.write(f"{verb} {name}")
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import datetime
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.jobs.admission import reconcile
+from apps.jobs.estimates import queue_eta
+from apps.jobs.models import Job
+from apps.jobs.scheduling import claim_next_job
+
+TERMINAL = [Job.Status.SUCCEEDED, Job.Status.SUCCEEDED, Job.Status.SUCCEEDED, Job.Status.FAILED, Job.Status.CANCELLED]
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def _explicit_created_at():
+    # created_at is auto_now_add, which bulk_create would overwrite with the insert time;
+    # the seeded history needs its spread of creation times.
+    field = Job._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed finished job history in steps and time the queue hot paths (claim, admission reconcile, "
+        "queue ETA, retention scan) at each size. Runs in one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--history", type=int, default=1_000_000, help="Finished jobs seeded in total")
+        parser.add_argument("--steps", type=int, default=4, help="Measure after each of this many seeding steps")
+        parser.add_argument("--queued", type=int, default=50, help="QUEUED jobs waiting during the measurement")
+        parser.add_argument("--clients", type=int, default=1000, help="Distinct client hashes in the history")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query (median reported)")
+        parser.add_argument("--batch", type=int, default=10_000, help="bulk_create batch size")
+
+    def handle(self, *args, **opts):
+        if opts["steps"] < 1 or opts["history"] < 0:
+            raise CommandError("--steps must be >= 1 and --history >= 0")
+        try:
+            with transaction.atomic():
+                self._run(opts)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Seeded rows rolled back.")
+
+    def _run(self, opts) -> None:
+        rng = random.Random(0)
+        now = timezone.now()
+        clients = [uuid.UUID(int=rng.getrandbits(128)).hex * 2 for _ in range(max(opts["clients"], 1))]
+        Job.objects.bulk_create(
+            Job(status=Job.Status.QUEUED, client_hash=clients[i % 5], input_size=1024 * (i + 1))
+            for i in range(opts["queued"])
+        )
+        newest_queued = Job.objects.filter(status=Job.Status.QUEUED).order_by("-created_at").first()
+
+        self.stdout.write(
+            f"{'history':>10}{'claim ms':>10}{'reconcile ms':>14}{'queue eta ms':>14}{'retention ms':>14}"
+        )
+        per_step = opts["history"] // opts["steps"]
+        seeded = 0
+        for step in range(opts["steps"]):
+            target = opts["history"] if step == opts["steps"] - 1 else seeded + per_step
+            while seeded < target:
+                count = min(opts["batch"], target - seeded)
+                self._seed(rng, clients, now, count, opts["batch"])
+                seeded += count
+            with connection.cursor() as cursor:
+                # Fresh planner statistics, as autovacuum would have by now in production.
+                cursor.execute(f"ANALYZE {Job._meta.db_table}")
+
+            cutoff = now - datetime.timedelta(days=7)
+            claim = self._median_ms(lambda: self._rolled_back(claim_next_job), opts["repeat"])
+            admission = self._median_ms(lambda: self._rolled_back(reconcile), opts["repeat"])
+            eta = self._median_ms(lambda: queue_eta(newest_queued, now), opts["repeat"])
+            retention = self._median_ms(
+                lambda: list(
+                    Job.objects.filter(status=Job.Status.FAILED, finished_at__lt=cutoff).values_list("id", flat=True)[:100]
+                ),
+                opts["repeat"],
+            )
+            self.stdout.write(f"{seeded:>10}{claim:>10.2f}{admission:>14.2f}{eta:>14.2f}{retention:>14.2f}")
+
+    def _seed(self, rng: random.Random, clients: list[str], now: datetime.datetime, count: int, batch: int) -> None:
+        with _explicit_created_at():
+            Job.objects.bulk_create(self._history(rng, clients, now, count), batch_size=batch)
+
+    @staticmethod
+    def _history(rng: random.Random, clients: list[str], now: datetime.datetime, count: int):
+        for _ in range(count):
+            created = now - datetime.timedelta(seconds=rng.uniform(60, 30 * 24 * 3600))
+            started = created + datetime.timedelta(seconds=rng.uniform(0, 30))
+            yield Job(
+                status=rng.choice(TERMINAL),
+                created_at=created,
+                started_at=started,
+                finished_at=started + datetime.timedelta(seconds=rng.uniform(1, 120)),
+                last_seen_at=created,
+                client_hash=rng.choice(clients),
+                input_size=rng.randint(1024, 50 * 1024 * 1024),
+            )
+
+    @staticmethod
+    def _rolled_back(fn) -> None:
+        # Leaves the queue as it was, so every run measures the same state.
+        try:
+            with transaction.atomic():
+                fn()
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    @staticmethod
+    def _median_ms(fn, repeat: int) -> float:
+        samples = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import logging
 import os
+import socket
 import time
 import zipfile
 import shutil
@@ -13,15 +14,31 @@ from prometheus_client import start_http_server
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 
 from apps.core.db_logging import log_db_settings
-from apps.jobs.models import Job
+from apps.jobs.abandoned import cancel_abandoned_jobs
+from apps.jobs.admission import (
+    delete_stale_heartbeats,
+    finish_job,
+    reconcile,
+    record_heartbeat,
+    record_job_run,
+)
+from apps.jobs.archives import prebuild_archives
+from apps.jobs.artifacts import copy_logs_to_results, record_artifacts
+from apps.jobs.blobs import delete_stale_blobs
+from apps.jobs.estimates import refresh_runtime_model
+from apps.jobs.events import EventBatch, delete_old_events, record_event
+from apps.jobs.models import Job, JobDiagnostics, JobEvent
+from apps.jobs.partitions import drop_expired_partitions, ensure_partitions, is_partitioned, partitioning_enabled
 from apps.jobs.metrics_worker import (
+    ABANDONED_JOBS_CANCELLED_TOTAL,
+    ABANDONED_RUN_SECONDS_SAVED_TOTAL,
     JOB_DURATION_SECONDS,
     JOB_END_TO_END_SECONDS,
     JOB_FINISHED_TOTAL,
+    JOB_PHASE_SECONDS,
     JOB_QUEUE_WAIT_SECONDS,
     JOB_RUN_SECONDS,
     K2P_ERROR_TOTAL,
@@ -29,8 +46,11 @@ from apps.jobs.metrics_worker import (
     WORKER_ERRORS_TOTAL,
     WORKER_HEARTBEAT_TIMESTAMP_SECONDS,
 )
-from apps.jobs.runner import DockerRunner, RunnerError
+from apps.jobs.runner import DockerRunner, RunnerCancelled, RunnerError
+from apps.jobs.scheduling import claim_next_job
 from apps.jobs.security import ZipLimits, ZipValidationError, safe_extract_zip
+from apps.jobs.tracing import PhaseTrace
+from apps.jobs.uploads import delete_expired_sessions
 
 logger = logging.getLogger("k2p.worker")
 
@@ -45,6 +65,11 @@ class Command(BaseCommand):
         runner = self._build_runner()
         cleanup_interval_s = int(getattr(settings, "RETENTION_CLEANUP_INTERVAL_SECS", 300))
         next_cleanup = time.time() + cleanup_interval_s
+        reconcile_interval_s = int(getattr(settings, "ADMISSION_RECONCILE_INTERVAL_SECS", 60))
+        next_reconcile = time.time()
+        next_heartbeat = time.time()
+        estimate_interval_s = int(getattr(settings, "ESTIMATE_REFRESH_INTERVAL_SECS", 300))
+        next_estimate = time.time()
 
         # Expose worker metrics
         addr = os.environ.get("WORKER_METRICS_ADDR", "0.0.0.0")
@@ -59,6 +84,19 @@ class Command(BaseCommand):
                     if cleanup_interval_s > 0 and time.time() >= next_cleanup:
                         self._cleanup_old_jobs()
                         next_cleanup = time.time() + cleanup_interval_s
+                    if reconcile_interval_s > 0 and time.time() >= next_reconcile:
+                        cancelled, saved_s = cancel_abandoned_jobs()
+                        ABANDONED_JOBS_CANCELLED_TOTAL.inc(cancelled)
+                        ABANDONED_RUN_SECONDS_SAVED_TOTAL.inc(saved_s)
+                        reconcile()
+                        next_reconcile = time.time() + reconcile_interval_s
+                    if estimate_interval_s > 0 and time.time() >= next_estimate:
+                        refresh_runtime_model()
+                        next_estimate = time.time() + estimate_interval_s
+                    if time.time() >= next_heartbeat:
+                        # DB heartbeat: marks this worker as a live slot for adaptive admission.
+                        record_heartbeat(self._worker_id)
+                        next_heartbeat = time.time() + 10
                     WORKER_HEARTBEAT_TIMESTAMP_SECONDS.set(time.time())
                 except Exception:  # noqa: BLE001
                     WORKER_ERRORS_TOTAL.inc()
@@ -68,6 +106,10 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Worker stopped."))
             return
 
+    @property
+    def _worker_id(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
     def _build_runner(self) -> DockerRunner:
         backend = getattr(settings, "JOB_RUNNER_BACKEND", "docker")
         if backend != "docker":
@@ -88,42 +130,55 @@ class Command(BaseCommand):
             host_job_storage_root=str(getattr(settings, "HOST_JOB_STORAGE_ROOT", "")),
             host_result_storage_root=str(getattr(settings, "HOST_RESULT_STORAGE_ROOT", "")),
             logger=logger,
+            cancel_poll_s=float(getattr(settings, "JOB_CANCEL_POLL_SECS", 0.5)),
+            log_tail_bytes=int(getattr(settings, "LOG_TAIL_BYTES", 4000)),
+            log_publish_s=float(getattr(settings, "LOG_PUBLISH_INTERVAL_SECS", 2.0)),
         )
 
     def _run_one(self, *, runner: DockerRunner) -> None:
-        with transaction.atomic():
-            job = (
-                Job.objects.select_for_update(skip_locked=True)
-                .filter(status=Job.Status.QUEUED)
-                .order_by("created_at")
-                .first()
-            )
-            if not job:
-                return
+        start = time.perf_counter()
+        job = claim_next_job()
+        if not job:
+            return
+        # Idle polls are not recorded; "claim" is the transaction that handed out this job.
+        trace = PhaseTrace(JOB_PHASE_SECONDS)
+        trace.record("claim", time.perf_counter() - start)
+        # Written before the container starts and after the job ends; "finished" comes from finish_job.
+        events = EventBatch()
+        events.add(job.id, JobEvent.Kind.CLAIMED, worker=self._worker_id)
+        try:
+            self._run_claimed(job, runner, trace, events)
+        finally:
+            events.flush()
 
-            logger.info(
-                json.dumps(
-                    {
-                        "event": "job_picked",
-                        "job_id": str(job.id),
-                    }
-                )
+    def _run_claimed(self, job: Job, runner: DockerRunner, trace: PhaseTrace, events: EventBatch) -> None:
+        logger.info(
+            json.dumps(
+                {
+                    "event": "job_picked",
+                    "job_id": str(job.id),
+                }
             )
-
-            job.status = Job.Status.RUNNING
-            job.started_at = timezone.now()
-            job.save(update_fields=["status", "started_at"])
+        )
 
         if job.created_at and job.started_at:
             JOB_QUEUE_WAIT_SECONDS.observe((job.started_at - job.created_at).total_seconds())
 
         # input_key is e.g. jobs/<uuid>/<stem>.zip stored under JOB_STORAGE_ROOT
         in_host = Path(settings.JOB_STORAGE_ROOT) / job.input_key
+        # Scratch (extracted input, removed after the run) and container logs live next to the
+        # input; RESULT_STORAGE_ROOT/jobs/<uuid>/ only receives what knime2py generates.
+        job_dir = Path(settings.JOB_STORAGE_ROOT) / f"jobs/{job.id}"
+        work_dir = job_dir / "_work"
+        log_dir = job_dir / "logs"
         out_dir = Path(settings.RESULT_STORAGE_ROOT) / f"jobs/{job.id}"
         out_dir.mkdir(parents=True, exist_ok=True)
 
-        if not in_host.exists():
-            Job.objects.filter(id=job.id).update(
+        with trace.phase("input_check"):
+            input_exists = in_host.exists()
+        if not input_exists:
+            finish_job(
+                job.id,
                 status=Job.Status.FAILED,
                 finished_at=timezone.now(),
                 error_code="input_missing",
@@ -132,20 +187,16 @@ class Command(BaseCommand):
             return
 
         # Unzip workflow into a working directory for runner.
-        work_dir = out_dir / "_work"
         if work_dir.exists():
             shutil.rmtree(work_dir, ignore_errors=True)
         work_dir.mkdir(parents=True, exist_ok=True)
         try:
-            limits = ZipLimits(
-                max_files=getattr(settings, "MAX_ZIP_FILES", 2000),
-                max_path_depth=getattr(settings, "MAX_ZIP_PATH_DEPTH", 20),
-                max_unpacked_bytes=getattr(settings, "MAX_UNPACKED_BYTES", 300 * 1024 * 1024),
-                max_file_bytes=getattr(settings, "MAX_FILE_BYTES", 50 * 1024 * 1024),
-            )
-            safe_extract_zip(in_host, work_dir, limits=limits)
+            with trace.phase("extract"):
+                self._extract(in_host, work_dir)
         except zipfile.BadZipFile:
-            Job.objects.filter(id=job.id).update(
+            shutil.rmtree(work_dir, ignore_errors=True)
+            finish_job(
+                job.id,
                 status=Job.Status.FAILED,
                 finished_at=timezone.now(),
                 error_code="invalid_zip",
@@ -153,7 +204,9 @@ class Command(BaseCommand):
             )
             return
         except ZipValidationError as exc:
-            Job.objects.filter(id=job.id).update(
+            shutil.rmtree(work_dir, ignore_errors=True)
+            finish_job(
+                job.id,
                 status=Job.Status.FAILED,
                 finished_at=timezone.now(),
                 error_code=exc.code,
@@ -161,10 +214,12 @@ class Command(BaseCommand):
             )
             return
 
-        workflow_dir = work_dir
-        found = list(work_dir.rglob("workflow.knime"))
-        if found:
-            workflow_dir = found[0].parent
+        with trace.phase("workflow_discovery"):
+            workflow_dir = work_dir
+            found = list(work_dir.rglob("workflow.knime"))
+            if found:
+                workflow_dir = found[0].parent
+        events.add(job.id, JobEvent.Kind.EXTRACTED, extract_secs=round(trace.phases["extract"], 4))
 
         finished_at = timezone.now()
         exit_code: int | None = None
@@ -174,8 +229,38 @@ class Command(BaseCommand):
         error_code = ""
         error_message = ""
 
+        def cancel_requested() -> bool:
+            return Job.objects.filter(id=job.id, cancel_requested_at__isnull=False).exists()
+
+        def container_started() -> None:
+            events.add(job.id, JobEvent.Kind.CONTAINER_STARTED)
+            events.flush()
+
+        def publish_logs(stdout_tail: str, stderr_tail: str) -> None:
+            # Live tails for GET /logs and /logs/stream; the final ones are written before finish_job.
+            JobDiagnostics.objects.update_or_create(
+                job_id=job.id, defaults={"stdout_tail": stdout_tail, "stderr_tail": stderr_tail}
+            )
+
         try:
-            result = runner.run_job(str(job.id), workflow_dir, out_dir)
+            result = runner.run_job(
+                str(job.id),
+                workflow_dir,
+                out_dir,
+                log_dir=log_dir,
+                should_cancel=cancel_requested,
+                on_log=publish_logs,
+                trace=trace,
+                on_start=container_started,
+            )
+            with trace.phase("artifact_record"):
+                artifacts = result.get("artifacts")
+                if getattr(settings, "RESULT_INCLUDE_LOGS", False):
+                    log_paths = copy_logs_to_results(log_dir, out_dir)
+                    artifacts = None if artifacts is None else [*artifacts, *log_paths]
+                record_artifacts(job, out_dir, artifacts)
+            with trace.phase("archive_build"):
+                prebuild_archives(job, out_dir)
             exit_code = result.get("exit_code")
             stdout_tail = result.get("stdout_tail", "") or ""
             stderr_tail = result.get("stderr_tail", "") or ""
@@ -189,6 +274,13 @@ class Command(BaseCommand):
                     }
                 )
             )
+        except RunnerCancelled as exc:
+            status = Job.Status.CANCELLED
+            error_code = "cancelled"
+            exit_code = exc.exit_code
+            stdout_tail = exc.stdout_tail
+            stderr_tail = exc.stderr_tail
+            error_message = "Job was cancelled while running; the container was stopped."
         except RunnerError as exc:
             status = Job.Status.FAILED
             error_code = "runner_failed"
@@ -197,36 +289,42 @@ class Command(BaseCommand):
             stderr_tail = exc.stderr_tail
             msg = str(exc)
             detail = f"{msg}" if msg else "runner_failed"
-            error_message = (
-                f"runner_failed: {detail} "
-                f"(exit={exc.exit_code}, stderr_tail={exc.stderr_tail[:1000]}, stdout_tail={exc.stdout_tail[:1000]})"
-            )
+            # The tails themselves are in JobDiagnostics (GET /api/jobs/<uuid>/logs).
+            error_message = f"runner_failed: {detail} (exit={exc.exit_code})"
 
-        result_key = f"jobs/{job.id}/"
-        finished_at = timezone.now()
-        Job.objects.filter(id=job.id).update(
-            status=status,
-            finished_at=finished_at,
-            exit_code=exit_code,
-            result_key=result_key,
-            stdout_tail=stdout_tail,
-            stderr_tail=stderr_tail,
-            error_code=error_code,
-            error_message=error_message,
-        )
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+        with trace.phase("finish"):
+            # Before the status flips, so log followers see the final tails with the end state.
+            if stdout_tail or stderr_tail:
+                publish_logs(stdout_tail, stderr_tail)
+            result_key = f"jobs/{job.id}/"
+            finished_at = timezone.now()
+            finish_job(
+                job.id,
+                status=status,
+                finished_at=finished_at,
+                exit_code=exit_code,
+                result_key=result_key,
+                error_code=error_code,
+                error_message=error_message,
+            )
 
         duration_s = None
         if job.started_at:
             duration_s = (finished_at - job.started_at).total_seconds()
             JOB_DURATION_SECONDS.observe(duration_s)
             JOB_RUN_SECONDS.observe(duration_s)
+            if status != Job.Status.CANCELLED:
+                # A killed run says nothing about how long the job would have taken.
+                record_job_run(self._worker_id, job.admission_cost, duration_s)
         if job.created_at:
             JOB_END_TO_END_SECONDS.observe((finished_at - job.created_at).total_seconds())
 
         JOB_FINISHED_TOTAL.labels(status=status.value).inc()
         if exit_code is not None:
             K2P_EXIT_CODE_TOTAL.labels(exit_code=str(exit_code)).inc()
-        if status != Job.Status.SUCCEEDED:
+        if status == Job.Status.FAILED:
             K2P_ERROR_TOTAL.inc()
 
         logger.info(
@@ -237,20 +335,54 @@ class Command(BaseCommand):
                     "status": status.value,
                     "duration_seconds": duration_s,
                     "error_code": error_code,
+                    "phase_seconds": trace.log_fields(),
                 }
             )
         )
 
+    @staticmethod
+    def _extract(in_host: Path, work_dir: Path) -> None:
+        limits = ZipLimits(
+            max_files=getattr(settings, "MAX_ZIP_FILES", 2000),
+            max_path_depth=getattr(settings, "MAX_ZIP_PATH_DEPTH", 20),
+            max_unpacked_bytes=getattr(settings, "MAX_UNPACKED_BYTES", 300 * 1024 * 1024),
+            max_file_bytes=getattr(settings, "MAX_FILE_BYTES", 50 * 1024 * 1024),
+        )
+        safe_extract_zip(
+            in_host,
+            work_dir,
+            limits=limits,
+            fast=bool(getattr(settings, "ZIP_FAST_EXTRACT", True)),
+            max_workers=int(getattr(settings, "ZIP_EXTRACT_WORKERS", 4)),
+        )
+
     def _cleanup_old_jobs(self) -> None:
         failed_days = int(getattr(settings, "RETENTION_FAILED_DAYS", 1))
         succeeded_days = int(getattr(settings, "RETENTION_SUCCEEDED_DAYS", 7))
         now = timezone.now()
-        if failed_days >= 0:
-            cutoff = now - datetime.timedelta(days=failed_days)
-            self._delete_jobs_older_than(Job.Status.FAILED, cutoff)
-        if succeeded_days >= 0:
-            cutoff = now - datetime.timedelta(days=succeeded_days)
-            self._delete_jobs_older_than(Job.Status.SUCCEEDED, cutoff)
+        if partitioning_enabled() and is_partitioned(Job._meta.db_table):
+            # Whole periods at once: every status is kept for the longer retention window, so
+            # FAILED/CANCELLED jobs stay as long as SUCCEEDED ones.
+            ensure_partitions(now)
+            if failed_days >= 0 and succeeded_days >= 0:
+                cutoff = now - datetime.timedelta(days=max(failed_days, succeeded_days))
+                drop_expired_partitions(cutoff, sweep=self._delete_job_files)
+        else:
+            if failed_days >= 0:
+                cutoff = now - datetime.timedelta(days=failed_days)
+                self._delete_jobs_older_than(Job.Status.FAILED, cutoff)
+                self._delete_jobs_older_than(Job.Status.CANCELLED, cutoff)
+            if succeeded_days >= 0:
+                cutoff = now - datetime.timedelta(days=succeeded_days)
+                self._delete_jobs_older_than(Job.Status.SUCCEEDED, cutoff)
+        delete_expired_sessions(now)
+        delete_stale_heartbeats(now - datetime.timedelta(days=1))
+        event_days = int(getattr(settings, "JOB_EVENT_RETENTION_DAYS", 30))
+        if event_days >= 0:
+            delete_old_events(now - datetime.timedelta(days=event_days))
+        blob_days = int(getattr(settings, "BLOB_RETENTION_DAYS", 7))
+        if blob_days >= 0:
+            delete_stale_blobs(time.time() - blob_days * 24 * 60 * 60)
 
     def _delete_jobs_older_than(self, status: Job.Status, cutoff) -> None:
         old_jobs = Job.objects.filter(status=status, finished_at__lt=cutoff)[:100]
@@ -259,13 +391,19 @@ class Command(BaseCommand):
             job.delete()
 
     def _delete_job_artifacts(self, job: Job) -> None:
+        if self._delete_job_files(job.id):
+            record_event(job.id, JobEvent.Kind.CLEANED_UP, status=job.status)
+
+    @staticmethod
+    def _delete_job_files(job_id) -> bool:
         job_root = Path(settings.JOB_STORAGE_ROOT).resolve()
         result_root = Path(settings.RESULT_STORAGE_ROOT).resolve()
-        job_dir = (job_root / f"jobs/{job.id}").resolve()
-        result_dir = (result_root / f"jobs/{job.id}").resolve()
+        job_dir = (job_root / f"jobs/{job_id}").resolve()
+        result_dir = (result_root / f"jobs/{job_id}").resolve()
         if job_dir == job_root or job_root not in job_dir.parents:
-            return
+            return False
         if result_dir == result_root or result_root not in result_dir.parents:
-            return
+            return False
         shutil.rmtree(job_dir, ignore_errors=True)
         shutil.rmtree(result_dir, ignore_errors=True)
+        return True
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from django.db.models import Count, Max
-from prometheus_client import Counter, REGISTRY
+import datetime
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from prometheus_client import Counter, Histogram, REGISTRY
 from prometheus_client.core import GaugeMetricFamily
 
-from .models import Job
+from .models import Job, MetricsSnapshot
 
 
 JOB_CREATED_TOTAL = Counter(
@@ -17,6 +22,62 @@ ENQUEUE_REJECTED_TOTAL = Counter(
     "Total number of job enqueue rejections",
 )
 
+METRICS_SNAPSHOT_REFRESH_TOTAL = Counter(
+    "k2p_metrics_snapshot_refresh_total",
+    "Job table metric queries run by this process (one per scrape when METRICS_DB_CACHE_SECS=0)",
+)
+
+INGEST_PHASE_SECONDS = Histogram(
+    "k2p_ingest_phase_seconds",
+    "Wall time of one phase of POST /api/jobs (seconds), by bundle size and zip entry count",
+    ["phase", "size", "entries"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+SNAPSHOT_NAME = "jobs"
+
+
+def query_job_metrics() -> dict:
+    """The full-table queries behind the job gauges."""
+    counts = Job.objects.values("status").annotate(count=Count("id")).iterator()
+    last_finished = Job.objects.aggregate(latest=Max("finished_at"))["latest"]
+    return {
+        "by_status": {row["status"]: row["count"] for row in counts},
+        "last_finished": last_finished.timestamp() if last_finished else 0,
+    }
+
+
+def _refresh(snap: MetricsSnapshot, now: datetime.datetime) -> MetricsSnapshot:
+    start = time.perf_counter()
+    snap.data = query_job_metrics()
+    snap.refresh_secs = time.perf_counter() - start
+    snap.refreshed_at = now
+    METRICS_SNAPSHOT_REFRESH_TOTAL.inc()
+    return snap
+
+
+def job_metrics_snapshot(ttl: float, now: datetime.datetime) -> MetricsSnapshot:
+    """
+    The shared job metrics row, recomputed when older than ttl seconds.
+
+    A scrape is a primary key read. When the row is stale, the process whose claim lands
+    runs the queries; every other process keeps serving the previous values meanwhile, so
+    the table is scanned once per ttl however many processes and scrapers there are.
+    ttl <= 0 queries on every call and stores nothing.
+    """
+    if ttl <= 0:
+        return _refresh(MetricsSnapshot(name=SNAPSHOT_NAME), now)
+    snap = MetricsSnapshot.objects.filter(name=SNAPSHOT_NAME).first()
+    if snap is None:
+        snap, _ = MetricsSnapshot.objects.get_or_create(name=SNAPSHOT_NAME)
+    if snap.refreshed_at is not None and (now - snap.refreshed_at).total_seconds() < ttl:
+        return snap
+    expired = Q(claimed_at__isnull=True) | Q(claimed_at__lte=now - datetime.timedelta(seconds=ttl))
+    if not MetricsSnapshot.objects.filter(expired, name=SNAPSHOT_NAME).update(claimed_at=now):
+        return snap
+    _refresh(snap, now).save(update_fields=["data", "refresh_secs", "refreshed_at"])
+    return snap
+
 
 class JobsDbMetricsCollector:
     def describe(self):
@@ -33,15 +94,36 @@ class JobsDbMetricsCollector:
             "k2p_last_job_finished_timestamp_seconds",
             "Unix timestamp of most recently finished job",
         )
+        yield GaugeMetricFamily(
+            "k2p_metrics_snapshot_age_seconds",
+            "Age of the job gauges served by this scrape",
+        )
+        yield GaugeMetricFamily(
+            "k2p_metrics_snapshot_refresh_seconds",
+            "Duration of the job table queries behind the last refresh",
+        )
 
     def collect(self):
-        counts = (
-            Job.objects.values("status")
-            .annotate(count=Count("id"))
-            .iterator()
+        now = timezone.now()
+        snap = job_metrics_snapshot(float(getattr(settings, "METRICS_DB_CACHE_SECS", 15)), now)
+
+        age = GaugeMetricFamily(
+            "k2p_metrics_snapshot_age_seconds",
+            "Age of the job gauges served by this scrape",
+        )
+        age.add_metric([], (now - snap.refreshed_at).total_seconds() if snap.refreshed_at else 0)
+        yield age
+        refresh = GaugeMetricFamily(
+            "k2p_metrics_snapshot_refresh_seconds",
+            "Duration of the job table queries behind the last refresh",
         )
-        counts_by_status = {row["status"]: row["count"] for row in counts}
+        refresh.add_metric([], snap.refresh_secs)
+        yield refresh
+        if snap.refreshed_at is None:
+            # The first refresh is still running in another process.
+            return
 
+        counts_by_status = snap.data.get("by_status", {})
         jobs_by_state = GaugeMetricFamily(
             "k2p_jobs_by_state",
             "Number of jobs by state",
@@ -61,13 +143,11 @@ class JobsDbMetricsCollector:
         queue_depth.add_metric([], counts_by_status.get(Job.Status.QUEUED.value, 0))
         yield queue_depth
 
-        last_finished = Job.objects.aggregate(latest=Max("finished_at"))["latest"]
-        last_finished_ts = last_finished.timestamp() if last_finished else 0
         last_finished_metric = GaugeMetricFamily(
             "k2p_last_job_finished_timestamp_seconds",
             "Unix timestamp of most recently finished job",
         )
-        last_finished_metric.add_metric([], last_finished_ts)
+        last_finished_metric.add_metric([], snap.data.get("last_finished", 0))
         yield last_finished_metric
 
 
@@ -76,3 +156,22 @@ def register_jobs_db_metrics_collector() -> None:
         return
     REGISTRY.register(JobsDbMetricsCollector())
     setattr(REGISTRY, "_k2p_jobs_db_collector_registered", True)
+
+
+_SIZE_BUCKETS = ((1 << 20, "<1MiB"), (10 << 20, "<10MiB"), (50 << 20, "<50MiB"))
+_ENTRY_BUCKETS = ((100, "<100"), (500, "<500"), (2000, "<2000"))
+
+
+def _bucket(value: int, bounds: tuple[tuple[int, str], ...]) -> str:
+    for bound, label in bounds:
+        if value < bound:
+            return label
+    return f">={bounds[-1][1][1:]}"
+
+
+def observe_ingest(phases: dict[str, float], size: int, entries: int | None) -> None:
+    """Record one upload's phase times; entries is None when the zip was rejected before it was read."""
+    size_label = _bucket(size, _SIZE_BUCKETS)
+    entries_label = "unknown" if entries is None else _bucket(entries, _ENTRY_BUCKETS)
+    for name, seconds in phases.items():
+        INGEST_PHASE_SECONDS.labels(phase=name, size=size_label, entries=entries_label).observe(seconds)
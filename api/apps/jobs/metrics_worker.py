@@ -53,3 +53,20 @@ K2P_ERROR_TOTAL = Counter(
     "k2p_error_total",
     "Total number of knime2py job failures",
 )
+
+ABANDONED_JOBS_CANCELLED_TOTAL = Counter(
+    "k2p_abandoned_jobs_cancelled_total",
+    "Total number of queued jobs cancelled because no client was watching them",
+)
+
+ABANDONED_RUN_SECONDS_SAVED_TOTAL = Counter(
+    "k2p_abandoned_run_seconds_saved_total",
+    "Predicted worker run seconds not spent on cancelled abandoned jobs",
+)
+
+JOB_PHASE_SECONDS = Histogram(
+    "k2p_job_phase_seconds",
+    "Wall time of one phase of running a job (seconds), see tracing.py",
+    ["phase"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0005_uploadsession"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="input_sha256",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
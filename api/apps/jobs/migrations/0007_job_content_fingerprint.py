@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0006_job_input_sha256_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="content_fingerprint",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0007_job_content_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdmissionCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("inflight", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("reconciled_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0008_admissioncounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkerHeartbeat",
+            fields=[
+                (
+                    "worker_id",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("last_seen_at", models.DateTimeField(db_index=True)),
+                ("secs_per_cost", models.FloatField(blank=True, null=True)),
+                ("jobs_finished", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="admissioncounter",
+            name="inflight_cost",
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="admission_cost",
+            field=models.FloatField(default=1.0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0009_adaptive_admission"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="admissioncounter",
+            name="last_served_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="client_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0010_fair_share"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RuntimeEstimate",
+            fields=[
+                ("size_bucket", models.IntegerField(primary_key=True, serialize=False)),
+                ("sample_count", models.IntegerField()),
+                ("p50_run_secs", models.FloatField()),
+                ("p90_run_secs", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "created_at"], name="job_status_created_idx"
+            ),
+        ),
+    ]
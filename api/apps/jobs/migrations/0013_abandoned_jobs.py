@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0012_job_cancel"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="detached",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="last_seen_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0014_job_artifact"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="client_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("status", "QUEUED")),
+                fields=["created_at"],
+                name="job_queued_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("status__in", ["QUEUED", "RUNNING"])),
+                fields=["client_hash"],
+                name="job_inflight_client_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "finished_at"], name="job_status_finished_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["finished_at"], name="job_finished_idx"),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_tails(apps, schema_editor):
+    Job = apps.get_model("jobs", "Job")
+    JobDiagnostics = apps.get_model("jobs", "JobDiagnostics")
+    rows = (
+        Job.objects.exclude(stdout_tail="", stderr_tail="")
+        .values_list("id", "stdout_tail", "stderr_tail")
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for job_id, stdout_tail, stderr_tail in rows:
+        batch.append(
+            JobDiagnostics(
+                job_id=job_id, stdout_tail=stdout_tail, stderr_tail=stderr_tail
+            )
+        )
+        if len(batch) >= 2000:
+            JobDiagnostics.objects.bulk_create(batch)
+            batch = []
+    JobDiagnostics.objects.bulk_create(batch)
+
+
+def restore_tails(apps, schema_editor):
+    Job = apps.get_model("jobs", "Job")
+    JobDiagnostics = apps.get_model("jobs", "JobDiagnostics")
+    for diag in JobDiagnostics.objects.iterator(chunk_size=2000):
+        Job.objects.filter(id=diag.job_id).update(
+            stdout_tail=diag.stdout_tail, stderr_tail=diag.stderr_tail
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0015_queue_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobDiagnostics",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="diagnostics",
+                        serialize=False,
+                        to="jobs.job",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("stdout_tail", models.TextField(blank=True)),
+                ("stderr_tail", models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(copy_tails, restore_tails),
+        migrations.RemoveField(
+            model_name="job",
+            name="stderr_tail",
+        ),
+        migrations.RemoveField(
+            model_name="job",
+            name="stdout_tail",
+        ),
+    ]
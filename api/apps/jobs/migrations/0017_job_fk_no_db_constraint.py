@@ -0,0 +1,57 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0016_job_diagnostics"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="jobartifact",
+            name="job",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="artifacts",
+                to="jobs.job",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="jobdiagnostics",
+            name="job",
+            field=models.OneToOneField(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                primary_key=True,
+                related_name="diagnostics",
+                serialize=False,
+                to="jobs.job",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="jobsettingsmeta",
+            name="job",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="settings_meta",
+                to="jobs.job",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="uploadsession",
+            name="job",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="jobs.job",
+            ),
+        ),
+    ]
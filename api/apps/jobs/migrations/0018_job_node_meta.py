@@ -0,0 +1,117 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:26
+
+import itertools
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of the nodemeta.py v1 blob layout, so later format changes do not alter this migration.
+def _encode(rows, factory_ids):
+    doc = {
+        "v": 1,
+        "file": [r.file_name for r in rows],
+        "factory": [
+            factory_ids[r.factory] if r.factory is not None else None for r in rows
+        ],
+        "node_name": [r.node_name for r in rows],
+        "name": [r.name for r in rows],
+    }
+    return zlib.compress(json.dumps(doc, separators=(",", ":")).encode())
+
+
+def pack_settings_meta(apps, schema_editor):
+    JobSettingsMeta = apps.get_model("jobs", "JobSettingsMeta")
+    JobNodeMeta = apps.get_model("jobs", "JobNodeMeta")
+    NodeFactory = apps.get_model("jobs", "NodeFactory")
+
+    factories = {
+        name: NodeFactory.objects.create(name=name).id
+        for name in JobSettingsMeta.objects.exclude(factory=None)
+        .values_list("factory", flat=True)
+        .distinct()
+    }
+    rows = JobSettingsMeta.objects.order_by("job_id", "id").iterator(chunk_size=5000)
+    batch = []
+    for job_id, group in itertools.groupby(rows, key=lambda r: r.job_id):
+        group = list(group)
+        batch.append(
+            JobNodeMeta(
+                job_id=job_id, node_count=len(group), data=_encode(group, factories)
+            )
+        )
+        if len(batch) >= 500:
+            JobNodeMeta.objects.bulk_create(batch)
+            batch = []
+    JobNodeMeta.objects.bulk_create(batch)
+
+
+def unpack_node_meta(apps, schema_editor):
+    JobSettingsMeta = apps.get_model("jobs", "JobSettingsMeta")
+    JobNodeMeta = apps.get_model("jobs", "JobNodeMeta")
+    NodeFactory = apps.get_model("jobs", "NodeFactory")
+
+    names = dict(NodeFactory.objects.values_list("id", "name"))
+    for meta in JobNodeMeta.objects.iterator(chunk_size=500):
+        doc = json.loads(zlib.decompress(bytes(meta.data)))
+        JobSettingsMeta.objects.bulk_create(
+            JobSettingsMeta(
+                job_id=meta.job_id,
+                file_name=f,
+                factory=names.get(fid),
+                node_name=nn,
+                name=n,
+            )
+            for f, fid, nn, n in zip(
+                doc["file"], doc["factory"], doc["node_name"], doc["name"]
+            )
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0017_job_fk_no_db_constraint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobNodeMeta",
+            fields=[
+                (
+                    "job",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="node_meta",
+                        serialize=False,
+                        to="jobs.job",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("node_count", models.PositiveIntegerField(default=0)),
+                ("data", models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="NodeFactory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=512, unique=True)),
+            ],
+        ),
+        migrations.RunPython(pack_settings_meta, unpack_node_meta),
+        migrations.DeleteModel(
+            name="JobSettingsMeta",
+        ),
+    ]
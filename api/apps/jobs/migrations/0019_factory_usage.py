@@ -0,0 +1,84 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:29
+
+import collections
+import datetime
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_usage(apps, schema_editor):
+    # One pass over the existing node metadata; afterwards the rows are kept up incrementally.
+    Job = apps.get_model("jobs", "Job")
+    JobNodeMeta = apps.get_model("jobs", "JobNodeMeta")
+    FactoryUsage = apps.get_model("jobs", "FactoryUsage")
+
+    totals = collections.defaultdict(lambda: [0, 0, 0])
+    for meta in JobNodeMeta.objects.iterator(chunk_size=500):
+        job = Job.objects.filter(id=meta.job_id).values("created_at", "status").first()
+        if job is None:
+            continue
+        day = job["created_at"].astimezone(datetime.timezone.utc).date()
+        doc = json.loads(zlib.decompress(bytes(meta.data)))
+        counts = collections.Counter(f for f in doc["factory"] if f is not None)
+        for factory_id, nodes in counts.items():
+            row = totals[(factory_id, day)]
+            row[0] += 1
+            row[1] += nodes
+            row[2] += job["status"] == "FAILED"
+    FactoryUsage.objects.bulk_create(
+        (
+            FactoryUsage(
+                factory_id=f, day=d, job_count=j, node_count=n, failure_count=x
+            )
+            for (f, d), (j, n, x) in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0018_job_node_meta"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FactoryUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("job_count", models.PositiveIntegerField(default=0)),
+                ("node_count", models.PositiveIntegerField(default=0)),
+                ("failure_count", models.PositiveIntegerField(default=0)),
+                (
+                    "factory",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage",
+                        to="jobs.nodefactory",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "factory usage",
+                "indexes": [models.Index(fields=["day"], name="factory_usage_day_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("factory", "day"), name="factory_usage_day_uniq"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0019_factory_usage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricsSnapshot",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("data", models.JSONField(default=dict)),
+                ("refreshed_at", models.DateTimeField(blank=True, null=True)),
+                ("claimed_at", models.DateTimeField(blank=True, null=True)),
+                ("refresh_secs", models.FloatField(default=0.0)),
+            ],
+        ),
+    ]
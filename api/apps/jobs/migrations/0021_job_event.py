@@ -0,0 +1,64 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0020_metrics_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("validated", "Validated"),
+                            ("queued", "Queued"),
+                            ("rejected", "Rejected"),
+                            ("claimed", "Claimed"),
+                            ("extracted", "Extracted"),
+                            ("container_started", "Container Started"),
+                            ("finished", "Finished"),
+                            ("downloaded", "Downloaded"),
+                            ("cleaned_up", "Cleaned Up"),
+                        ],
+                        max_length=32,
+                    ),
+                ),
+                ("at", models.DateTimeField()),
+                ("source", models.CharField(max_length=255)),
+                ("monotonic_ns", models.BigIntegerField()),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="events",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["job", "at"], name="job_event_job_at_idx"),
+                    models.Index(fields=["at"], name="job_event_at_idx"),
+                ],
+            },
+        ),
+    ]
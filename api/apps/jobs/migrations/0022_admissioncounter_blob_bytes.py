@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0021_job_event"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="admissioncounter",
+            name="blob_bytes",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="admissioncounter",
+            name="blob_window_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
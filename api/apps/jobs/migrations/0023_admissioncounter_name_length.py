@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0022_admissioncounter_blob_bytes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="admissioncounter",
+            name="name",
+            field=models.CharField(max_length=80, primary_key=True, serialize=False),
+        ),
+    ]
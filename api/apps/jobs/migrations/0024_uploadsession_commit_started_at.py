@@ -0,0 +1,17 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0023_admissioncounter_name_length"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="commit_started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0024_uploadsession_commit_started_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="admissioncounter",
+            name="upload_bytes",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="client_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
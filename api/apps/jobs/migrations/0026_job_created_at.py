@@ -0,0 +1,27 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0025_upload_bytes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobartifact",
+            name="job_created_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobdiagnostics",
+            name="job_created_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobnodemeta",
+            name="job_created_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
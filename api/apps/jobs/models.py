@@ -2,26 +2,50 @@ from __future__ import annotations
 
 import uuid
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 
 class Job(models.Model):
+    """
+    One conversion job.
+
+    References to Job use db_constraint=False: a partitioned jobs table (partitions.py) has
+    no unique key on id alone for a database foreign key to point at. Deletes still
+    cascade through the ORM.
+    """
+
     class Status(models.TextChoices):
         QUEUED = "QUEUED", "Queued"
         RUNNING = "RUNNING", "Running"
         SUCCEEDED = "SUCCEEDED", "Succeeded"
         FAILED = "FAILED", "Failed"
+        CANCELLED = "CANCELLED", "Cancelled"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+    # Set by the cancel endpoint on a RUNNING job; the owning worker polls it and kills the container.
+    cancel_requested_at = models.DateTimeField(null=True, blank=True)
 
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
 
     original_filename = models.CharField(max_length=255, blank=True)
     input_size = models.BigIntegerField(default=0)
-    input_sha256 = models.CharField(max_length=64, blank=True)
+    input_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    # Predicted work in cost units (see admission.admission_cost), reserved at admission.
+    admission_cost = models.FloatField(default=1.0)
+    # HMAC of the submitting client's API key or IP (admission.client_hash); fair-share key.
+    # Only ever looked up among in-flight jobs: indexed by job_inflight_client_idx.
+    client_hash = models.CharField(max_length=64, blank=True)
+    # sha256 over sorted (path, content sha256) pairs; stable across re-zipping the same files.
+    content_fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
+    # Last status/log poll by the submitting client (abandoned.mark_seen); see ABANDONED_JOB_POLICY.
+    last_seen_at = models.DateTimeField(default=timezone.now)
+    # Submitted for unattended collection: never treated as abandoned.
+    detached = models.BooleanField(default=False)
 
     k8s_namespace = models.CharField(max_length=64, default="k2p")
     k8s_job_name = models.CharField(max_length=128, blank=True)
@@ -29,9 +53,6 @@ class Job(models.Model):
     result_key = models.CharField(max_length=512, blank=True)  # e.g. results/<uuid>/
     exit_code = models.IntegerField(null=True, blank=True)
 
-    stdout_tail = models.TextField(blank=True)
-    stderr_tail = models.TextField(blank=True)
-
     # For now: local filesystem key under MEDIA_ROOT (later: S3 key)
     input_key = models.CharField(max_length=512, blank=True)
 
@@ -39,17 +60,271 @@ class Job(models.Model):
     error_code = models.CharField(max_length=64, blank=True)
     error_message = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Queue rank (estimates.queue_eta) and FIFO claim order.
+            models.Index(fields=["status", "created_at"], name="job_status_created_idx"),
+            # Partial indexes over the few in-flight rows, so the claim, queue scans and
+            # per-client reconcile stay constant-time however much history is retained.
+            models.Index(fields=["created_at"], condition=Q(status="QUEUED"), name="job_queued_created_idx"),
+            models.Index(
+                fields=["client_hash"],
+                condition=Q(status__in=["QUEUED", "RUNNING"]),
+                name="job_inflight_client_idx",
+            ),
+            # Retention sweeps (status=..., finished_at < cutoff) and the run-time fit.
+            models.Index(fields=["status", "finished_at"], name="job_status_finished_idx"),
+            # Latest finish time for the jobs DB metrics collector.
+            models.Index(fields=["finished_at"], name="job_finished_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.id} [{self.status}]"
 
 
-class JobSettingsMeta(models.Model):
-    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="settings_meta")
+class JobOwned(models.Model):
+    """
+    Base for rows that belong to one job: job_created_at is a copy of the job's created_at.
+
+    With partitioning (partitions.py) these tables are range-partitioned on it like the jobs
+    table, so the rows of a period's jobs are dropped with that period's partition.
+    """
+
+    job_created_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs) -> None:
+        if self.job_created_at is None:
+            self.job_created_at = self.job.created_at
+        super().save(*args, **kwargs)
+
+
+class JobDiagnostics(JobOwned):
+    """
+    Container stdout/stderr tails of a job, kept off the Job row.
+
+    Status polls, the claim and admin lists read Job on every request; the tails are only
+    needed by the logs endpoints and the admin detail page.
+    """
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="diagnostics", db_constraint=False
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    stdout_tail = models.TextField(blank=True)
+    stderr_tail = models.TextField(blank=True)
+
+    def __str__(self) -> str:
+        return f"diagnostics ({self.job_id})"
+
+
+class NodeFactory(models.Model):
+    """Interned KNIME node factory class name, referenced by id from JobNodeMeta blobs."""
+
+    name = models.CharField(max_length=512, unique=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class JobNodeMeta(JobOwned):
+    """
+    Node metadata of a job's bundle: one row per job instead of one per settings.xml.
+
+    data is a zlib-compressed columnar JSON document of (file, factory id, node name, name);
+    read and write it through nodemeta.py.
+    """
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="node_meta", db_constraint=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
-    file_name = models.CharField(max_length=512)
-    factory = models.CharField(max_length=512, null=True, blank=True)
-    node_name = models.CharField(max_length=255, null=True, blank=True)
-    name = models.CharField(max_length=255, null=True, blank=True)
+    node_count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()
+
+    def __str__(self) -> str:
+        return f"{self.node_count} nodes ({self.job_id})"
+
+
+class FactoryUsage(models.Model):
+    """
+    Per-day usage of one node factory, kept up to date as jobs are ingested and finish.
+
+    day is the UTC creation day of the counted jobs; failure_count counts those of them that
+    ended FAILED. Maintained by nodemeta.py, so analytics never scan JobNodeMeta.
+    """
+
+    factory = models.ForeignKey(NodeFactory, on_delete=models.CASCADE, related_name="usage")
+    day = models.DateField()
+    # Jobs with at least one node of this factory, and this factory's nodes across them.
+    job_count = models.PositiveIntegerField(default=0)
+    node_count = models.PositiveIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["factory", "day"], name="factory_usage_day_uniq")]
+        indexes = [models.Index(fields=["day"], name="factory_usage_day_idx")]
+        verbose_name_plural = "factory usage"
+
+    def __str__(self) -> str:
+        return f"{self.factory_id} {self.day}: {self.job_count} jobs"
+
+
+class JobEvent(models.Model):
+    """
+    Append-only timeline of one job, written in small batches by events.py.
+
+    Events outlive their job (retention deletes the Job row but not its events; they have
+    their own JOB_EVENT_RETENTION_DAYS), so a post-mortem can still read the history.
+    """
+
+    class Kind(models.TextChoices):
+        CREATED = "created"
+        VALIDATED = "validated"
+        QUEUED = "queued"
+        REJECTED = "rejected"
+        CLAIMED = "claimed"
+        EXTRACTED = "extracted"
+        CONTAINER_STARTED = "container_started"
+        FINISHED = "finished"
+        DOWNLOADED = "downloaded"
+        CLEANED_UP = "cleaned_up"
+
+    job = models.ForeignKey(Job, on_delete=models.DO_NOTHING, related_name="events", db_constraint=False)
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    at = models.DateTimeField()
+    # Emitting process ("host:pid") and its monotonic clock: exact intervals between events of
+    # one process, unaffected by wall clock adjustments.
+    source = models.CharField(max_length=255)
+    monotonic_ns = models.BigIntegerField()
+    payload = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["job", "at"], name="job_event_job_at_idx"),
+            models.Index(fields=["at"], name="job_event_at_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} ({self.job_id})"
+
+
+class JobArtifact(JobOwned):
+    """One result file of a SUCCEEDED job, recorded by the worker (artifacts.record_artifacts)."""
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="artifacts", db_constraint=False)
+    # POSIX path relative to the job's result directory.
+    path = models.CharField(max_length=1024)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    content_type = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["job", "path"], name="job_artifact_path_uniq")]
+
+    def __str__(self) -> str:
+        return f"{self.path} ({self.job_id})"
+
+
+class UploadSession(models.Model):
+    """A resumable upload: chunks are appended at increasing offsets, then committed into a Job."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    original_filename = models.CharField(max_length=255, blank=True)
+    total_size = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    # Optional whole-bundle digest declared by the client; checked on commit.
+    expected_sha256 = models.CharField(max_length=64, blank=True)
+    # admission.client_hash of the opener, charged total_size until commit or expiry.
+    client_hash = models.CharField(max_length=64, blank=True)
+
+    # Claimed by one commit (a conditional update) while it ingests; a concurrent commit gets 409.
+    commit_started_at = models.DateTimeField(null=True, blank=True)
+    # Set on commit so a retried commit returns the same job instead of creating another.
+    job = models.ForeignKey(
+        Job, null=True, blank=True, on_delete=models.SET_NULL, related_name="+", db_constraint=False
+    )
+
+    def __str__(self) -> str:
+        return f"{self.id} ({self.received_bytes}/{self.total_size})"
+
+
+class AdmissionCounter(models.Model):
+    """
+    Maintained in-flight job count; admission is a conditional single-row update, not a COUNT.
+
+    One global row ("jobs") plus one row per submitting client ("client:<hash>").
+    """
+
+    # "client:" + 64-char client hash.
+    name = models.CharField(max_length=80, primary_key=True)
+    inflight = models.IntegerField(default=0)
+    # Sum of admission_cost over in-flight jobs; the adaptive policy's measure of queued work.
+    inflight_cost = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    # Per-client rows ("client:<hash>"): when the worker last started one of its jobs (fair-share order).
+    last_served_at = models.DateTimeField(null=True, blank=True)
+    # Per-client rows: delta-upload blob bytes stored since blob_window_at and not yet used by a
+    # bundle; capped at BLOB_MAX_BYTES_PER_CLIENT.
+    blob_bytes = models.BigIntegerField(default=0)
+    blob_window_at = models.DateTimeField(null=True, blank=True)
+    # Per-client rows: declared size of the client's open upload sessions; capped at
+    # UPLOAD_MAX_STAGED_BYTES_PER_CLIENT.
+    upload_bytes = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.inflight}"
+
+
+class WorkerHeartbeat(models.Model):
+    """Liveness and recent throughput of one worker process; feeds the adaptive admission policy."""
+
+    worker_id = models.CharField(max_length=255, primary_key=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(db_index=True)
+    # EWMA of run seconds per admission cost unit; null until the worker finishes a job.
+    secs_per_cost = models.FloatField(null=True, blank=True)
+    jobs_finished = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return self.worker_id
+
+
+class RuntimeEstimate(models.Model):
+    """Run time percentiles per input-size bucket, fitted by the worker from finished jobs (estimates.py)."""
+
+    # estimates.size_bucket(input_size); -1 holds the fit over all sizes.
+    size_bucket = models.IntegerField(primary_key=True)
+    sample_count = models.IntegerField()
+    p50_run_secs = models.FloatField()
+    p90_run_secs = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"bucket {self.size_bucket}: p50={self.p50_run_secs:.1f}s (n={self.sample_count})"
+
+
+class MetricsSnapshot(models.Model):
+    """
+    Last computed value of an expensive metrics query, shared by every API process.
+
+    Scrapes read this row; one process per METRICS_DB_CACHE_SECS recomputes it (metrics_api.py).
+    """
+
+    name = models.CharField(max_length=32, primary_key=True)
+    data = models.JSONField(default=dict)
+    # When the stored data was computed, and when a process last took the refresh for itself.
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    refresh_secs = models.FloatField(default=0.0)
 
     def __str__(self) -> str:
-        return f"{self.file_name} ({self.job_id})"
+        return f"{self.name} @ {self.refreshed_at}"
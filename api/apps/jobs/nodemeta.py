@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import datetime
+import json
+import zlib
+import xml.etree.ElementTree as ET
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.db.models import Case, F, Sum, Value, When
+
+from .models import FactoryUsage, Job, JobNodeMeta, NodeFactory
+
+# Bumped if the blob layout changes; load_node_meta reads every version it knows.
+FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class NodeMeta:
+    """One settings.xml of a bundle: its path and the node it configures."""
+
+    file_name: str
+    factory: str | None
+    node_name: str | None
+    name: str | None
+
+
+def parse_settings_xml(file_name: str, data: bytes) -> NodeMeta:
+    """Read the factory, node-name and name entries of a node's settings.xml (None when absent or unparsable)."""
+    factory = node_name = display_name = None
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError:
+        return NodeMeta(file_name, None, None, None)
+    for entry in root.iter():
+        if not entry.tag.endswith("entry"):
+            continue
+        key = entry.attrib.get("key")
+        if key == "factory":
+            factory = entry.attrib.get("value")
+        elif key == "node-name":
+            node_name = entry.attrib.get("value")
+        elif key == "name":
+            display_name = entry.attrib.get("value")
+    return NodeMeta(file_name, factory, node_name, display_name)
+
+
+def intern_factories(names: Iterable[str]) -> dict[str, int]:
+    """NodeFactory id per factory name, inserting the ones not seen before."""
+    wanted = set(names)
+    if not wanted:
+        return {}
+    ids = dict(NodeFactory.objects.filter(name__in=wanted).values_list("name", "id"))
+    missing = wanted - ids.keys()
+    if missing:
+        # A concurrent ingest may insert the same names; re-read instead of trusting our rows.
+        NodeFactory.objects.bulk_create([NodeFactory(name=n) for n in sorted(missing)], ignore_conflicts=True)
+        ids.update(NodeFactory.objects.filter(name__in=missing).values_list("name", "id"))
+    return ids
+
+
+def encode_nodes(nodes: list[NodeMeta], factory_ids: dict[str, int]) -> bytes:
+    # Columnar: repeated node names/factories sit next to each other and compress well.
+    doc = {
+        "v": FORMAT_VERSION,
+        "file": [n.file_name for n in nodes],
+        "factory": [factory_ids[n.factory] if n.factory is not None else None for n in nodes],
+        "node_name": [n.node_name for n in nodes],
+        "name": [n.name for n in nodes],
+    }
+    return zlib.compress(json.dumps(doc, separators=(",", ":")).encode())
+
+
+def decode_nodes(data: bytes, factory_names: dict[int, str]) -> list[NodeMeta]:
+    doc = json.loads(zlib.decompress(bytes(data)))
+    return [
+        NodeMeta(file_name, factory_names.get(factory_id) if factory_id is not None else None, node_name, name)
+        for file_name, factory_id, node_name, name in zip(doc["file"], doc["factory"], doc["node_name"], doc["name"])
+    ]
+
+
+def factory_ids_in(data: bytes) -> list[int]:
+    """Factory ids referenced by one blob, without resolving names (analytics over many jobs)."""
+    return [f for f in json.loads(zlib.decompress(bytes(data)))["factory"] if f is not None]
+
+
+def store_node_meta(job: Job, nodes: list[NodeMeta]) -> JobNodeMeta | None:
+    """Write job's node metadata as one row; nothing is stored for a bundle without settings.xml."""
+    if not nodes:
+        return None
+    factory_ids = intern_factories(n.factory for n in nodes if n.factory is not None)
+    meta = JobNodeMeta.objects.create(job=job, node_count=len(nodes), data=encode_nodes(nodes, factory_ids))
+    record_usage(job.created_at, Counter(factory_ids[n.factory] for n in nodes if n.factory is not None))
+    return meta
+
+
+def copy_node_meta(source: Job, job: Job) -> None:
+    """Give job the same node metadata as source (the blob is copied as is)."""
+    meta = JobNodeMeta.objects.filter(job=source).first()
+    if meta is not None:
+        JobNodeMeta.objects.create(job=job, node_count=meta.node_count, data=meta.data)
+        record_usage(job.created_at, Counter(factory_ids_in(meta.data)))
+
+
+def load_node_meta(job: Job) -> list[NodeMeta]:
+    """job's nodes in bundle order; [] when none were recorded."""
+    meta = JobNodeMeta.objects.filter(job=job).first()
+    if meta is None:
+        return []
+    ids = set(factory_ids_in(meta.data))
+    names = dict(NodeFactory.objects.filter(id__in=ids).values_list("id", "name")) if ids else {}
+    return decode_nodes(meta.data, names)
+
+
+def usage_day(created_at: datetime.datetime) -> datetime.date:
+    return created_at.astimezone(datetime.timezone.utc).date()
+
+
+def record_usage(created_at: datetime.datetime, node_counts: Counter[int]) -> None:
+    """Count one job, with node_counts nodes per factory id, in its day's FactoryUsage rows."""
+    if not node_counts:
+        return
+    day = usage_day(created_at)
+    FactoryUsage.objects.bulk_create(
+        [FactoryUsage(factory_id=f, day=day) for f in sorted(node_counts)], ignore_conflicts=True
+    )
+    # Two statements per job however many factories it uses; increments stay correct under
+    # concurrent ingests because they are applied by the database.
+    FactoryUsage.objects.filter(day=day, factory_id__in=node_counts).update(
+        job_count=F("job_count") + 1,
+        node_count=F("node_count")
+        + Case(*(When(factory_id=f, then=Value(n)) for f, n in node_counts.items()), default=Value(0)),
+    )
+
+
+def record_failure(job_id, created_at: datetime.datetime) -> None:
+    """Count a FAILED job against the factories it was counted for at ingest."""
+    data = JobNodeMeta.objects.filter(job_id=job_id).values_list("data", flat=True).first()
+    if data is None:
+        return
+    FactoryUsage.objects.filter(day=usage_day(created_at), factory_id__in=set(factory_ids_in(data))).update(
+        failure_count=F("failure_count") + 1
+    )
+
+
+def usage_summary(since: datetime.date, until: datetime.date, *, limit: int = 100) -> list[dict]:
+    """Per-factory totals over days since..until (inclusive), most used first."""
+    rows = (
+        FactoryUsage.objects.filter(day__gte=since, day__lte=until)
+        .values("factory__name")
+        .annotate(jobs=Sum("job_count"), nodes=Sum("node_count"), failures=Sum("failure_count"))
+        .order_by("-jobs", "factory__name")[:limit]
+    )
+    return [
+        {"factory": r["factory__name"], "jobs": r["jobs"], "nodes": r["nodes"], "failures": r["failures"]}
+        for r in rows
+    ]
@@ -0,0 +1,286 @@
+"""
+Optional Postgres range partitioning of job history by creation day or week.
+
+With JOB_PARTITION_PERIOD set and the tables converted (manage.py k2p_partitions convert),
+retention drops whole expired partitions instead of deleting jobs row by row: one
+DETACH + DROP per table and period, whatever the period's job count. The tables of
+job-owned rows (artifacts, diagnostics, node metadata) are partitioned on a copy of their
+job's created_at, so they go with the same period.
+"""
+
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.db import connection, models, transaction
+
+from .admission import IN_FLIGHT_STATUSES
+from .models import Job, JobArtifact, JobDiagnostics, JobNodeMeta
+
+logger = logging.getLogger("k2p.jobs")
+
+PERIODS = ("day", "week")
+# Partitioned model -> range key; Job first, the job-owned tables are backfilled from it.
+# A job's rows land in same-period partitions of every table. JobEvent is not among them:
+# events outlive their job.
+PARTITIONED = {
+    Job: "created_at",
+    JobArtifact: "job_created_at",
+    JobDiagnostics: "job_created_at",
+    JobNodeMeta: "job_created_at",
+}
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: datetime.datetime
+    end: datetime.datetime
+
+
+def partition_period() -> str:
+    """"" (off, default) | day | week."""
+    return str(getattr(settings, "JOB_PARTITION_PERIOD", "") or "")
+
+
+def partitioning_enabled() -> bool:
+    return partition_period() in PERIODS and connection.vendor == "postgresql"
+
+
+def period_start(moment: datetime.datetime, period: str) -> datetime.datetime:
+    """UTC midnight of moment's day, or of the Monday of its week."""
+    day = moment.astimezone(datetime.timezone.utc).date()
+    if period == "week":
+        day -= datetime.timedelta(days=day.weekday())
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def period_end(start: datetime.datetime, period: str) -> datetime.datetime:
+    return start + datetime.timedelta(days=7 if period == "week" else 1)
+
+
+def partition_name(table: str, start: datetime.datetime) -> str:
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def parse_bound(expr: str) -> tuple[datetime.datetime, datetime.datetime] | None:
+    """(start, end) of a "FOR VALUES FROM (...) TO (...)" partition bound; None for DEFAULT."""
+    match = _BOUND_RE.search(expr)
+    if not match:
+        return None
+    return tuple(datetime.datetime.fromisoformat(v) for v in match.groups())
+
+
+def _qn(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def is_partitioned(table: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [table])
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table: str) -> list[Partition]:
+    """Range partitions of table, oldest first (the DEFAULT partition is left out)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+            [table],
+        )
+        rows = cursor.fetchall()
+    parts = []
+    for name, expr in rows:
+        bounds = parse_bound(expr or "")
+        if bounds:
+            parts.append(Partition(name, *bounds))
+    return sorted(parts, key=lambda p: p.start)
+
+
+def default_partition(table: str) -> str | None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT'",
+            [table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _create_partition(table: str, key: str, start: datetime.datetime, end: datetime.datetime) -> str:
+    name = partition_name(table, start)
+    bound = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    default = default_partition(table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if default is None:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {_qn(name)} PARTITION OF {_qn(table)} {bound}")
+            return name
+        # Postgres rejects a new partition while DEFAULT holds rows of its range, so the
+        # partition is built standalone, takes those rows over, and is attached after.
+        cursor.execute(f"LOCK TABLE {_qn(default)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"CREATE TABLE {_qn(name)} (LIKE {_qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {_qn(default)} WHERE {_qn(key)} >= %s AND {_qn(key)} < %s RETURNING *) "
+            f"INSERT INTO {_qn(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"ALTER TABLE {_qn(table)} ATTACH PARTITION {_qn(name)} {bound}")
+    if moved:
+        logger.info(json.dumps({"event": "partition_rows_moved", "partition": name, "from": default, "rows": moved}))
+    return name
+
+
+def ensure_partitions(now: datetime.datetime, *, ahead: int | None = None) -> list[str]:
+    """Create the partitions for the current and the next `ahead` periods; returns new ones."""
+    period = partition_period()
+    ahead = int(getattr(settings, "JOB_PARTITION_PREMAKE", 7)) if ahead is None else ahead
+    created = []
+    for model in PARTITIONED:
+        table = model._meta.db_table
+        if not is_partitioned(table):
+            continue
+        existing = list_partitions(table)
+        start = period_start(now, period)
+        for _ in range(ahead + 1):
+            end = period_end(start, period)
+            # Skip ranges already covered, e.g. by partitions made under another period.
+            if not any(p.start < end and start < p.end for p in existing):
+                created.append(_create_partition(table, PARTITIONED[model], start, end))
+            start = end
+    return created
+
+
+def convert_table(model: type[models.Model], period: str, now: datetime.datetime) -> int:
+    """
+    Replace model's table by a range-partitioned copy (PK (id, key)); returns rows moved.
+
+    Holds an ACCESS EXCLUSIVE lock on the table until the surrounding transaction commits.
+    """
+    table = model._meta.db_table
+    key = PARTITIONED[model]
+    old = f"{table}_unpartitioned"
+    with connection.cursor() as cursor:
+        # Recreated on the partitioned table once the old one (and its index names) is gone.
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p')",
+            [table, table],
+        )
+        index_defs = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"LOCK TABLE {_qn(table)} IN ACCESS EXCLUSIVE MODE")
+        if model is not Job:
+            # Rows written before job_created_at existed; those of already deleted jobs are dropped.
+            cursor.execute(
+                f"UPDATE {_qn(table)} t SET {_qn(key)} = j.created_at FROM {_qn(Job._meta.db_table)} j "
+                f"WHERE j.id = t.job_id AND t.{_qn(key)} IS NULL"
+            )
+            cursor.execute(f"DELETE FROM {_qn(table)} WHERE {_qn(key)} IS NULL")
+        # From the oldest job for every table, so all of them have the same periods.
+        cursor.execute(f"SELECT min(created_at) FROM {_qn(Job._meta.db_table)}")
+        oldest = cursor.fetchone()[0] or now
+        cursor.execute(f"ALTER TABLE {_qn(table)} RENAME TO {_qn(old)}")
+        cursor.execute(
+            f"CREATE TABLE {_qn(table)} (LIKE {_qn(old)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({_qn(key)})"
+        )
+        start = period_start(oldest, period)
+        last = period_start(now, period)
+        for _ in range(int(getattr(settings, "JOB_PARTITION_PREMAKE", 7)) + 1):
+            last = period_end(last, period)
+        while start < last:
+            end = period_end(start, period)
+            _create_partition(table, key, start, end)
+            start = end
+        # Catches rows outside the pre-made range if the worker has not created them in time;
+        # _create_partition moves them out once their partition is made.
+        cursor.execute(f"CREATE TABLE {_qn(table + '_default')} PARTITION OF {_qn(table)} DEFAULT")
+        cursor.execute(f"INSERT INTO {_qn(table)} SELECT * FROM {_qn(old)}")
+        moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {_qn(old)}")
+        # Unique constraints on a partitioned table must include the partition key.
+        cursor.execute(f"ALTER TABLE {_qn(table)} ADD PRIMARY KEY ({_qn(model._meta.pk.column)}, {_qn(key)})")
+        for index_def in index_defs:
+            if index_def.startswith("CREATE UNIQUE INDEX"):
+                # Same rule for unique indexes; the key follows from job_id, so nothing loosens.
+                index_def = f"{index_def[:-1]}, {_qn(key)})"
+            cursor.execute(index_def)
+        if isinstance(model._meta.pk, models.AutoField):
+            # The identity sequence went with the old table; ids continue from a plain sequence.
+            seq = f"{table}_id_seq"
+            pk = _qn(model._meta.pk.column)
+            cursor.execute(f"CREATE SEQUENCE {_qn(seq)} OWNED BY {_qn(table)}.{pk}")
+            cursor.execute(f"SELECT setval(%s, COALESCE((SELECT max({pk}) FROM {_qn(table)}), 0) + 1, false)", [seq])
+            cursor.execute(f"ALTER TABLE {_qn(table)} ALTER COLUMN {pk} SET DEFAULT nextval('{seq}')")
+    return moved
+
+
+def convert(period: str, now: datetime.datetime) -> dict[str, int]:
+    """Partition every PARTITIONED table that is not yet partitioned, in one transaction."""
+    moved = {}
+    with transaction.atomic():
+        for model in PARTITIONED:
+            table = model._meta.db_table
+            if not is_partitioned(table):
+                moved[table] = convert_table(model, period, now)
+    return moved
+
+
+def _drop(partitions: list[tuple[str, Partition]]) -> None:
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table, partition in partitions:
+            cursor.execute(f"ALTER TABLE {_qn(table)} DETACH PARTITION {_qn(partition.name)}")
+            cursor.execute(f"DROP TABLE {_qn(partition.name)}")
+
+
+def drop_expired_partitions(
+    cutoff: datetime.datetime, *, sweep: Callable[[uuid.UUID], None], dry_run: bool = False
+) -> list[str]:
+    """
+    Drop every table's partitions of the periods that end before cutoff; returns their names.
+
+    A period still holding QUEUED/RUNNING jobs is kept. Otherwise its jobs' files are swept
+    (sweep(job_id), from one read of the period's ids) and then the period goes as one
+    DETACH + DROP per table: no rows are deleted or written, so no cleaned_up events either.
+    Nothing is dropped until all PARTITIONED tables are partitioned.
+    """
+    tables = [model._meta.db_table for model in PARTITIONED]
+    unpartitioned = [table for table in tables if not is_partitioned(table)]
+    if unpartitioned:
+        logger.warning(
+            json.dumps({"event": "partition_drop_skipped", "reason": "unpartitioned", "tables": unpartitioned})
+        )
+        return []
+    job_table = Job._meta.db_table
+    owned = {table: list_partitions(table) for table in tables if table != job_table}
+    dropped = []
+    for part in list_partitions(job_table):
+        if part.end > cutoff:
+            break
+        jobs = Job.objects.filter(created_at__gte=part.start, created_at__lt=part.end)
+        if jobs.filter(status__in=IN_FLIGHT_STATUSES).exists():
+            logger.warning(json.dumps({"event": "partition_drop_skipped", "partition": part.name, "reason": "in_flight"}))
+            continue
+        period = [(job_table, part)] + [
+            (table, p) for table, parts in owned.items() for p in parts if part.start <= p.start and p.end <= part.end
+        ]
+        dropped.extend(p.name for _, p in period)
+        if dry_run:
+            continue
+        for job_id in jobs.values_list("id", flat=True).iterator():
+            sweep(job_id)
+        _drop(period)
+    if dropped and not dry_run:
+        logger.info(json.dumps({"event": "partitions_dropped", "partitions": dropped}))
+    return dropped
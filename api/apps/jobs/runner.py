@@ -4,8 +4,12 @@ import json
 import logging
 import shlex
 import subprocess
+import threading
+import time
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Callable
+
+from .tracing import PhaseTrace
 
 
 class RunnerError(Exception):
@@ -23,15 +27,46 @@ class RunnerError(Exception):
         self.stderr_tail = stderr_tail
 
 
-def _tail_file(path: Path, *, max_lines: int = 40, max_bytes: int = 4000) -> str:
-    if not path.exists():
-        return ""
-    data = path.read_bytes()
-    if len(data) > max_bytes:
-        data = data[-max_bytes:]
-    text = data.decode(errors="replace")
-    lines = text.splitlines()[-max_lines:]
-    return "\n".join(lines).strip()
+class RunnerCancelled(RunnerError):
+    """The job was cancelled while its container was running; the container has been killed."""
+
+
+class LogRing:
+    """
+    The last max_bytes of a stream, kept in memory while the stream is also spilled to disk.
+
+    Memory per job stays bounded however much the container prints; tail() is what ends up in
+    JobDiagnostics.stdout_tail/stderr_tail.
+    """
+
+    def __init__(self, max_bytes: int = 4000) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            self.total_bytes += len(data)
+            self._buf += data[-self.max_bytes :]
+            if len(self._buf) > self.max_bytes:
+                del self._buf[: len(self._buf) - self.max_bytes]
+
+    def tail(self, *, max_lines: int = 40) -> str:
+        with self._lock:
+            data = bytes(self._buf)
+        text = data.decode(errors="replace")
+        lines = text.splitlines()[-max_lines:]
+        return "\n".join(lines).strip()
+
+
+def _pump(src: IO[bytes], dest: IO[bytes], ring: LogRing) -> None:
+    # One thread per pipe: copy container output to the log file and the ring as it arrives.
+    with src:
+        for chunk in iter(lambda: src.read1(64 * 1024), b""):
+            dest.write(chunk)
+            dest.flush()
+            ring.write(chunk)
 
 
 def build_k2p_args(input_path: str = "/work/input", out_dir: str = "/work/out") -> list[str]:
@@ -57,6 +92,9 @@ class DockerRunner:
         host_job_storage_root: str,
         host_result_storage_root: str,
         logger: logging.Logger,
+        cancel_poll_s: float = 0.5,
+        log_tail_bytes: int = 4000,
+        log_publish_s: float = 2.0,
     ) -> None:
         self.image = image
         self.docker_bin = docker_bin
@@ -67,6 +105,9 @@ class DockerRunner:
         self.command = command or ""
         self.args_template = args_template or ""
         self.logger = logger
+        self.cancel_poll_s = cancel_poll_s
+        self.log_tail_bytes = log_tail_bytes
+        self.log_publish_s = log_publish_s
         self.container_repo_root = container_repo_root
         self.container_job_storage_root = container_job_storage_root
         self.container_result_storage_root = container_result_storage_root
@@ -127,13 +168,76 @@ class DockerRunner:
             return shlex.split(rendered)
         return build_k2p_args()
 
-    def run_job(self, job_id: str, workflow_path: Path, out_dir: Path) -> dict[str, Any]:
+    def _wait(
+        self,
+        proc: subprocess.Popen,
+        name: str,
+        should_cancel: Callable[[], bool] | None,
+        on_progress: Callable[[], None] | None = None,
+    ) -> int:
+        """
+        Wait for the container up to timeout_s, checking should_cancel every cancel_poll_s
+        and calling on_progress every log_publish_s.
+
+        Raises subprocess.TimeoutExpired on timeout, RunnerCancelled (after docker kill) on cancel.
+        """
+        deadline = time.monotonic() + self.timeout_s
+        next_progress = time.monotonic() + self.log_publish_s
+        polls = [s for s, enabled in ((self.cancel_poll_s, should_cancel), (self.log_publish_s, on_progress)) if enabled]
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                proc.kill()
+                proc.wait()
+                raise subprocess.TimeoutExpired(proc.args, self.timeout_s)
+            try:
+                return proc.wait(timeout=min([remaining, *polls]))
+            except subprocess.TimeoutExpired:
+                pass
+            if on_progress is not None and time.monotonic() >= next_progress:
+                on_progress()
+                next_progress = time.monotonic() + self.log_publish_s
+            if should_cancel is not None and should_cancel():
+                subprocess.run([self.docker_bin, "kill", name], check=False, capture_output=True, text=True)
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+                raise RunnerCancelled("cancelled", exit_code=proc.returncode)
+
+    def run_job(
+        self,
+        job_id: str,
+        workflow_path: Path,
+        out_dir: Path,
+        *,
+        log_dir: Path | None = None,
+        should_cancel: Callable[[], bool] | None = None,
+        on_log: Callable[[str, str], None] | None = None,
+        trace: PhaseTrace | None = None,
+        on_start: Callable[[], None] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Run knime2py on workflow_path, writing results to out_dir.
+
+        Container stdout/stderr go to log_dir (default out_dir), so callers can keep
+        logs out of the result tree. They are read through pipes into bounded ring buffers;
+        on_log(stdout_tail, stderr_tail) is called every log_publish_s while the tails change.
+
+        The container is created and then started attached, so its creation is timed apart
+        from the run: phases image_check, container_create, k2p_run and artifact_scan of trace.
+        on_start() is called as the created container is started.
+        """
+        trace = trace if trace is not None else PhaseTrace()
         name = f"k2pweb-job-{job_id}"
         out_dir.mkdir(parents=True, exist_ok=True)
         out_dir.chmod(0o777)
+        log_dir = log_dir or out_dir
+        log_dir.mkdir(parents=True, exist_ok=True)
 
-        stdout_path = out_dir / "stdout.log"
-        stderr_path = out_dir / "stderr.log"
+        stdout_path = log_dir / "stdout.log"
+        stderr_path = log_dir / "stderr.log"
 
         host_in = self._resolve_host_path(workflow_path)
         host_out = self._resolve_host_path(out_dir)
@@ -160,7 +264,8 @@ class DockerRunner:
         else:
             mount_target = "/work/input"
 
-        self._ensure_image()
+        with trace.phase("image_check"):
+            self._ensure_image()
 
         entrypoint = self._build_command()
         entrypoint_arg: list[str] = []
@@ -170,9 +275,9 @@ class DockerRunner:
                 raise RunnerError("K2P_COMMAND must be a single executable (no args)")
             entrypoint_arg = ["--entrypoint", entrypoint[0]]
 
-        base_cmd = [
+        create_cmd = [
             self.docker_bin,
-            "run",
+            "create",
             "--rm",
             "--name",
             name,
@@ -199,28 +304,69 @@ class DockerRunner:
             f"{host_out}:/work/out:rw",
             "-w",
             "/work",
-        ] + entrypoint_arg + [self.image]
+        ] + entrypoint_arg + [self.image] + self._build_args()
+
+        with trace.phase("container_create"):
+            created = subprocess.run(create_cmd, text=True, capture_output=True)
+        if created.returncode != 0:
+            raise RunnerError(
+                "container_create_failed",
+                exit_code=created.returncode,
+                stdout_tail=(created.stdout or "")[-1000:],
+                stderr_tail=(created.stderr or "")[-1000:],
+            )
 
         self.logger.info(json.dumps({"event": "runner_start", "job_id": job_id, "image": self.image}))
 
-        def run_once(args: list[str], *, append: bool = False) -> subprocess.CompletedProcess:
-            mode = "a" if append else "w"
-            with stdout_path.open(mode) as stdout_f, stderr_path.open(mode) as stderr_f:
-                return subprocess.run(
-                    base_cmd + args,
-                    text=True,
-                    stdout=stdout_f,
-                    stderr=stderr_f,
-                    timeout=self.timeout_s,
+        stdout_ring = LogRing(self.log_tail_bytes)
+        stderr_ring = LogRing(self.log_tail_bytes)
+        published = (0, 0)
+
+        def publish() -> None:
+            nonlocal published
+            seen = (stdout_ring.total_bytes, stderr_ring.total_bytes)
+            if on_log is None or seen == published:
+                return
+            published = seen
+            on_log(stdout_ring.tail(), stderr_ring.tail())
+
+        def run_once() -> int:
+            with stdout_path.open("wb") as stdout_f, stderr_path.open("wb") as stderr_f:
+                proc = subprocess.Popen(
+                    [self.docker_bin, "start", "--attach", name],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
                 )
+                if on_start is not None:
+                    on_start()
+                pumps = [
+                    threading.Thread(target=_pump, args=(proc.stdout, stdout_f, stdout_ring), daemon=True),
+                    threading.Thread(target=_pump, args=(proc.stderr, stderr_f, stderr_ring), daemon=True),
+                ]
+                for pump in pumps:
+                    pump.start()
+                try:
+                    return self._wait(proc, name, should_cancel, publish if on_log else None)
+                finally:
+                    # The pipes hit EOF once the container (and docker run) has exited.
+                    for pump in pumps:
+                        pump.join(timeout=10)
 
         try:
-            args = self._build_args()
-            p = run_once(args, append=False)
+            with trace.phase("k2p_run"):
+                returncode = run_once()
+        except RunnerCancelled as exc:
+            self.logger.info(json.dumps({"event": "runner_cancelled", "job_id": job_id}))
+            raise RunnerCancelled(
+                "cancelled",
+                exit_code=exc.exit_code,
+                stdout_tail=stdout_ring.tail(),
+                stderr_tail=stderr_ring.tail(),
+            ) from None
         except subprocess.TimeoutExpired:
             subprocess.run([self.docker_bin, "rm", "-f", name], check=False, capture_output=True, text=True)
-            stdout_tail = _tail_file(stdout_path)
-            stderr_tail = _tail_file(stderr_path)
+            stdout_tail = stdout_ring.tail()
+            stderr_tail = stderr_ring.tail()
             raise RunnerError(
                 f"timeout after {self.timeout_s}s",
                 exit_code=None,
@@ -228,19 +374,22 @@ class DockerRunner:
                 stderr_tail=stderr_tail,
             )
 
-        stdout_tail = _tail_file(stdout_path)
-        stderr_tail = _tail_file(stderr_path)
-        if p.returncode != 0:
+        stdout_tail = stdout_ring.tail()
+        stderr_tail = stderr_ring.tail()
+        if returncode != 0:
+            # --rm only removes containers that ran; one that failed to start stays behind.
+            subprocess.run([self.docker_bin, "rm", "-f", name], check=False, capture_output=True, text=True)
             raise RunnerError(
                 "non-zero exit",
-                exit_code=p.returncode,
+                exit_code=returncode,
                 stdout_tail=stdout_tail,
                 stderr_tail=stderr_tail,
             )
 
-        artifacts = [str(p.relative_to(out_dir)) for p in out_dir.rglob("*") if p.is_file()]
+        with trace.phase("artifact_scan"):
+            artifacts = [p.relative_to(out_dir).as_posix() for p in out_dir.rglob("*") if p.is_file()]
         return {
-            "exit_code": p.returncode,
+            "exit_code": returncode,
             "stdout_tail": stdout_tail,
             "stderr_tail": stderr_tail,
             "artifacts": artifacts,
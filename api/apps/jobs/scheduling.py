@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .abandoned import unwatched_cutoff
+from .admission import CLIENT_COUNTER_PREFIX, client_counter, ensure_counter
+from .models import AdmissionCounter, Job
+
+# Candidates tried per call when another transition (cancel, a second worker) wins the race.
+CLAIM_ATTEMPTS = 5
+
+
+def claim_next_job() -> Job | None:
+    """
+    Claim the next QUEUED job for this worker and mark it RUNNING.
+
+    fair (default): round-robin across clients with waiting jobs. The client served
+    least recently goes first, oldest job first within a client, so one client's
+    backlog cannot push everyone else's jobs behind it.
+    fifo: oldest job first.
+    With ABANDONED_JOB_POLICY on, jobs nobody has polled for ABANDONED_AFTER_SECS (and
+    not detached) only run once no watched job is waiting.
+    """
+    queued = Job.objects.select_for_update(skip_locked=True, of=("self",)).filter(status=Job.Status.QUEUED)
+    order = []
+    cutoff = unwatched_cutoff()
+    if cutoff is not None:
+        queued = queued.annotate(
+            unwatched=Case(
+                When(Q(detached=False, last_seen_at__lt=cutoff), then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+        order.append("unwatched")
+    if getattr(settings, "JOB_SCHEDULER", "fair") == "fair":
+        last_served = AdmissionCounter.objects.filter(
+            name=Concat(Value(CLIENT_COUNTER_PREFIX), OuterRef("client_hash"))
+        ).values("last_served_at")[:1]
+        queued = queued.annotate(client_last_served=Subquery(last_served))
+        order.append(F("client_last_served").asc(nulls_first=True))
+    queued = queued.order_by(*order, "created_at")
+
+    for _ in range(CLAIM_ATTEMPTS):
+        with transaction.atomic():
+            job = queued.first()
+            if not job:
+                return None
+            now = timezone.now()
+            # Conditional: row locks do nothing on SQLite, and a cancel committed after the
+            # read must not be overwritten back to RUNNING. A lost race moves on to the next job.
+            if not Job.objects.filter(id=job.id, status=Job.Status.QUEUED).update(
+                status=Job.Status.RUNNING, started_at=now
+            ):
+                continue
+            job.status = Job.Status.RUNNING
+            job.started_at = now
+            counter = client_counter(job.client_hash)
+            if not AdmissionCounter.objects.filter(name=counter).update(last_served_at=now):
+                ensure_counter(counter)
+                AdmissionCounter.objects.filter(name=counter).update(last_served_at=now)
+        return job
+    return None
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+import errno
+import os
 from pathlib import Path, PurePosixPath
 from typing import Iterable, List
 import zipfile
 
+# Fast extraction: entries up to this size are read and written in one call on the calling
+# thread; larger ones are streamed by a thread pool (zlib releases the GIL).
+SMALL_ENTRY_BYTES = 1024 * 1024
+
 
 class ZipValidationError(Exception):
     def __init__(self, code: str, message: str) -> None:
@@ -93,12 +100,49 @@ def validate_zipfile(zf: zipfile.ZipFile, limits: ZipLimits) -> List[str]:
     return names
 
 
+def validate_manifest_entries(entries: Iterable[tuple[str, int]], limits: ZipLimits) -> List[str]:
+    """Apply the validate_zipfile checks to a client-declared (path, size) list."""
+    entries = list(entries)
+    if limits.max_files >= 0 and len(entries) > limits.max_files:
+        raise ZipValidationError("zip_too_many_files", "Too many files in bundle.")
+
+    total = 0
+    names: List[str] = []
+    seen: set[str] = set()
+    for raw_name, size in entries:
+        name = _normalize_name(raw_name)
+        if _is_suspicious_name(name) or _is_unsafe_path(name) or name.endswith("/"):
+            raise ZipValidationError("zip_path_unsafe", f"Unsafe path in bundle: {raw_name}")
+        if name in seen:
+            raise ZipValidationError("duplicate_path", f"Duplicate path in bundle: {raw_name}")
+        if limits.max_path_depth >= 0 and _path_depth(name) > limits.max_path_depth:
+            raise ZipValidationError("zip_path_too_deep", "Bundle entry path is too deep.")
+        if limits.max_file_bytes >= 0 and size > limits.max_file_bytes:
+            raise ZipValidationError("zip_entry_too_large", "Bundle entry is too large.")
+        total += size
+        if limits.max_unpacked_bytes >= 0 and total > limits.max_unpacked_bytes:
+            raise ZipValidationError("zip_bomb", "Bundle exceeds maximum total uncompressed size.")
+        seen.add(name)
+        names.append(name)
+
+    return names
+
+
+def _is_skipped(raw_name: str, ignore_prefixes: tuple[str, ...]) -> bool:
+    if raw_name.startswith(ignore_prefixes):
+        return True
+    base_name = raw_name.rstrip("/").rpartition("/")[2]
+    return raw_name.startswith("__MACOSX/") or "/__MACOSX/" in raw_name or base_name.startswith("._")
+
+
 def safe_extract_zip(
     zip_path: Path,
     dest_dir: Path,
     *,
     limits: ZipLimits,
     ignore_prefixes: Iterable[str] | None = None,
+    fast: bool = False,
+    max_workers: int = 4,
 ) -> List[str]:
     ignore_prefixes = tuple(ignore_prefixes or ())
     dest_dir.mkdir(parents=True, exist_ok=True)
@@ -107,11 +151,11 @@ def safe_extract_zip(
 
     with zipfile.ZipFile(zip_path, "r") as zf:
         validate_zipfile(zf, limits)
+        if fast:
+            return _fast_extract(zf, dest_root, ignore_prefixes, max_workers)
         for info in zf.infolist():
             raw_name = _normalize_name(info.filename)
-            if raw_name.startswith(ignore_prefixes):
-                continue
-            if raw_name.startswith("__MACOSX/") or "/__MACOSX/" in raw_name or Path(raw_name).name.startswith("._"):
+            if _is_skipped(raw_name, ignore_prefixes):
                 continue
             target = (dest_dir / raw_name).resolve()
             if target != dest_root and dest_root not in target.parents:
@@ -128,3 +172,79 @@ def safe_extract_zip(
             extracted.append(raw_name)
 
     return extracted
+
+
+def _make_dirs(dest_root: Path, dirs: Iterable[str]) -> None:
+    """
+    Create dirs (POSIX paths relative to dest_root), parents first, in one pass.
+
+    A directory this call creates is a real directory under an already checked parent, so
+    only ones that already existed are resolved, to reject symlinks leading out of dest_root.
+    """
+    root = str(dest_root)
+    for rel in sorted(dirs, key=lambda d: d.count("/")):
+        path = os.path.join(root, rel)
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            resolved = Path(path).resolve()
+            if resolved != dest_root and dest_root not in resolved.parents:
+                raise ZipValidationError("zip_path_traversal", "Zip entry escapes target directory.")
+            if not resolved.is_dir():
+                raise ZipValidationError("zip_path_unsafe", f"Zip entry path is not a directory: {rel}")
+
+
+def _write_entry(zf: zipfile.ZipFile, info: zipfile.ZipInfo, target: str) -> None:
+    try:
+        # O_NOFOLLOW: a symlink already at the target is refused rather than written through.
+        fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOFOLLOW", 0), 0o666)
+    except OSError as exc:
+        if exc.errno == errno.ELOOP:
+            raise ZipValidationError("zip_path_traversal", "Zip entry escapes target directory.") from exc
+        raise
+    with os.fdopen(fd, "wb") as dst:
+        if info.file_size <= SMALL_ENTRY_BYTES:
+            dst.write(zf.read(info))
+            return
+        with zf.open(info) as src:
+            for chunk in iter(lambda: src.read(SMALL_ENTRY_BYTES), b""):
+                dst.write(chunk)
+
+
+def _fast_extract(
+    zf: zipfile.ZipFile, dest_root: Path, ignore_prefixes: tuple[str, ...], max_workers: int
+) -> List[str]:
+    """
+    safe_extract_zip(fast=True): plan every target once, create the directory tree in one
+    pass, then write entries. validate_zipfile has already rejected absolute names, "..",
+    empty parts and symlink entries, so targets are joined lexically under dest_root.
+    """
+    dirs: set[str] = set()
+    # Last entry wins for duplicate names, as with sequential extraction.
+    files: dict[str, zipfile.ZipInfo] = {}
+    for info in zf.infolist():
+        raw_name = _normalize_name(info.filename)
+        if _is_skipped(raw_name, ignore_prefixes):
+            continue
+        parent = raw_name.rstrip("/") if info.is_dir() else raw_name.rpartition("/")[0]
+        while parent and parent not in dirs:
+            dirs.add(parent)
+            parent = parent.rpartition("/")[0]
+        if not info.is_dir():
+            files.pop(raw_name, None)
+            files[raw_name] = info
+    _make_dirs(dest_root, dirs)
+
+    root = str(dest_root)
+    large = []
+    for raw_name, info in files.items():
+        target = os.path.join(root, raw_name)
+        if info.file_size <= SMALL_ENTRY_BYTES:
+            _write_entry(zf, info, target)
+        else:
+            large.append((info, target))
+    if large:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(large)))) as pool:
+            for future in [pool.submit(_write_entry, zf, info, target) for info, target in large]:
+                future.result()
+    return list(files)
@@ -3,6 +3,8 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import os
+import shutil
 import zipfile
 import xml.etree.ElementTree as ET
 import re
@@ -12,14 +14,21 @@ from typing import Any
 from django.conf import settings
 from rest_framework import serializers
 
-from .models import Job, JobSettingsMeta
+from .estimates import queue_eta
+from .events import EventBatch
+from .fingerprint import content_fingerprint, is_junk_entry
+from .models import Job, JobEvent
 from .metrics_api import JOB_CREATED_TOTAL
-from .security import ZipLimits, ZipValidationError, validate_zipfile
+from .nodemeta import copy_node_meta, parse_settings_xml, store_node_meta
+from .security import ZipLimits, ZipValidationError, validate_manifest_entries, validate_zipfile
+from .tracing import PhaseTrace
 
 logger = logging.getLogger("k2p.jobs")
 
 class JobCreateSerializer(serializers.Serializer):
     bundle = serializers.FileField()
+    # Results will be collected later; exempt from ABANDONED_JOB_POLICY.
+    detached = serializers.BooleanField(required=False, default=False)
 
     def validate_bundle(self, f) -> Any:
         content_type = getattr(f, "content_type", "") or ""
@@ -44,24 +53,46 @@ class JobCreateSerializer(serializers.Serializer):
         return stem[:80] or "workflow"
 
     def create(self, validated_data: dict) -> Job:
+        """
+        Store and validate the bundle as a new QUEUED job.
+
+        Phases are timed into context["trace"] when given; context["entry_count"] is set
+        once the zip directory has been read. A context["expected_sha256"] is checked against
+        the digest computed while storing, so callers need not read the bundle for it. The
+        job's ingest events are inserted together at the end, also when the bundle is rejected.
+        """
+        events = EventBatch()
+        try:
+            return self._create(validated_data, events)
+        finally:
+            events.flush()
+
+    def _create(self, validated_data: dict, events: EventBatch) -> Job:
         f = validated_data["bundle"]
+        trace = self.context.get("trace") or PhaseTrace()
 
-        job = Job.objects.create(
-            status=Job.Status.QUEUED,
-            original_filename=getattr(f, "name", "")[:255],
-            input_size=getattr(f, "size", 0) or 0,
-        )
+        with trace.phase("job_insert"):
+            job = Job.objects.create(
+                status=Job.Status.QUEUED,
+                original_filename=getattr(f, "name", "")[:255],
+                input_size=getattr(f, "size", 0) or 0,
+                admission_cost=validated_data.get("admission_cost", 1.0),
+                client_hash=validated_data.get("client_hash", ""),
+                detached=validated_data.get("detached", False),
+            )
+        events.add(job.id, JobEvent.Kind.CREATED, size=job.input_size)
         max_upload = getattr(settings, "MAX_UPLOAD_BYTES", 50 * 1024 * 1024)
         if job.input_size and max_upload >= 0 and job.input_size > max_upload:
             job.status = Job.Status.FAILED
             job.error_code = "upload_too_large"
             job.error_message = f"Upload too large (max {max_upload} bytes)."
             job.save(update_fields=["status", "error_code", "error_message"])
+            events.add(job.id, JobEvent.Kind.REJECTED, error_code=job.error_code)
             raise serializers.ValidationError(job.error_message, code="too_large")
 
         try:
             f.seek(0)
-            with zipfile.ZipFile(f, "r") as zf:
+            with trace.phase("zip_validate"), zipfile.ZipFile(f, "r") as zf:
                 limits = ZipLimits(
                     max_files=getattr(settings, "MAX_ZIP_FILES", 2000),
                     max_path_depth=getattr(settings, "MAX_ZIP_PATH_DEPTH", 20),
@@ -69,11 +100,8 @@ class JobCreateSerializer(serializers.Serializer):
                     max_file_bytes=getattr(settings, "MAX_FILE_BYTES", 50 * 1024 * 1024),
                 )
                 names = validate_zipfile(zf, limits)
-                names = [
-                    n
-                    for n in names
-                    if not (n.startswith("__MACOSX/") or "/__MACOSX/" in n or Path(n).name.startswith("._"))
-                ]
+                self.context["entry_count"] = len(names)
+                names = [n for n in names if not is_junk_entry(n)]
                 has_root_workflow = any(n.lower() == "workflow.knime" for n in names)
                 if not has_root_workflow:
                     raise ZipValidationError(
@@ -85,12 +113,14 @@ class JobCreateSerializer(serializers.Serializer):
             job.error_code = exc.code
             job.error_message = exc.message
             job.save(update_fields=["status", "error_code", "error_message"])
+            events.add(job.id, JobEvent.Kind.REJECTED, error_code=job.error_code)
             raise serializers.ValidationError(exc.message, code=exc.code) from exc
         except zipfile.BadZipFile as exc:
             job.status = Job.Status.FAILED
             job.error_code = "invalid_zip"
             job.error_message = "Uploaded file is not a valid ZIP archive."
             job.save(update_fields=["status", "error_code", "error_message"])
+            events.add(job.id, JobEvent.Kind.REJECTED, error_code=job.error_code)
             raise serializers.ValidationError(job.error_message) from exc
         finally:
             try:
@@ -111,14 +141,24 @@ class JobCreateSerializer(serializers.Serializer):
 
         # Compute sha256 while writing
         hasher = hashlib.sha256()
-        with open(full_path, "wb") as dst:
+        with trace.phase("store"), open(full_path, "wb") as dst:
             for chunk in f.chunks(chunk_size=1024 * 1024):
                 hasher.update(chunk)
                 dst.write(chunk)
+        expected_sha256 = self.context.get("expected_sha256")
+        if expected_sha256 and hasher.hexdigest() != expected_sha256:
+            full_path.unlink(missing_ok=True)
+            job.status = Job.Status.FAILED
+            job.error_code = "checksum_mismatch"
+            job.error_message = "Uploaded bytes do not match sha256."
+            job.save(update_fields=["status", "error_code", "error_message"])
+            events.add(job.id, JobEvent.Kind.REJECTED, error_code=job.error_code)
+            raise serializers.ValidationError(job.error_message, code="checksum_mismatch")
 
-        # Validate XML files inside the zip
+        # Validate XML files inside the zip; hash every entry on the same pass for the content fingerprint.
+        entry_digests: list[tuple[str, str]] = []
         try:
-            with zipfile.ZipFile(full_path, "r") as zf:
+            with trace.phase("xml_validate"), zipfile.ZipFile(full_path, "r") as zf:
                 limits = ZipLimits(
                     max_files=getattr(settings, "MAX_ZIP_FILES", 2000),
                     max_path_depth=getattr(settings, "MAX_ZIP_PATH_DEPTH", 20),
@@ -126,19 +166,24 @@ class JobCreateSerializer(serializers.Serializer):
                     max_file_bytes=getattr(settings, "MAX_FILE_BYTES", 50 * 1024 * 1024),
                 )
                 names = validate_zipfile(zf, limits)
-                names = [
-                    n
-                    for n in names
-                    if not (n.startswith("__MACOSX/") or "/__MACOSX/" in n or Path(n).name.startswith("._"))
-                ]
-                for name in names:
-                    if name.startswith("__MACOSX/") or "/__MACOSX/" in name or Path(name).name.startswith("._"):
+                for info, name in zip(zf.infolist(), names):
+                    if info.is_dir():
+                        continue
+                    if is_junk_entry(name):
                         continue
-                    if not name.lower().endswith(".xml") and not name.lower().endswith("workflow.knime"):
+                    is_xml = name.lower().endswith(".xml") or name.lower().endswith("workflow.knime")
+                    entry_hasher = hashlib.sha256()
+                    data = bytearray()
+                    with zf.open(info) as src:
+                        for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                            entry_hasher.update(chunk)
+                            if is_xml:
+                                data += chunk
+                    entry_digests.append((name, entry_hasher.hexdigest()))
+                    if not is_xml:
                         continue
                     try:
-                        data = zf.read(name)
-                        ET.fromstring(data)
+                        ET.fromstring(bytes(data))
                     except ET.ParseError as exc:
                         raise serializers.ValidationError(f"Invalid XML in {name}.") from exc
         except (zipfile.BadZipFile, serializers.ValidationError, ZipValidationError) as exc:
@@ -155,48 +200,33 @@ class JobCreateSerializer(serializers.Serializer):
                 job.error_code = "invalid_xml"
                 job.error_message = str(exc)
             job.save(update_fields=["status", "error_code", "error_message"])
+            events.add(job.id, JobEvent.Kind.REJECTED, error_code=job.error_code)
             if isinstance(exc, zipfile.BadZipFile):
                 raise serializers.ValidationError(job.error_message) from exc
             if isinstance(exc, ZipValidationError):
                 raise serializers.ValidationError(exc.message, code=exc.code) from exc
             raise serializers.ValidationError(job.error_message) from exc
 
-        # Extract settings.xml metadata and store per-file rows.
-        with zipfile.ZipFile(full_path, "r") as zf:
-            for name in zf.namelist():
-                if name.startswith("__MACOSX/") or "/__MACOSX/" in name or Path(name).name.startswith("._"):
-                    continue
-                if not name.lower().endswith("settings.xml"):
-                    continue
-                factory = node_name = display_name = None
-                try:
-                    data = zf.read(name)
-                    root = ET.fromstring(data)
-                    for entry in root.iter():
-                        if not entry.tag.endswith("entry"):
-                            continue
-                        key = entry.attrib.get("key")
-                        if key == "factory":
-                            factory = entry.attrib.get("value")
-                        elif key == "node-name":
-                            node_name = entry.attrib.get("value")
-                        elif key == "name":
-                            display_name = entry.attrib.get("value")
-                except ET.ParseError:
-                    # Invalid XML already validated above; skip metadata on parse error.
-                    pass
-
-                JobSettingsMeta.objects.create(
-                    job=job,
-                    file_name=name,
-                    factory=factory,
-                    node_name=node_name,
-                    name=display_name,
-                )
+        events.add(job.id, JobEvent.Kind.VALIDATED, entries=self.context.get("entry_count"))
 
-        job.input_key = rel_key  # storage key; not an absolute path
-        job.input_sha256 = hasher.hexdigest()
-        job.save(update_fields=["input_key", "input_sha256"])
+        # Extract settings.xml metadata into the job's compact node metadata row.
+        with trace.phase("node_meta"):
+            nodes = []
+            with zipfile.ZipFile(full_path, "r") as zf:
+                for name in zf.namelist():
+                    if is_junk_entry(name):
+                        continue
+                    if not name.lower().endswith("settings.xml"):
+                        continue
+                    nodes.append(parse_settings_xml(name, zf.read(name)))
+            store_node_meta(job, nodes)
+
+        with trace.phase("job_update"):
+            job.input_key = rel_key  # storage key; not an absolute path
+            job.input_sha256 = hasher.hexdigest()
+            job.content_fingerprint = content_fingerprint(entry_digests)
+            job.save(update_fields=["input_key", "input_sha256", "content_fingerprint"])
+        events.add(job.id, JobEvent.Kind.QUEUED)
 
         JOB_CREATED_TOTAL.inc()
         logger.info(
@@ -213,6 +243,61 @@ class JobCreateSerializer(serializers.Serializer):
         return job
 
 
+def clone_job(source: Job, *, admission_cost: float = 1.0, client_hash: str = "", detached: bool = False) -> Job:
+    """Create a new QUEUED job from source's stored input bundle, without a new upload."""
+    root = getattr(settings, "JOB_STORAGE_ROOT", None)
+    if root is None:
+        raise RuntimeError("JOB_STORAGE_ROOT is not configured in Django settings.")
+
+    job = Job.objects.create(
+        status=Job.Status.QUEUED,
+        original_filename=source.original_filename,
+        input_size=source.input_size,
+        input_sha256=source.input_sha256,
+        content_fingerprint=source.content_fingerprint,
+        admission_cost=admission_cost,
+        client_hash=client_hash,
+        detached=detached,
+    )
+    rel_key = f"jobs/{job.id}/{Path(source.input_key).name}"
+    src_path = Path(root) / source.input_key
+    full_path = Path(root) / rel_key
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        try:
+            # Hard link: no copy, and the clone survives retention of the source job.
+            os.link(src_path, full_path)
+        except OSError:
+            shutil.copyfile(src_path, full_path)
+    except OSError:
+        shutil.rmtree(full_path.parent, ignore_errors=True)
+        job.delete()
+        raise
+
+    copy_node_meta(source, job)
+
+    job.input_key = rel_key
+    job.save(update_fields=["input_key"])
+    events = EventBatch()
+    events.add(job.id, JobEvent.Kind.CREATED, size=job.input_size, cloned_from=str(source.id))
+    events.add(job.id, JobEvent.Kind.QUEUED)
+    events.flush()
+
+    JOB_CREATED_TOTAL.inc()
+    logger.info(
+        json.dumps(
+            {
+                "event": "job_created",
+                "job_id": str(job.id),
+                "input_size": job.input_size,
+                "input_sha256_prefix": (job.input_sha256 or "")[:12],
+                "cloned_from": str(source.id),
+            }
+        )
+    )
+    return job
+
+
 class JobSerializer(serializers.ModelSerializer):
     class Meta:
         model = Job
@@ -221,11 +306,89 @@ class JobSerializer(serializers.ModelSerializer):
             "created_at",
             "started_at",
             "finished_at",
+            "cancel_requested_at",
             "status",
             "original_filename",
             "input_size",
             "input_sha256",
+            "content_fingerprint",
+            "detached",
             "input_key",
             "error_code",
             "error_message",
         ]
+
+
+class JobEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JobEvent
+        fields = ["kind", "at", "source", "monotonic_ns", "payload"]
+
+
+class JobDetailSerializer(JobSerializer):
+    """JobSerializer plus queue_position / estimated_start_at / estimated_finish_at (estimates.queue_eta)."""
+
+    def to_representation(self, instance: Job) -> dict:
+        data = super().to_representation(instance)
+        eta = queue_eta(instance)
+        as_datetime = serializers.DateTimeField()
+        data["queue_position"] = eta["queue_position"]
+        for key in ("estimated_start_at", "estimated_finish_at"):
+            data[key] = as_datetime.to_representation(eta[key]) if eta[key] else None
+        return data
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False, allow_blank=True)
+
+    def validate_filename(self, value: str) -> str:
+        if not value.lower().endswith(".zip"):
+            raise serializers.ValidationError("Only .zip files are accepted.")
+        return value
+
+
+class BundleEntrySerializer(serializers.Serializer):
+    path = serializers.CharField(max_length=1024)
+    sha256 = serializers.RegexField(r"^[0-9a-f]{64}$")
+    size = serializers.IntegerField(min_value=0)
+
+
+class BundleManifestSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255, required=False, default="workflow.zip")
+    files = BundleEntrySerializer(many=True, allow_empty=False)
+    detached = serializers.BooleanField(required=False, default=False)
+
+    def validate_filename(self, value: str) -> str:
+        if not value.lower().endswith(".zip"):
+            raise serializers.ValidationError("Only .zip files are accepted.")
+        return value
+
+    def validate_files(self, files: list[dict]) -> list[dict]:
+        limits = ZipLimits(
+            max_files=getattr(settings, "MAX_ZIP_FILES", 2000),
+            max_path_depth=getattr(settings, "MAX_ZIP_PATH_DEPTH", 20),
+            max_unpacked_bytes=getattr(settings, "MAX_UNPACKED_BYTES", 300 * 1024 * 1024),
+            max_file_bytes=getattr(settings, "MAX_FILE_BYTES", 50 * 1024 * 1024),
+        )
+        try:
+            names = validate_manifest_entries([(f["path"], f["size"]) for f in files], limits)
+        except ZipValidationError as exc:
+            raise serializers.ValidationError(exc.message, code=exc.code) from exc
+        return [{**f, "path": name} for f, name in zip(files, names)]
+
+
+class JobByHashSerializer(serializers.Serializer):
+    # Either the raw bundle sha256 or the packaging-independent content fingerprint.
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False)
+    fingerprint = serializers.RegexField(r"^[0-9a-fA-F]{64}$", required=False)
+    # Re-run a succeeded bundle instead of returning the existing result.
+    rerun = serializers.BooleanField(required=False, default=False)
+    # Applies to a cloned job (see JobCreateSerializer.detached).
+    detached = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs: dict) -> dict:
+        if bool(attrs.get("sha256")) == bool(attrs.get("fingerprint")):
+            raise serializers.ValidationError("Provide exactly one of sha256 or fingerprint.")
+        return attrs
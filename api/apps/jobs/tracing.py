@@ -0,0 +1,46 @@
+"""
+Per-phase wall time of one unit of work (a worker job run, an API ingest).
+
+    trace = PhaseTrace(JOB_PHASE_SECONDS)
+    with trace.phase("extract"):
+        ...
+
+trace.phases sums the seconds per phase name. With a histogram labelled by "phase", each
+phase is also observed there as it ends. A new phase needs only a name.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Histogram
+
+
+class PhaseTrace:
+    def __init__(self, histogram: Histogram | None = None) -> None:
+        self.histogram = histogram
+        # Phase name -> seconds, in the order the phases first ran.
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block as phase name, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        if self.histogram is not None:
+            self.histogram.labels(phase=name).observe(seconds)
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def log_fields(self) -> dict[str, float]:
+        return {name: round(seconds, 4) for name, seconds in self.phases.items()}
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in milliseconds)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases.items())
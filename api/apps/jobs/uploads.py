@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .admission import release_upload_bytes
+from .models import UploadSession
+
+logger = logging.getLogger("k2p.jobs")
+
+# Far longer than ingesting a MAX_UPLOAD_BYTES bundle takes.
+COMMIT_STALE_SECS = 600
+
+
+def upload_root() -> Path:
+    root = getattr(settings, "JOB_STORAGE_ROOT", None)
+    if root is None:
+        raise RuntimeError("JOB_STORAGE_ROOT is not configured in Django settings.")
+    return Path(root) / "uploads"
+
+
+def upload_part_path(session_id) -> Path:
+    # Partial uploads live under JOB_STORAGE_ROOT/uploads/<uuid>.part until committed.
+    return upload_root() / f"{session_id}.part"
+
+
+def session_expiry(now: datetime.datetime | None = None) -> datetime.datetime:
+    ttl_s = int(getattr(settings, "UPLOAD_SESSION_TTL_SECS", 3600))
+    return (now or timezone.now()) + datetime.timedelta(seconds=ttl_s)
+
+
+def commit_stale_before(now: datetime.datetime | None = None) -> datetime.datetime:
+    """A commit claim older than this was left by a crashed process and may be taken over."""
+    return (now or timezone.now()) - datetime.timedelta(seconds=COMMIT_STALE_SECS)
+
+
+def chunk_size() -> int:
+    return int(getattr(settings, "UPLOAD_CHUNK_BYTES", 5 * 1024 * 1024))
+
+
+def max_chunk_size() -> int:
+    return int(getattr(settings, "UPLOAD_CHUNK_MAX_BYTES", 8 * 1024 * 1024))
+
+
+def write_chunk(session: UploadSession, offset: int, data: bytes) -> None:
+    path = upload_part_path(session.id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    mode = "r+b" if path.exists() else "wb"
+    with open(path, mode) as dst:
+        dst.seek(offset)
+        dst.write(data)
+        # Drop any bytes left over from an earlier, partially written attempt at this offset.
+        dst.truncate(offset + len(data))
+
+
+def delete_session(session: UploadSession) -> None:
+    upload_part_path(session.id).unlink(missing_ok=True)
+    # An uncommitted session gives its charge back; a committed one was refunded on commit.
+    deleted, _ = UploadSession.objects.filter(id=session.id, job__isnull=True).delete()
+    if deleted:
+        release_upload_bytes(session.client_hash, session.total_size)
+    else:
+        UploadSession.objects.filter(id=session.id).delete()
+
+
+def delete_expired_sessions(now: datetime.datetime | None = None, *, limit: int = 100) -> int:
+    now = now or timezone.now()
+    expired = list(UploadSession.objects.filter(expires_at__lt=now).order_by("expires_at")[:limit])
+    for session in expired:
+        delete_session(session)
+    if expired:
+        logger.info(json.dumps({"event": "upload_sessions_expired", "count": len(expired)}))
+    return len(expired)
@@ -1,9 +1,38 @@
 from django.urls import path
-from .views import JobsCreateView, JobDetailView, JobLogsView, JobResultZipView
+from .views import (
+    BlobsUploadView,
+    BundleMissingView,
+    BundlesCreateView,
+    JobByHashView,
+    JobCancelView,
+    JobsCreateView,
+    JobDetailView,
+    JobEventsView,
+    JobFilesView,
+    JobFileView,
+    JobLogsStreamView,
+    JobLogsView,
+    JobResultZipView,
+    UploadCommitView,
+    UploadDetailView,
+    UploadsCreateView,
+)
 
 urlpatterns = [
     path("jobs", JobsCreateView.as_view(), name="jobs-create"),
+    path("jobs/by-hash", JobByHashView.as_view(), name="jobs-by-hash"),
     path("jobs/<uuid:job_id>", JobDetailView.as_view(), name="jobs-detail"),
+    path("jobs/<uuid:job_id>/cancel", JobCancelView.as_view(), name="jobs-cancel"),
+    path("jobs/<uuid:job_id>/files", JobFilesView.as_view(), name="jobs-files"),
+    path("jobs/<uuid:job_id>/files/<path:file_path>", JobFileView.as_view(), name="jobs-file"),
+    path("jobs/<uuid:job_id>/events", JobEventsView.as_view(), name="jobs-events"),
     path("jobs/<uuid:job_id>/logs", JobLogsView.as_view(), name="jobs-logs"),
+    path("jobs/<uuid:job_id>/logs/stream", JobLogsStreamView.as_view(), name="jobs-logs-stream"),
     path("jobs/<uuid:job_id>/result.zip", JobResultZipView.as_view(), name="jobs-result-zip"),
+    path("bundles", BundlesCreateView.as_view(), name="bundles-create"),
+    path("bundles/missing", BundleMissingView.as_view(), name="bundles-missing"),
+    path("blobs", BlobsUploadView.as_view(), name="blobs-upload"),
+    path("uploads", UploadsCreateView.as_view(), name="uploads-create"),
+    path("uploads/<uuid:upload_id>", UploadDetailView.as_view(), name="uploads-detail"),
+    path("uploads/<uuid:upload_id>/commit", UploadCommitView.as_view(), name="uploads-commit"),
 ]
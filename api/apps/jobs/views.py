@@ -1,163 +1,1029 @@
 from __future__ import annotations
 
+import datetime
+import hashlib
+import json
 import tempfile
-import zipfile
+import threading
+import time
 from pathlib import Path
+from urllib.parse import quote
 
 from django.conf import settings
 from django.core.exceptions import RequestDataTooBig
-from django.http import FileResponse
-from django.db import connection, transaction
+from django.core.files import File
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.http import content_disposition_header
 from rest_framework import serializers, status
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Job
-from .serializers import JobCreateSerializer, JobSerializer
-from .metrics_api import ENQUEUE_REJECTED_TOTAL
+from . import abandoned, admission, archives, artifacts, blobs, uploads
+from .admission import IN_FLIGHT_STATUSES
+from .events import record_event
+from .models import Job, JobArtifact, JobDiagnostics, JobEvent, UploadSession
+from .serializers import (
+    BundleManifestSerializer,
+    JobByHashSerializer,
+    JobCreateSerializer,
+    JobDetailSerializer,
+    JobEventSerializer,
+    JobSerializer,
+    UploadSessionCreateSerializer,
+    clone_job,
+)
+from .metrics_api import ENQUEUE_REJECTED_TOTAL, observe_ingest
+from .tracing import PhaseTrace
+
+
+def _admit(request, input_size: int) -> tuple[admission.AdmissionDecision, Response | None]:
+    """
+    Reserve capacity for a job of input_size bytes from the requesting client.
+
+    Returns (decision, None) when admitted; the caller passes the decision on so the
+    reservation is attributed to the job, or released if no job is created. Otherwise
+    returns (decision, 429 response), with Retry-After when a wait estimate exists.
+    """
+    decision = admission.admit(input_size, admission.client_hash(request))
+    if decision.admitted:
+        return decision, None
+    ENQUEUE_REJECTED_TOTAL.inc()
+    headers = {}
+    if decision.retry_after_secs is not None:
+        headers["Retry-After"] = str(decision.retry_after_secs)
+    if decision.reason == "client_limit":
+        error = {
+            "code": "client_limit",
+            "message": "Too many of your jobs are queued or running. Wait for some to finish.",
+            "details": {"max_inflight_per_client": getattr(settings, "MAX_INFLIGHT_PER_CLIENT", 10)},
+        }
+    elif decision.reason == "queue_wait_exceeded":
+        error = {
+            "code": "queue_wait_exceeded",
+            "message": "Predicted queue wait is too long. Try again later.",
+            "details": {
+                "estimated_wait_seconds": decision.estimated_wait_secs,
+                "wait_slo_seconds": decision.wait_slo_secs,
+                "worker_slots": decision.worker_slots,
+                "retry_after_seconds": decision.retry_after_secs,
+            },
+        }
+    else:
+        error = {
+            "code": "queue_full",
+            "message": "Job queue is full. Try again later.",
+            "details": {
+                "max_queued_jobs": getattr(settings, "MAX_QUEUED_JOBS", 50),
+                "counted_statuses": [s.value for s in IN_FLIGHT_STATUSES],
+            },
+        }
+    return decision, Response({"error": error}, status=status.HTTP_429_TOO_MANY_REQUESTS, headers=headers)
+
+
+def _create_job(data, admitted: admission.AdmissionDecision, context: dict | None = None) -> tuple[Job | None, Response]:
+    """
+    Run a bundle through JobCreateSerializer and map failures onto the API error contract.
+
+    Called with capacity reserved by _admit(); it is released if no job is queued. context
+    is passed to the serializer (a "trace" in it receives the ingest phases).
+    """
+    try:
+        job, resp = _create_job_unchecked(data, admitted, context or {})
+    except BaseException:
+        admission.release(admitted.cost, admitted.client_hash)
+        raise
+    if job is None:
+        admission.release(admitted.cost, admitted.client_hash)
+    return job, resp
+
+
+def _create_job_unchecked(data, admitted: admission.AdmissionDecision, context: dict) -> tuple[Job | None, Response]:
+    ser = JobCreateSerializer(data=data, context=context)
+    trace = context.get("trace") or PhaseTrace()
+    with trace.phase("validate"):
+        valid = ser.is_valid()
+    if not valid:
+        return None, Response(
+            {"error": {"code": "invalid_request", "message": "Invalid input.", "details": ser.errors}},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        job = ser.save(admission_cost=admitted.cost, client_hash=admitted.client_hash)
+    except serializers.ValidationError as exc:
+        code = "invalid_request"
+        message = "Invalid input."
+        status_code = status.HTTP_400_BAD_REQUEST
+        if getattr(exc, "detail", None):
+            if getattr(exc, "get_codes", None):
+                codes = exc.get_codes()
+                if "too_large" in str(codes):
+                    code = "payload_too_large"
+                    message = "Upload too large."
+                    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                elif "checksum_mismatch" in str(codes):
+                    code = "checksum_mismatch"
+                    message = "Uploaded bytes do not match sha256."
+        return None, Response(
+            {"error": {"code": code, "message": message}},
+            status=status_code,
+        )
+    with trace.phase("respond"):
+        resp = Response(JobSerializer(job).data, status=status.HTTP_201_CREATED)
+    return job, resp
 
 
 class JobsCreateView(APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request):
-        in_flight = [Job.Status.QUEUED, Job.Status.RUNNING]
-        max_queued = getattr(settings, "MAX_QUEUED_JOBS", 50)
-        with transaction.atomic():
-            if settings.DATABASES["default"]["ENGINE"].endswith("postgresql"):
-                with connection.cursor() as cursor:
-                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", [424242])
-            if max_queued >= 0:
-                queued_count = Job.objects.filter(status__in=in_flight).count()
-                if queued_count >= max_queued:
-                    ENQUEUE_REJECTED_TOTAL.inc()
-                    return Response(
-                        {
-                            "error": {
-                                "code": "queue_full",
-                                "message": "Job queue is full. Try again later.",
-                                "details": {
-                                    "max_queued_jobs": max_queued,
-                                    "counted_statuses": [s.value for s in in_flight],
-                                },
-                            }
-                        },
-                        status=status.HTTP_429_TOO_MANY_REQUESTS,
-                    )
         try:
-            _ = request.data
+            size = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response(
+                {"error": {"code": "invalid_request", "message": "Invalid Content-Length header."}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        context = {"trace": PhaseTrace()}
+        resp = self._post(request, size, context)
+        # Timed until the response is built; the phases go to k2p_ingest_phase_seconds.
+        trace = context["trace"]
+        observe_ingest(trace.phases, size, context.get("entry_count"))
+        if settings.DEBUG and trace.phases:
+            resp["Server-Timing"] = trace.server_timing()
+        return resp
+
+    def _post(self, request, size: int, context: dict) -> Response:
+        trace = context["trace"]
+        # Admit before parsing so a full queue rejects without reading the upload.
+        with trace.phase("admission"):
+            admitted, rejected = _admit(request, size)
+        if rejected is not None:
+            return rejected
+        try:
+            with trace.phase("parse"):
+                _ = request.data
         except RequestDataTooBig:
+            admission.release(admitted.cost, admitted.client_hash)
             return Response(
                 {"error": {"code": "payload_too_large", "message": "Upload too large."}},
                 status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             )
-        ser = JobCreateSerializer(data=request.data)
+        _, resp = _create_job(request.data, admitted, context)
+        return resp
+
+
+class JobByHashView(APIView):
+    """
+    Pre-upload check: reuse a job or stored input with the same bundle sha256
+    or content fingerprint (same files, regardless of how they were zipped).
+
+    Only the caller's own jobs are returned as matches; another client's stored input is
+    reused by cloning, so its job is never exposed to, or cancellable by, the caller.
+
+    POST /api/jobs/by-hash  {"sha256" | "fingerprint": "<hex>", "rerun": false, "detached": false}
+    """
+
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        ser = JobByHashSerializer(data=request.data)
         if not ser.is_valid():
             return Response(
                 {"error": {"code": "invalid_request", "message": "Invalid input.", "details": ser.errors}},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if ser.validated_data.get("fingerprint"):
+            lookup = {"content_fingerprint": ser.validated_data["fingerprint"].lower()}
+        else:
+            lookup = {"input_sha256": ser.validated_data["sha256"].lower()}
+        candidates = Job.objects.filter(**lookup).exclude(input_key="").order_by("-created_at")
+        own = candidates.filter(client_hash=admission.client_hash(request))
+
+        in_flight = own.filter(status__in=IN_FLIGHT_STATUSES).first()
+        if in_flight is not None:
+            abandoned.mark_seen(in_flight)
+            return Response({"match": "in_flight", "job": JobSerializer(in_flight).data}, status=status.HTTP_200_OK)
+
+        succeeded_days = int(getattr(settings, "RETENTION_SUCCEEDED_DAYS", 7))
+        cutoff = timezone.now() - datetime.timedelta(days=max(succeeded_days, 0))
+        succeeded = own.filter(status=Job.Status.SUCCEEDED, finished_at__gte=cutoff).first()
+        if succeeded is not None and not ser.validated_data["rerun"]:
+            return Response({"match": "succeeded", "job": JobSerializer(succeeded).data}, status=status.HTTP_200_OK)
+
+        root = Path(settings.JOB_STORAGE_ROOT)
+        sources = [succeeded] if succeeded is not None else list(candidates[:5])
+        source = next((j for j in sources if (root / j.input_key).is_file()), None)
+        if source is None:
+            return Response(
+                {"error": {"code": "unknown_hash", "message": "No stored bundle with this hash. Upload it."}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        admitted, rejected = _admit(request, source.input_size)
+        if rejected is not None:
+            return rejected
         try:
-            job = ser.save()
-        except serializers.ValidationError as exc:
-            code = "invalid_request"
-            message = "Invalid input."
-            status_code = status.HTTP_400_BAD_REQUEST
-            if getattr(exc, "detail", None):
-                if getattr(exc, "get_codes", None):
-                    codes = exc.get_codes()
-                    if "too_large" in str(codes):
-                        code = "payload_too_large"
-                        message = "Upload too large."
-                        status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
-            return Response(
-                {"error": {"code": code, "message": message}},
-                status=status_code,
+            job = clone_job(
+                source,
+                admission_cost=admitted.cost,
+                client_hash=admitted.client_hash,
+                detached=ser.validated_data["detached"],
+            )
+        except OSError:
+            admission.release(admitted.cost, admitted.client_hash)
+            # Source input was swept between the check and the copy.
+            return Response(
+                {"error": {"code": "unknown_hash", "message": "No stored bundle with this hash. Upload it."}},
+                status=status.HTTP_404_NOT_FOUND,
             )
-        return Response(JobSerializer(job).data, status=status.HTTP_201_CREATED)
+        return Response({"match": "cloned", "job": JobSerializer(job).data}, status=status.HTTP_201_CREATED)
 
 
 class JobDetailView(APIView):
     def get(self, request, job_id):
         job = get_object_or_404(Job, id=job_id)
-        return Response(JobSerializer(job).data, status=status.HTTP_200_OK)
+        abandoned.mark_seen(job)
+        return Response(JobDetailSerializer(job).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, job_id):
+        return _cancel_job(job_id)
+
+
+def _cancel_job(job_id) -> Response:
+    job = get_object_or_404(Job, id=job_id)
+    cancelled = admission.cancel_job(job.id)
+    job.refresh_from_db()
+    # Cancelling an already cancelled job is a no-op, not a conflict.
+    if not cancelled and job.status != Job.Status.CANCELLED:
+        return Response(
+            {
+                "error": {
+                    "code": "job_finished",
+                    "message": "Job has already finished.",
+                    "details": {"status": job.status},
+                }
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+    # RUNNING: the worker stops the container within JOB_CANCEL_POLL_SECS and records CANCELLED.
+    code = status.HTTP_202_ACCEPTED if job.status == Job.Status.RUNNING else status.HTTP_200_OK
+    return Response(JobDetailSerializer(job).data, status=code)
+
+
+class JobCancelView(APIView):
+    """
+    Cancel a job (same as DELETE /api/jobs/<uuid>).
+
+    POST /api/jobs/<uuid>/cancel
+    """
+
+    def post(self, request, job_id):
+        return _cancel_job(job_id)
+
+
+def _job_not_ready(job: Job) -> Response:
+    return Response(
+        {
+            "error": {
+                "code": "job_not_ready",
+                "message": "Job is not finished yet.",
+                "details": {"status": job.status},
+            }
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def _job_results_dir(job: Job) -> tuple[Path | None, Response | None]:
+    """Resolve job's results directory under RESULT_STORAGE_ROOT, or the error response."""
+    # Prefer result_key if stored; else default layout
+    if getattr(job, "result_key", ""):
+        results_dir = Path(settings.RESULT_STORAGE_ROOT) / job.result_key
+    else:
+        results_dir = Path(settings.RESULT_STORAGE_ROOT) / f"jobs/{job.id}"
+
+    results_dir = results_dir.resolve()
+    root = Path(settings.RESULT_STORAGE_ROOT).resolve()
+
+    # Safety: ensure results_dir stays under RESULT_STORAGE_ROOT
+    if results_dir != root and root not in results_dir.parents:
+        return None, Response(
+            {"error": {"code": "general_failure", "message": "Invalid results path."}},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    if not results_dir.exists() or not results_dir.is_dir():
+        return None, Response(
+            {"error": {"code": "missing_results", "message": "Results directory does not exist."}},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    return results_dir, None
+
+
+class _JSONErrorsNegotiation(DefaultContentNegotiation):
+    """
+    For views that pick their own response type (archive ?format=/Accept, text/event-stream):
+    never 404/406 on the client's format or Accept, and render errors as JSON.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
 
 
 class JobResultZipView(APIView):
     """
-    Download job results as a ZIP archive.
+    Download job results as an archive.
 
-    GET /api/jobs/<uuid>/result.zip
+    GET /api/jobs/<uuid>/result.zip[?format=zip|zip-stored|tar.gz|tar.zst]
+    Without ?format=, an Accept of application/gzip or application/zstd selects the tar
+    variant. The worker pre-builds RESULT_ARCHIVE_FORMATS; others are built once on first
+    download and cached next to the results.
     """
 
+    content_negotiation_class = _JSONErrorsNegotiation
+
     def get(self, request, job_id):
         job = get_object_or_404(Job, id=job_id)
 
         if job.status != Job.Status.SUCCEEDED:
+            return _job_not_ready(job)
+
+        fmt = archives.negotiate_format(request.query_params.get("format"), request.headers.get("Accept", ""))
+        if fmt not in archives.FORMATS or (fmt == "tar.zst" and not archives.zstd_available()):
             return Response(
                 {
                     "error": {
-                        "code": "job_not_ready",
-                        "message": "Job is not finished yet.",
-                        "details": {"status": job.status},
+                        "code": "format_unavailable",
+                        "message": "Unsupported archive format.",
+                        "details": {
+                            "format": fmt,
+                            "available": [f for f in archives.FORMATS if f != "tar.zst" or archives.zstd_available()],
+                        },
                     }
                 },
-                status=status.HTTP_409_CONFLICT,
+                status=status.HTTP_406_NOT_ACCEPTABLE,
             )
 
-        # Resolve results directory (prefer result_key if stored; else default layout)
-        if getattr(job, "result_key", ""):
-            results_dir = Path(settings.RESULT_STORAGE_ROOT) / job.result_key
-        else:
-            results_dir = Path(settings.RESULT_STORAGE_ROOT) / f"jobs/{job.id}"
+        results_dir, error = _job_results_dir(job)
+        if error is not None:
+            return error
+
+        archive = archives.FORMATS[fmt]
+        filename = f"{job.id}{archive.suffix}"
+        record_event(job.id, JobEvent.Kind.DOWNLOADED, format=fmt)
+        try:
+            path = archives.ensure_archive(job, results_dir, fmt)
+        except OSError:
+            # Result storage not writable from here: build into a spooled temp file (spills to disk if large).
+            tmp = tempfile.SpooledTemporaryFile(max_size=50 * 1024 * 1024, mode="w+b")
+            archives.write_archive(fmt, results_dir, archives.result_paths(job, results_dir), tmp)
+            tmp.seek(0)
+            return FileResponse(tmp, as_attachment=True, filename=filename, content_type=archive.content_type)
+        return FileResponse(path.open("rb"), as_attachment=True, filename=filename, content_type=archive.content_type)
+
+
+class JobFilesView(APIView):
+    """
+    List a finished job's result files (the manifest the worker recorded).
+
+    GET /api/jobs/<uuid>/files
+    """
+
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, id=job_id)
+        if job.status != Job.Status.SUCCEEDED:
+            return _job_not_ready(job)
+        files = [
+            {**row, "url": f"/api/jobs/{job.id}/files/{quote(row['path'])}"}
+            for row in job.artifacts.order_by("path").values("path", "size", "sha256", "content_type")
+        ]
+        return Response({"id": str(job.id), "files": files}, status=status.HTTP_200_OK)
 
-        results_dir = results_dir.resolve()
-        root = Path(settings.RESULT_STORAGE_ROOT).resolve()
 
-        # Safety: ensure results_dir stays under RESULT_STORAGE_ROOT
-        if results_dir != root and root not in results_dir.parents:
+class JobFileView(APIView):
+    """
+    Download one result file, with ETag (the file's sha256) and single-range Range support.
+
+    GET /api/jobs/<uuid>/files/<path>
+    Only paths in the job's manifest are served; nothing is looked up on disk by name.
+    """
+
+    def get(self, request, job_id, file_path):
+        job = get_object_or_404(Job, id=job_id)
+        if job.status != Job.Status.SUCCEEDED:
+            return _job_not_ready(job)
+        artifact = JobArtifact.objects.filter(job=job, path=file_path).first()
+        if artifact is None:
             return Response(
-                {"error": {"code": "general_failure", "message": "Invalid results path."}},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                {"error": {"code": "file_not_found", "message": "No such file in the job's results."}},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
-        if not results_dir.exists() or not results_dir.is_dir():
+        etag = f'"{artifact.sha256}"'
+        if_none_match = request.headers.get("If-None-Match", "")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        results_dir, error = _job_results_dir(job)
+        if error is not None:
+            return error
+        try:
+            fh = open(results_dir / artifact.path, "rb")
+        except FileNotFoundError:
             return Response(
-                {"error": {"code": "missing_results", "message": "Results directory does not exist."}},
+                {"error": {"code": "missing_results", "message": "Result file does not exist."}},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # Build ZIP in a spooled temp file (spills to disk if large)
-        tmp = tempfile.SpooledTemporaryFile(max_size=50 * 1024 * 1024, mode="w+b")
-        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for p in results_dir.rglob("*"):
-                if p.is_file():
-                    arc = p.relative_to(results_dir).as_posix()
-                    zf.write(p, arcname=arc)
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": content_disposition_header(False, Path(artifact.path).name),
+        }
+        byte_range = None
+        if request.headers.get("If-Range", etag) == etag:
+            try:
+                byte_range = artifacts.parse_range(request.headers.get("Range", ""), artifact.size)
+            except artifacts.RangeNotSatisfiable:
+                fh.close()
+                return HttpResponse(
+                    status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={"Content-Range": f"bytes */{artifact.size}"},
+                )
+        if byte_range is None:
+            return FileResponse(fh, content_type=artifact.content_type, headers=headers)
 
-        tmp.seek(0)
-
-        filename = f"{job.id}.zip"
-        return FileResponse(tmp, as_attachment=True, filename=filename, content_type="application/zip")
+        start, end = byte_range
+        resp = StreamingHttpResponse(
+            artifacts.iter_file_range(fh, start, end - start + 1),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=artifact.content_type,
+            headers=headers,
+        )
+        resp["Content-Range"] = f"bytes {start}-{end}/{artifact.size}"
+        resp["Content-Length"] = str(end - start + 1)
+        return resp
 
 
 class JobLogsView(APIView):
     """
-    Get job stdout/stderr tail stored in the DB.
+    Get job stdout/stderr tail stored in the DB (published periodically while the job runs).
 
     GET /api/jobs/<uuid>/logs
     """
 
     def get(self, request, job_id):
-        job = get_object_or_404(Job, id=job_id)
+        job = get_object_or_404(Job.objects.select_related("diagnostics"), id=job_id)
+        abandoned.mark_seen(job)
+        stdout_tail, stderr_tail = _log_tails(job)
         return Response(
             {
                 "id": str(job.id),
                 "status": job.status,
-                "stdout_tail": job.stdout_tail or "",
-                "stderr_tail": job.stderr_tail or "",
+                "stdout_tail": stdout_tail,
+                "stderr_tail": stderr_tail,
             },
             status=status.HTTP_200_OK,
         )
+
+
+class JobEventsView(APIView):
+    """
+    Job lifecycle timeline, oldest first; still served after retention has deleted the job.
+
+    GET /api/jobs/<uuid>/events
+    """
+
+    def get(self, request, job_id):
+        events = list(JobEvent.objects.filter(job_id=job_id).order_by("at", "id"))
+        if not events and not Job.objects.filter(id=job_id).exists():
+            raise Http404
+        return Response({"id": str(job_id), "events": JobEventSerializer(events, many=True).data})
+
+
+def _log_tails(job: Job) -> tuple[str, str]:
+    """(stdout_tail, stderr_tail) from job's JobDiagnostics; empty until the worker publishes any."""
+    try:
+        diagnostics = job.diagnostics
+    except JobDiagnostics.DoesNotExist:
+        return "", ""
+    return diagnostics.stdout_tail, diagnostics.stderr_tail
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _log_events(job_id, *, poll_s: float, max_s: float):
+    """
+    Server-sent events for a job's log tails: "logs" whenever the published tails (or the
+    status) change, then "end" once the job is finished. Returns after max_s; EventSource
+    reconnects by itself.
+    """
+    deadline = time.monotonic() + max_s
+    last = None
+    last_write = time.monotonic()
+    yield f"retry: {int(poll_s * 1000)}\n\n"
+    while True:
+        job = Job.objects.select_related("diagnostics").filter(id=job_id).first()
+        if job is None:
+            yield _sse("end", {"status": None})
+            return
+        abandoned.mark_seen(job)
+        snapshot = (job.status, *_log_tails(job))
+        if snapshot != last:
+            last = snapshot
+            last_write = time.monotonic()
+            yield _sse("logs", {"status": job.status, "stdout_tail": snapshot[1], "stderr_tail": snapshot[2]})
+        elif time.monotonic() - last_write >= 15:
+            # Comment line: keeps proxies from closing an idle connection.
+            last_write = time.monotonic()
+            yield ": keep-alive\n\n"
+        if job.status not in IN_FLIGHT_STATUSES:
+            yield _sse("end", {"status": job.status})
+            return
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(poll_s)
+
+
+class _LogStreamSlots:
+    """
+    Open /logs/stream responses in this process, capped at LOG_STREAM_MAX_PER_PROCESS.
+
+    Each open stream holds a sync worker thread; the cap leaves the rest for other requests.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def acquire(self) -> bool:
+        limit = int(getattr(settings, "LOG_STREAM_MAX_PER_PROCESS", 2))
+        with self._lock:
+            if 0 <= limit <= self.open:
+                return False
+            self.open += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.open -= 1
+
+
+_log_stream_slots = _LogStreamSlots()
+
+
+class _SlotStream:
+    """Stream content that gives its slot back when the response is closed, started or not."""
+
+    def __init__(self, events) -> None:
+        self._events = events
+        self._released = False
+
+    def __iter__(self):
+        return self._events
+
+    def close(self) -> None:
+        self._events.close()
+        if not self._released:
+            self._released = True
+            _log_stream_slots.release()
+
+
+class JobLogsStreamView(APIView):
+    """
+    Follow job stdout/stderr tails live (text/event-stream).
+
+    GET /api/jobs/<uuid>/logs/stream
+    The worker publishes the tails every LOG_PUBLISH_INTERVAL_SECS while the container runs;
+    this polls them every LOG_STREAM_POLL_SECS for up to LOG_STREAM_MAX_SECS per connection.
+    Beyond LOG_STREAM_MAX_PER_PROCESS open streams it answers 503; clients poll /logs instead.
+    """
+
+    content_negotiation_class = _JSONErrorsNegotiation
+
+    def get(self, request, job_id):
+        get_object_or_404(Job, id=job_id)
+        if not _log_stream_slots.acquire():
+            poll_s = float(getattr(settings, "LOG_STREAM_POLL_SECS", 1.0))
+            return Response(
+                {
+                    "error": {
+                        "code": "log_stream_busy",
+                        "message": "Too many live log streams. Poll GET /api/jobs/<uuid>/logs instead.",
+                    }
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(max(1, int(poll_s)))},
+            )
+        events = _log_events(
+            job_id,
+            poll_s=float(getattr(settings, "LOG_STREAM_POLL_SECS", 1.0)),
+            max_s=float(getattr(settings, "LOG_STREAM_MAX_SECS", 60)),
+        )
+        resp = StreamingHttpResponse(_SlotStream(events), content_type="text/event-stream")
+        resp["Cache-Control"] = "no-cache"
+        # nginx: pass events through instead of buffering the response.
+        resp["X-Accel-Buffering"] = "no"
+        return resp
+
+
+def _upload_not_found() -> Response:
+    return Response(
+        {"error": {"code": "not_found", "message": "Upload session not found."}},
+        status=status.HTTP_404_NOT_FOUND,
+    )
+
+
+def _upload_expired() -> Response:
+    return Response(
+        {"error": {"code": "upload_expired", "message": "Upload session expired. Start a new upload."}},
+        status=status.HTTP_410_GONE,
+    )
+
+
+def _upload_job(session: UploadSession) -> Response:
+    # Commit already happened (e.g. the response was lost); return the same job.
+    job = get_object_or_404(Job, id=session.job_id)
+    return Response(JobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+def _upload_state(session: UploadSession) -> dict:
+    return {
+        "id": str(session.id),
+        "offset": session.received_bytes,
+        "size": session.total_size,
+        "chunk_size": uploads.chunk_size(),
+        "expires_at": session.expires_at,
+        "job_id": str(session.job_id) if session.job_id else None,
+    }
+
+
+class UploadsCreateView(APIView):
+    """
+    Open a resumable upload session.
+
+    POST /api/uploads  {"filename": "...zip", "size": <bytes>, "sha256": "<optional hex>"}
+    """
+
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        ser = UploadSessionCreateSerializer(data=request.data)
+        if not ser.is_valid():
+            return Response(
+                {"error": {"code": "invalid_request", "message": "Invalid input.", "details": ser.errors}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_upload = getattr(settings, "MAX_UPLOAD_BYTES", 50 * 1024 * 1024)
+        size = ser.validated_data["size"]
+        if max_upload >= 0 and size > max_upload:
+            return Response(
+                {"error": {"code": "payload_too_large", "message": "Upload too large."}},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        client = admission.client_hash(request)
+        if not admission.reserve_upload_bytes(client, size):
+            max_staged = getattr(settings, "UPLOAD_MAX_STAGED_BYTES_PER_CLIENT", 200 * 1024 * 1024)
+            return Response(
+                {
+                    "error": {
+                        "code": "upload_quota_exceeded",
+                        "message": "Too many bytes in your open uploads. Commit them or let them expire first.",
+                        "details": {"max_bytes_per_client": max_staged},
+                    }
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+        session = UploadSession.objects.create(
+            original_filename=ser.validated_data["filename"][:255],
+            total_size=size,
+            expected_sha256=(ser.validated_data.get("sha256") or "").lower(),
+            expires_at=uploads.session_expiry(),
+            client_hash=client,
+        )
+        return Response(_upload_state(session), status=status.HTTP_201_CREATED)
+
+
+class UploadDetailView(APIView):
+    """
+    Inspect or append to a resumable upload.
+
+    GET /api/uploads/<uuid>  -> current offset (resume point)
+    PUT /api/uploads/<uuid>  raw chunk body; headers Upload-Offset and optional Upload-Chunk-SHA256
+    """
+
+    def get(self, request, upload_id):
+        session = UploadSession.objects.filter(id=upload_id).first()
+        if session is None:
+            return _upload_not_found()
+        if session.expires_at <= timezone.now() and not session.job_id:
+            uploads.delete_session(session)
+            return _upload_expired()
+        return Response(_upload_state(session), status=status.HTTP_200_OK)
+
+    def put(self, request, upload_id):
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return Response(
+                {"error": {"code": "invalid_request", "message": "Upload-Offset header is required."}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            data = request.body
+        except RequestDataTooBig:
+            return Response(
+                {"error": {"code": "payload_too_large", "message": "Chunk too large."}},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if len(data) > uploads.max_chunk_size():
+            return Response(
+                {
+                    "error": {
+                        "code": "payload_too_large",
+                        "message": "Chunk too large.",
+                        "details": {"max_chunk_bytes": uploads.max_chunk_size()},
+                    }
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        expected_chunk_sha = (request.headers.get("Upload-Chunk-SHA256") or "").strip().lower()
+        if expected_chunk_sha and hashlib.sha256(data).hexdigest() != expected_chunk_sha:
+            # Nothing is written; the client retransmits this chunk only.
+            return Response(
+                {
+                    "error": {
+                        "code": "chunk_checksum_mismatch",
+                        "message": "Chunk checksum does not match.",
+                        "details": {"offset": offset},
+                    }
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().filter(id=upload_id).first()
+            if session is None:
+                return _upload_not_found()
+            if session.job_id or session.commit_started_at:
+                return Response(
+                    {"error": {"code": "upload_committed", "message": "Upload already committed."}},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if session.expires_at <= timezone.now():
+                uploads.delete_session(session)
+                return _upload_expired()
+            if offset != session.received_bytes:
+                return Response(
+                    {
+                        "error": {
+                            "code": "offset_mismatch",
+                            "message": "Chunk offset does not match the upload state.",
+                            "details": {"offset": session.received_bytes},
+                        }
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if offset + len(data) > session.total_size:
+                return Response(
+                    {"error": {"code": "chunk_out_of_range", "message": "Chunk exceeds declared upload size."}},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            uploads.write_chunk(session, offset, data)
+            session.received_bytes = offset + len(data)
+            session.expires_at = uploads.session_expiry()
+            session.save(update_fields=["received_bytes", "expires_at", "updated_at"])
+
+        resp = Response(_upload_state(session), status=status.HTTP_200_OK)
+        resp["Upload-Offset"] = str(session.received_bytes)
+        return resp
+
+
+class UploadCommitView(APIView):
+    """
+    Finalize a completed upload into a job (same validation as POST /api/jobs).
+
+    POST /api/uploads/<uuid>/commit  {"detached"?: bool}
+    """
+
+    def post(self, request, upload_id):
+        session = UploadSession.objects.filter(id=upload_id).first()
+        if session is None:
+            return _upload_not_found()
+        if session.job_id:
+            return _upload_job(session)
+        if session.expires_at <= timezone.now():
+            uploads.delete_session(session)
+            return _upload_expired()
+        if session.received_bytes != session.total_size:
+            return Response(
+                {
+                    "error": {
+                        "code": "upload_incomplete",
+                        "message": "Upload is not complete.",
+                        "details": {"offset": session.received_bytes, "size": session.total_size},
+                    }
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        # Claimed by one conditional update, so no row lock is held through admission and
+        # ingest; a retried commit racing this one gets 409, then the job once it is recorded.
+        now = timezone.now()
+        claimed = (
+            UploadSession.objects.filter(id=session.id, job__isnull=True)
+            .filter(Q(commit_started_at__isnull=True) | Q(commit_started_at__lt=uploads.commit_stale_before(now)))
+            .update(commit_started_at=now)
+        )
+        if not claimed:
+            session = UploadSession.objects.filter(id=upload_id).first()
+            if session is None:
+                return _upload_not_found()
+            if session.job_id:
+                return _upload_job(session)
+            return Response(
+                {"error": {"code": "upload_committing", "message": "Upload is being committed. Retry shortly."}},
+                status=status.HTTP_409_CONFLICT,
+            )
+        unclaim = UploadSession.objects.filter(id=session.id, job__isnull=True)
+
+        admitted, rejected = _admit(request, session.total_size)
+        if rejected is not None:
+            unclaim.update(commit_started_at=None)
+            return rejected
+
+        part_path = uploads.upload_part_path(session.id)
+        # expected_sha256 is checked on the serializer's storing pass, not by a separate read.
+        context = {"expected_sha256": session.expected_sha256}
+        try:
+            with open(part_path, "rb") as fh:
+                data = {"bundle": File(fh, name=session.original_filename), "detached": request.data.get("detached", False)}
+                job, resp = _create_job(data, admitted, context)
+        except BaseException:
+            unclaim.update(commit_started_at=None)
+            raise
+        if job is None:
+            uploads.delete_session(session)
+            return resp
+
+        if unclaim.update(job=job, updated_at=timezone.now()):
+            admission.release_upload_bytes(session.client_hash, session.total_size)
+        part_path.unlink(missing_ok=True)
+        return resp
+
+
+def _manifest_invalid(ser) -> Response:
+    return Response(
+        {"error": {"code": "invalid_request", "message": "Invalid manifest.", "details": ser.errors}},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _blobs_missing(missing: list[str]) -> Response:
+    return Response(
+        {
+            "error": {
+                "code": "blobs_missing",
+                "message": "Some bundle files have not been uploaded.",
+                "details": {"missing": missing},
+            }
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+class BundleMissingView(APIView):
+    """
+    Delta upload step 1: report which manifest blobs the server does not have.
+
+    POST /api/bundles/missing  {"files": [{"path", "sha256", "size"}, ...]}
+    """
+
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        ser = BundleManifestSerializer(data=request.data)
+        if not ser.is_valid():
+            return _manifest_invalid(ser)
+        missing = blobs.missing_blobs(f["sha256"] for f in ser.validated_data["files"])
+        return Response({"missing": missing}, status=status.HTTP_200_OK)
+
+
+class BlobsUploadView(APIView):
+    """
+    Delta upload step 2: store blobs. Multipart body; each file part is named by its sha256.
+
+    POST /api/blobs
+    """
+
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        max_file = getattr(settings, "MAX_FILE_BYTES", 50 * 1024 * 1024)
+        parts = [(digest, files[0]) for digest, files in request.FILES.lists()]
+        # Only blobs the store lacks take space; they are charged to the client up front.
+        new_bytes = sum(
+            f.size for digest, f in parts if not (blobs.is_valid_digest(digest) and blobs.blob_path(digest).exists())
+        )
+        client = admission.client_hash(request)
+        if not admission.reserve_blob_bytes(client, new_bytes):
+            return Response(
+                {
+                    "error": {
+                        "code": "blob_quota_exceeded",
+                        "message": "Too many uploaded blobs are not used by a bundle yet. Create bundles or retry later.",
+                        "details": {"max_bytes_per_client": getattr(settings, "BLOB_MAX_BYTES_PER_CLIENT", 500 * 1024 * 1024)},
+                    }
+                },
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+        stored: list[str] = []
+        existing: list[str] = []
+        stored_bytes = 0
+        try:
+            for digest, f in parts:
+                if blobs.put_blob(digest, f, max_bytes=max_file):
+                    stored.append(digest)
+                    stored_bytes += f.size
+                else:
+                    existing.append(digest)
+        except blobs.BlobError as exc:
+            status_code = status.HTTP_400_BAD_REQUEST
+            if exc.code == "blob_too_large":
+                status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            return Response(
+                {"error": {"code": exc.code, "message": exc.message, "details": {"sha256": digest}}},
+                status=status_code,
+            )
+        finally:
+            admission.release_blob_bytes(client, new_bytes - stored_bytes)
+        return Response({"stored": stored, "existing": existing}, status=status.HTTP_200_OK)
+
+
+class BundlesCreateView(APIView):
+    """
+    Delta upload step 3: assemble the bundle from stored blobs and create a job.
+
+    POST /api/bundles  {"filename": "...zip", "files": [{"path", "sha256", "size"}, ...], "detached"?: bool}
+    """
+
+    parser_classes = [JSONParser]
+
+    def post(self, request):
+        ser = BundleManifestSerializer(data=request.data)
+        if not ser.is_valid():
+            return _manifest_invalid(ser)
+        files = ser.validated_data["files"]
+
+        missing = blobs.missing_blobs(f["sha256"] for f in files)
+        if missing:
+            return _blobs_missing(missing)
+        for f in files:
+            # Limits were checked against declared sizes; hold the client to them.
+            try:
+                size = blobs.blob_path(f["sha256"]).stat().st_size
+            except OSError:
+                # Removed by the worker's blob sweep since the check above.
+                return _blobs_missing([f["sha256"]])
+            if size != f["size"]:
+                return Response(
+                    {
+                        "error": {
+                            "code": "size_mismatch",
+                            "message": f"Declared size does not match stored content for {f['path']}.",
+                        }
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        admitted, rejected = _admit(request, sum(f["size"] for f in files))
+        if rejected is not None:
+            return rejected
+        root = uploads.upload_root()
+        root.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=root, suffix=".zip") as tmp:
+            try:
+                blobs.assemble_bundle([(f["path"], f["sha256"]) for f in files], tmp)
+                tmp.flush()
+            except FileNotFoundError:
+                admission.release(admitted.cost, admitted.client_hash)
+                return _blobs_missing(blobs.missing_blobs(f["sha256"] for f in files))
+            except BaseException:
+                admission.release(admitted.cost, admitted.client_hash)
+                raise
+            tmp.seek(0)
+            data = {"bundle": File(tmp, name=ser.validated_data["filename"]), "detached": ser.validated_data["detached"]}
+            job, resp = _create_job(data, admitted)
+        if job is not None:
+            # These blobs are in use now; they no longer count against the client's blob quota.
+            used = {f["sha256"]: f["size"] for f in files}
+            admission.release_blob_bytes(admitted.client_hash, sum(used.values()))
+        return resp
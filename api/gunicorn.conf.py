@@ -0,0 +1,37 @@
+"""
+Gunicorn server hooks (loaded from the working directory, api/).
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker writes its prometheus_client metrics to
+mmap files in that directory and /metrics merges the files of all workers, so a scrape
+sees the whole server instead of whichever worker answered it.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def _multiproc_dir() -> Path | None:
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    return Path(path) if path else None
+
+
+def on_starting(server) -> None:
+    path = _multiproc_dir()
+    if path is None:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    # Files left by a previous server would be summed into this one's counters.
+    for stale in path.glob("*.db"):
+        stale.unlink(missing_ok=True)
+
+
+def child_exit(server, worker) -> None:
+    if _multiproc_dir() is None:
+        return
+    # Imported here: prometheus_client picks its value storage from the environment at import.
+    from prometheus_client import multiprocess
+
+    # Drops the worker's live gauges; its counters and histograms stay in the totals.
+    multiprocess.mark_process_dead(worker.pid)
@@ -151,8 +151,9 @@ TEMPLATES = [
 
 DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite").strip().lower()
 if IS_PYTEST:
-    # Keep tests self-contained and avoid relying on external DB hosts from .env.
-    DB_ENGINE = "sqlite"
+    # Keep tests self-contained and avoid relying on external DB hosts from .env; set
+    # TEST_DB_ENGINE=postgres (with the DB_* settings) to run them against Postgres.
+    DB_ENGINE = os.environ.get("TEST_DB_ENGINE", "sqlite").strip().lower()
 
 if DB_ENGINE == "postgres":
     DATABASES = {
@@ -205,6 +206,32 @@ MAX_ZIP_FILES = env_int("MAX_ZIP_FILES", 2000)
 MAX_ZIP_PATH_DEPTH = env_int("MAX_ZIP_PATH_DEPTH", 20)
 MAX_UNPACKED_BYTES = env_int("MAX_UNPACKED_BYTES", 300 * 1024 * 1024)
 MAX_FILE_BYTES = env_int("MAX_FILE_BYTES", 50 * 1024 * 1024)
+# Worker-side extraction: one-pass directory creation, single-call small writes, large
+# entries on ZIP_EXTRACT_WORKERS threads (same path checks as the sequential mode).
+ZIP_FAST_EXTRACT = env_bool("ZIP_FAST_EXTRACT", True)
+ZIP_EXTRACT_WORKERS = env_int("ZIP_EXTRACT_WORKERS", 4)
+
+# Resumable uploads (/api/uploads)
+UPLOAD_SESSION_TTL_SECS = env_int("UPLOAD_SESSION_TTL_SECS", 3600)
+UPLOAD_CHUNK_BYTES = env_int("UPLOAD_CHUNK_BYTES", 5 * 1024 * 1024)
+UPLOAD_CHUNK_MAX_BYTES = env_int("UPLOAD_CHUNK_MAX_BYTES", 8 * 1024 * 1024)
+# Declared size of a client's open (uncommitted) sessions, taken when a session is opened (-1: no cap).
+UPLOAD_MAX_STAGED_BYTES_PER_CLIENT = env_int("UPLOAD_MAX_STAGED_BYTES_PER_CLIENT", 200 * 1024 * 1024)
+
+# Delta uploads: content-addressed bundle entries under JOB_STORAGE_ROOT/blobs
+BLOB_RETENTION_DAYS = env_int("BLOB_RETENTION_DAYS", 7)
+# Blob bytes a client may store without assembling them into bundles, per retention window (-1: no cap).
+BLOB_MAX_BYTES_PER_CLIENT = env_int("BLOB_MAX_BYTES_PER_CLIENT", 500 * 1024 * 1024)
+
+# Result downloads: formats the worker pre-builds (zip, zip-stored, tar.gz, tar.zst; tar.zst
+# needs the zstd extra) and compression levels. Lower levels trade bytes for CPU.
+RESULT_ARCHIVE_FORMATS = env_list("RESULT_ARCHIVE_FORMATS", ["zip"])
+RESULT_ZIP_LEVEL = env_int("RESULT_ZIP_LEVEL", 6)
+RESULT_GZIP_LEVEL = env_int("RESULT_GZIP_LEVEL", 6)
+RESULT_ZSTD_LEVEL = env_int("RESULT_ZSTD_LEVEL", 3)
+# Copy container stdout/stderr into the results (logs/) so they are downloadable; off by
+# default, the tails are in the job record and the logs endpoint.
+RESULT_INCLUDE_LOGS = env_bool("RESULT_INCLUDE_LOGS", False)
 
 # Django upload guards
 DATA_UPLOAD_MAX_MEMORY_SIZE = MAX_UPLOAD_BYTES
@@ -226,12 +253,58 @@ STORAGES = {
 
 K8S_NAMESPACE = os.environ.get("K8S_NAMESPACE", "k2p")
 MAX_QUEUED_JOBS = int(os.environ.get("MAX_QUEUED_JOBS", "50"))
+# Worker resyncs the admission counter with the real QUEUED+RUNNING count this often.
+ADMISSION_RECONCILE_INTERVAL_SECS = env_int("ADMISSION_RECONCILE_INTERVAL_SECS", 60)
+# static: MAX_QUEUED_JOBS caps jobs in flight. adaptive: reject only when the predicted
+# queue wait (queued cost / worker throughput EWMA) exceeds ADMISSION_WAIT_SLO_SECS.
+ADMISSION_POLICY = env_str("ADMISSION_POLICY", "static")
+ADMISSION_WAIT_SLO_SECS = env_int("ADMISSION_WAIT_SLO_SECS", 300)
+ADMISSION_MAX_INFLIGHT = env_int("ADMISSION_MAX_INFLIGHT", 500)
+ADMISSION_COST_UNIT_BYTES = env_int("ADMISSION_COST_UNIT_BYTES", 1024 * 1024)
+ADMISSION_EWMA_ALPHA = float(os.environ.get("ADMISSION_EWMA_ALPHA", "0.2"))
+WORKER_HEARTBEAT_STALE_SECS = env_int("WORKER_HEARTBEAT_STALE_SECS", 30)
+# Fair share: per-client in-flight cap at admission (-1 disables) and worker claim order
+# (fair: round-robin across clients with waiting jobs; fifo: oldest first). Clients are
+# identified by X-Real-IP, or by this header if set (only behind a gateway that validates it).
+MAX_INFLIGHT_PER_CLIENT = env_int("MAX_INFLIGHT_PER_CLIENT", 10)
+JOB_SCHEDULER = env_str("JOB_SCHEDULER", "fair")
+FAIR_SHARE_API_KEY_HEADER = env_str("FAIR_SHARE_API_KEY_HEADER", "")
+# Abandoned jobs (QUEUED, not detached, not polled by their client): off | deprioritize
+# (claimed after watched jobs once unseen for ABANDONED_AFTER_SECS) | cancel (also cancelled
+# once unseen for ABANDONED_CANCEL_AFTER_SECS).
+ABANDONED_JOB_POLICY = env_str("ABANDONED_JOB_POLICY", "off")
+ABANDONED_AFTER_SECS = env_int("ABANDONED_AFTER_SECS", 300)
+ABANDONED_CANCEL_AFTER_SECS = env_int("ABANDONED_CANCEL_AFTER_SECS", 1800)
+# Postgres only: "day" or "week" range-partitions job history by creation time once converted
+# (manage.py k2p_partitions convert); retention then drops whole partitions, keeping every status
+# for max(RETENTION_FAILED_DAYS, RETENTION_SUCCEEDED_DAYS).
+JOB_PARTITION_PERIOD = env_str("JOB_PARTITION_PERIOD", "")
+JOB_PARTITION_PREMAKE = env_int("JOB_PARTITION_PREMAKE", 7)
+# JobEvent timelines are kept this long, also after their job has been deleted (-1 keeps them).
+JOB_EVENT_RETENTION_DAYS = env_int("JOB_EVENT_RETENTION_DAYS", 30)
+# Queue ETA: the worker refits per-size run times from recent successes this often.
+ESTIMATE_REFRESH_INTERVAL_SECS = env_int("ESTIMATE_REFRESH_INTERVAL_SECS", 300)
+ESTIMATE_WINDOW_DAYS = env_int("ESTIMATE_WINDOW_DAYS", 7)
+ESTIMATE_DEFAULT_RUN_SECS = env_int("ESTIMATE_DEFAULT_RUN_SECS", 60)
+# /metrics job gauges come from a snapshot row shared by all API processes, recomputed by one
+# of them at most this often (seconds); 0 queries the Job table on every scrape.
+METRICS_DB_CACHE_SECS = float(os.environ.get("METRICS_DB_CACHE_SECS", "15"))
 
 # Runner configuration (local Docker runner)
 JOB_RUNNER_BACKEND = env_str("JOB_RUNNER_BACKEND", "docker")
 K2P_IMAGE = env_str("K2P_IMAGE", "ghcr.io/vitalii-kaplan/knime2py:main")
 JOB_TIMEOUT_SECS = env_int("JOB_TIMEOUT_SECS", 120)
 K2P_TIMEOUT_SECS = env_int("K2P_TIMEOUT_SECS", JOB_TIMEOUT_SECS)
+# How often a running job checks for a cancel request (seconds).
+JOB_CANCEL_POLL_SECS = float(os.environ.get("JOB_CANCEL_POLL_SECS", "0.5"))
+# Container output tail kept in memory per stream, and how often it is published while running.
+LOG_TAIL_BYTES = env_int("LOG_TAIL_BYTES", 4000)
+LOG_PUBLISH_INTERVAL_SECS = float(os.environ.get("LOG_PUBLISH_INTERVAL_SECS", "2"))
+# GET /api/jobs/<uuid>/logs/stream: DB poll interval and how long one connection is held.
+LOG_STREAM_POLL_SECS = float(os.environ.get("LOG_STREAM_POLL_SECS", "1"))
+LOG_STREAM_MAX_SECS = env_int("LOG_STREAM_MAX_SECS", 60)
+# Open streams per API process, each holding a gunicorn thread; beyond it the endpoint answers 503 (-1: no cap).
+LOG_STREAM_MAX_PER_PROCESS = env_int("LOG_STREAM_MAX_PER_PROCESS", 2)
 K2P_CPU = env_str("K2P_CPU", "1.0")
 K2P_MEMORY = env_str("K2P_MEMORY", "1g")
 K2P_PIDS_LIMIT = env_str("K2P_PIDS_LIMIT", "256")
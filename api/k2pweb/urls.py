@@ -7,10 +7,12 @@ from rest_framework.permissions import AllowAny
 
 from apps.core.health import healthz, readyz
 from apps.core.admin_views import sql_console
+from apps.core.metrics import metrics
 from django.conf import settings
 
 urlpatterns = [
-    path("", include("django_prometheus.urls")),
+    # Replaces django_prometheus.urls: its view drops our collectors in multiprocess mode.
+    path("metrics", metrics, name="prometheus-django-metrics"),
     # UI
     path("", TemplateView.as_view(template_name="ui/index.html"), name="ui-index"),
 
@@ -10,6 +10,10 @@
     normalizeRel,
     isUnsafeRel,
     extractSettingsPathsFromWorkflowXml,
+    sha256Hex,
+    contentFingerprint,
+    fmtDuration,
+    nextPollDelayMs,
   } = window.manifestUtils || {};
   const { renderApp } = window.appView || {};
 
@@ -24,6 +28,135 @@
   const MAX_TOTAL_BYTES = 100 * 1024 * 1024; // 100 MiB
   const WARN_FILE_COUNT = 2000;
   const HARD_STOP_FILE_COUNT = 10000;
+  const MAX_CHUNK_RETRIES = 5;
+  const BLOB_BATCH_MAX_FILES = 100; // server accepts at most 100 file parts per request
+  const BLOB_BATCH_MAX_BYTES = 4 * 1024 * 1024;
+  // Fixed entry date so the same files always zip to the same bytes (and the same sha256).
+  const ZIP_FIXED_DATE = new Date(1980, 0, 1);
+
+  function sleep(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  async function apiJson(url, options) {
+    const resp = await fetch(url, options);
+    const data = await resp.json().catch(() => null);
+    return { resp, data };
+  }
+
+  function apiError(resp, data, fallback) {
+    const message = data?.error?.message || `${fallback} (${resp.status})`;
+    const retryAfter = resp.headers?.get("Retry-After");
+    return new Error(retryAfter ? `${message} Retry in ~${retryAfter}s.` : message);
+  }
+
+  // Resumable upload: a dropped connection costs one chunk retransmit, not the whole bundle.
+  async function uploadResumable(blob, filename) {
+    const opened = await apiJson("/api/uploads", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ filename, size: blob.size }),
+    });
+    if (!opened.resp.ok) throw apiError(opened.resp, opened.data, "Upload failed");
+    const session = opened.data;
+
+    let offset = session.offset || 0;
+    let failures = 0;
+    while (offset < blob.size) {
+      const chunk = blob.slice(offset, offset + session.chunk_size);
+      const body = await chunk.arrayBuffer();
+      let put;
+      try {
+        put = await apiJson(`/api/uploads/${session.id}`, {
+          method: "PUT",
+          headers: {
+            "Content-Type": "application/offset+octet-stream",
+            "Upload-Offset": String(offset),
+            "Upload-Chunk-SHA256": await sha256Hex(body),
+          },
+          body,
+        });
+      } catch (_) {
+        put = null; // network error: retry this chunk
+      }
+
+      if (put?.resp.ok) {
+        offset = put.data.offset;
+        failures = 0;
+        continue;
+      }
+      if (put?.resp.status === 409 && put.data?.error?.code === "offset_mismatch") {
+        offset = put.data.error.details.offset;
+        continue;
+      }
+      if (put && put.resp.status < 500 && put.data?.error?.code !== "chunk_checksum_mismatch") {
+        throw apiError(put.resp, put.data, "Upload failed");
+      }
+      failures += 1;
+      if (failures > MAX_CHUNK_RETRIES) throw new Error("Upload failed after repeated network errors.");
+      await sleep(500 * 2 ** failures);
+    }
+
+    const committed = await apiJson(`/api/uploads/${session.id}/commit`, { method: "POST" });
+    if (!committed.resp.ok) throw apiError(committed.resp, committed.data, "Upload failed");
+    return committed.data;
+  }
+
+  // Ask the server whether it already has this bundle; returns the job to use, or null to upload.
+  async function findJobByHash(query) {
+    const found = await apiJson("/api/jobs/by-hash", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(query),
+    });
+    if (found.resp.ok) return found.data.job;
+    if (found.resp.status === 404 || found.resp.status === 405) return null;
+    throw apiError(found.resp, found.data, "Upload failed");
+  }
+
+  // Delta upload: send the per-file manifest, upload only blobs the server lacks, then let
+  // the server assemble the bundle. Returns null if the server has no delta endpoints.
+  async function uploadDelta(entries, filename) {
+    const files = entries.map(({ path, sha256, size }) => ({ path, sha256, size }));
+    const check = await apiJson("/api/bundles/missing", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ files }),
+    });
+    if (check.resp.status === 404 || check.resp.status === 405) return null;
+    if (!check.resp.ok) throw apiError(check.resp, check.data, "Upload failed");
+
+    const byHash = new Map(entries.map((e) => [e.sha256, e.file]));
+    let batch = new FormData();
+    let batchFiles = 0;
+    let batchBytes = 0;
+    async function flush() {
+      if (!batchFiles) return;
+      const put = await apiJson("/api/blobs", { method: "POST", body: batch });
+      if (!put.resp.ok) throw apiError(put.resp, put.data, "Upload failed");
+      batch = new FormData();
+      batchFiles = 0;
+      batchBytes = 0;
+    }
+    for (const sha of check.data.missing) {
+      const f = byHash.get(sha);
+      if (batchFiles >= BLOB_BATCH_MAX_FILES || (batchFiles && batchBytes + f.size > BLOB_BATCH_MAX_BYTES)) {
+        await flush();
+      }
+      batch.append(sha, f, sha);
+      batchFiles += 1;
+      batchBytes += f.size;
+    }
+    await flush();
+
+    const created = await apiJson("/api/bundles", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ filename, files }),
+    });
+    if (!created.resp.ok) throw apiError(created.resp, created.data, "Upload failed");
+    return created.data;
+  }
 
   function downloadText(filename, text) {
     const blob = new Blob([text], { type: "application/json;charset=utf-8" });
@@ -49,6 +182,8 @@
 
     const [job, setJob] = useState(null);
     const [pollStatus, setPollStatus] = useState(null);
+    const [resultFiles, setResultFiles] = useState([]);
+    const [liveLogs, setLiveLogs] = useState(null);
 
     const fileMap = useMemo(() => {
       const m = new Map();
@@ -79,6 +214,7 @@
       setManifest(null);
       setJob(null);
       setPollStatus(null);
+      setResultFiles([]);
     }
 
     async function onFolderSelected(ev) {
@@ -215,6 +351,18 @@
       setStage("manifest");
     }
 
+    async function hashManifestFiles() {
+      const entries = [];
+      for (const it of manifest.items) {
+        if (!it.present) continue;
+        const f = fileMap.get(it.path);
+        if (!f) continue;
+        const sha256 = await sha256Hex(await f.arrayBuffer());
+        entries.push({ path: it.path, sha256, size: f.size, file: f });
+      }
+      return entries;
+    }
+
     async function buildZipBlob() {
       if (!manifest) throw new Error("No manifest");
       const zip = new JSZip();
@@ -225,7 +373,7 @@
         if (!f) continue;
 
         // Zip path must match contract: workflow.knime at archive root, plus relative settings paths
-        zip.file(it.path, f);
+        zip.file(it.path, f, { date: ZIP_FIXED_DATE });
       }
 
       const blob = await zip.generateAsync({
@@ -247,22 +395,20 @@
       setStage("uploading");
 
       try {
-        const blob = await buildZipBlob();
-
         // Use selected folder name as the uploaded zip filename stem (so outputs become <stem>__gXX.*)
         // If your folder is "discounts", the filename will be "discounts.zip".
         const safeStem = (manifest.rootPrefix || "workflow").replace(/[^\w.-]+/g, "_");
         const filename = `${safeStem}.zip`;
 
-        const fd = new FormData();
-        fd.append("bundle", blob, filename);
-
-        const resp = await fetch("/api/jobs", { method: "POST", body: fd });
-        const data = await resp.json().catch(() => null);
-
-        if (!resp.ok) {
-          const msg = data?.error?.message || `Upload failed (${resp.status})`;
-          throw new Error(msg);
+        // The content fingerprint identifies the files regardless of zip packaging,
+        // so a known workflow needs neither zipping nor uploading.
+        const entries = await hashManifestFiles();
+        let data = await findJobByHash({ fingerprint: await contentFingerprint(entries) });
+        if (!data) {
+          data = await uploadDelta(entries, filename);
+        }
+        if (!data) {
+          data = await uploadResumable(await buildZipBlob(), filename);
         }
 
         setJob(data);
@@ -273,6 +419,17 @@
       }
     }
 
+    async function cancelJob() {
+      if (!job?.id) return;
+      try {
+        const cancelled = await apiJson(`/api/jobs/${job.id}/cancel`, { method: "POST" });
+        if (!cancelled.resp.ok) throw apiError(cancelled.resp, cancelled.data, "Cancel failed");
+        setPollStatus(cancelled.data);
+      } catch (e) {
+        setErrors([String(e?.message || e)]);
+      }
+    }
+
     // Poll job status when submitted
     useEffect(() => {
       if (!job?.id) return;
@@ -281,17 +438,31 @@
       const id = job.id;
 
       async function tick() {
+        let delay = 1000;
         try {
           const resp = await fetch(`/api/jobs/${id}`);
           const data = await resp.json();
           if (!stopped) setPollStatus(data);
 
           const st = data?.status;
-          if (st === "SUCCEEDED" || st === "FAILED") return;
+          if (st === "SUCCEEDED") {
+            // Per-file links, so one notebook can be opened without the whole archive.
+            const listed = await apiJson(`/api/jobs/${id}/files`);
+            if (!stopped && listed.resp.ok) setResultFiles(listed.data.files || []);
+            return;
+          }
+          if (st === "FAILED") {
+            // The error message is a summary; the container output tails live under /logs.
+            const logs = await apiJson(`/api/jobs/${id}/logs`);
+            if (!stopped && logs.resp.ok) setLiveLogs(logs.data);
+            return;
+          }
+          if (st === "CANCELLED") return;
+          delay = nextPollDelayMs(data);
         } catch (_) {
           // ignore transient errors
         }
-        if (!stopped) setTimeout(tick, 800);
+        if (!stopped) setTimeout(tick, delay);
       }
 
       tick();
@@ -300,6 +471,17 @@
       };
     }, [job?.id]);
 
+    // Follow container output while the job runs; EventSource reconnects after the server's cap.
+    const running = pollStatus?.status === "RUNNING";
+    useEffect(() => {
+      if (!job?.id || !running || typeof EventSource === "undefined") return;
+
+      const source = new EventSource(`/api/jobs/${job.id}/logs/stream`);
+      source.addEventListener("logs", (ev) => setLiveLogs(JSON.parse(ev.data)));
+      source.addEventListener("end", () => source.close());
+      return () => source.close();
+    }, [job?.id, running]);
+
     return renderApp(
       html,
       {
@@ -310,12 +492,16 @@
         stage,
         job,
         pollStatus,
+        resultFiles,
+        liveLogs,
         fmtBytes,
+        fmtDuration,
       },
       {
         onFolderSelected,
         resetAll,
         uploadZip,
+        cancelJob,
         downloadText,
       }
     );
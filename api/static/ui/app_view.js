@@ -10,9 +10,12 @@ const appView = {
       stage,
       job,
       pollStatus,
+      resultFiles,
+      liveLogs,
       fmtBytes,
+      fmtDuration,
     } = state;
-    const { onFolderSelected, resetAll, uploadZip, downloadText } = handlers;
+    const { onFolderSelected, resetAll, uploadZip, cancelJob, downloadText } = handlers;
 
     const canUpload = stage === "manifest" && manifest && errors.length === 0;
 
@@ -130,14 +133,46 @@ const appView = {
           ${pollStatus
             ? html`
                 <div>Status: <b>${pollStatus.status}</b></div>
+                ${pollStatus.queue_position
+                  ? html`<div class="app-meta">
+                      Position in queue: <b>${pollStatus.queue_position}</b>
+                      ${pollStatus.estimated_start_at
+                        ? html` · starts in ~${fmtDuration((Date.parse(pollStatus.estimated_start_at) - Date.now()) / 1000)}`
+                        : null}
+                    </div>`
+                  : null}
+                ${pollStatus.status === "RUNNING" && pollStatus.estimated_finish_at
+                  ? html`<div class="app-meta">
+                      Estimated to finish in ~${fmtDuration((Date.parse(pollStatus.estimated_finish_at) - Date.now()) / 1000)}
+                    </div>`
+                  : null}
+                ${pollStatus.status === "QUEUED" || pollStatus.status === "RUNNING"
+                  ? html`<div class="app-meta">
+                      <button class="btn" disabled=${Boolean(pollStatus.cancel_requested_at)} onClick=${cancelJob}>
+                        ${pollStatus.cancel_requested_at ? "Cancelling..." : "Cancel job"}
+                      </button>
+                    </div>`
+                  : null}
+                ${(pollStatus.status === "RUNNING" || pollStatus.status === "FAILED") && (liveLogs?.stdout_tail || liveLogs?.stderr_tail)
+                  ? html`<pre class="app-meta">${[liveLogs.stdout_tail, liveLogs.stderr_tail].filter(Boolean).join("\n")}</pre>`
+                  : null}
                 ${pollStatus.status === "SUCCEEDED"
                   ? html`
                       <div class="app-meta">
                         <a class="btn" href=${`/api/jobs/${pollStatus.id}/result.zip`}>Download result.zip</a>
                       </div>
+                      ${resultFiles?.length
+                        ? html`<ul class="app-meta">
+                            ${resultFiles.map(
+                              (f) => html`<li key=${f.path}>
+                                <a href=${f.url} target="_blank" rel="noopener">${f.path}</a> (${fmtBytes(f.size)})
+                              </li>`
+                            )}
+                          </ul>`
+                        : null}
                     `
                   : null}
-                ${pollStatus.status === "FAILED"
+                ${pollStatus.status === "FAILED" || pollStatus.status === "CANCELLED"
                   ? html`
                       <div class="app-meta">
                         <b>Error:</b> ${pollStatus.error_code || ""} ${pollStatus.error_message || ""}
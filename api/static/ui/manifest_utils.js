@@ -75,6 +75,55 @@ function extractSettingsPathsFromWorkflowXml(xmlText) {
   return Array.from(out).sort();
 }
 
+function toHex(buffer) {
+  return Array.from(new Uint8Array(buffer))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+async function sha256Hex(data) {
+  // data: ArrayBuffer / TypedArray (use blob.arrayBuffer() for Blobs)
+  const digest = await globalThis.crypto.subtle.digest("SHA-256", data);
+  return toHex(digest);
+}
+
+function compareCodePoints(a, b) {
+  // Match the server's sort (Unicode code point order), not JS's UTF-16 order.
+  const ca = Array.from(a);
+  const cb = Array.from(b);
+  for (let i = 0; i < Math.min(ca.length, cb.length); i += 1) {
+    const d = ca[i].codePointAt(0) - cb[i].codePointAt(0);
+    if (d !== 0) return d;
+  }
+  return ca.length - cb.length;
+}
+
+async function contentFingerprint(entries) {
+  // entries: [{ path, sha256 }]; must match apps/jobs/fingerprint.py content_fingerprint.
+  const sorted = [...entries].sort((x, y) => compareCodePoints(x.path, y.path));
+  const text = sorted.map((e) => `${e.path}\0${e.sha256}\n`).join("");
+  return sha256Hex(new TextEncoder().encode(text));
+}
+
+function fmtDuration(seconds) {
+  if (seconds == null || !Number.isFinite(seconds)) return "";
+  const s = Math.max(0, Math.round(seconds));
+  if (s < 60) return `${s}s`;
+  const m = Math.round(s / 60);
+  if (m < 60) return `${m} min`;
+  return `${Math.floor(m / 60)} h ${m % 60} min`;
+}
+
+function nextPollDelayMs(job, nowMs = Date.now()) {
+  // Poll about 4 times over the predicted remaining wait, between 1 s and 30 s,
+  // instead of hammering the API while a job sits deep in the queue.
+  const target =
+    job?.status === "QUEUED" ? job.estimated_start_at : job?.status === "RUNNING" ? job.estimated_finish_at : null;
+  const remainingMs = target ? Date.parse(target) - nowMs : NaN;
+  if (!Number.isFinite(remainingMs)) return 1000;
+  return Math.min(30000, Math.max(1000, Math.round(remainingMs / 4)));
+}
+
 const manifestUtils = {
   fmtBytes,
   firstPathSegment,
@@ -82,6 +131,11 @@ const manifestUtils = {
   normalizeRel,
   isUnsafeRel,
   extractSettingsPathsFromWorkflowXml,
+  toHex,
+  sha256Hex,
+  contentFingerprint,
+  fmtDuration,
+  nextPollDelayMs,
 };
 
 if (typeof window !== "undefined") {
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import io
+import zipfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+WORKFLOW = {"workflow.knime": "<root></root>"}
+
+
+def make_zip(files: dict[str, str | bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buf.getvalue()
+
+
+def submit_bundle(
+    client, files: dict[str, str | bytes] | None = None, *, filename: str = "discounts.zip", data: dict | None = None, **kwargs
+):
+    """POST /api/jobs with a zip of files (a minimal workflow by default) plus data form fields; kwargs go to client.post."""
+    upload = SimpleUploadedFile(filename, make_zip(files or WORKFLOW), content_type="application/zip")
+    return client.post("/api/jobs", data={"bundle": upload, **(data or {})}, format="multipart", **kwargs)
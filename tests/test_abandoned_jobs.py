@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import datetime
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.abandoned import cancel_abandoned_jobs
+from apps.jobs.admission import JOBS_COUNTER
+from apps.jobs.models import AdmissionCounter, Job
+from apps.jobs.scheduling import claim_next_job
+from tests.helpers import submit_bundle
+
+
+def _ago(seconds: int) -> datetime.datetime:
+    return timezone.now() - datetime.timedelta(seconds=seconds)
+
+
+class AbandonedJobTests(TestCase):
+    def test_status_poll_marks_job_seen(self) -> None:
+        job = Job.objects.create(status=Job.Status.QUEUED)
+        Job.objects.filter(id=job.id).update(last_seen_at=_ago(600))
+
+        resp = APIClient().get(f"/api/jobs/{job.id}")
+
+        self.assertEqual(resp.status_code, 200)
+        job.refresh_from_db()
+        self.assertGreater(job.last_seen_at, _ago(5))
+
+    def test_detached_flag_on_upload(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir, override_settings(JOB_STORAGE_ROOT=tmpdir):
+            resp = submit_bundle(APIClient(), data={"detached": "true"})
+
+        self.assertEqual(resp.status_code, 201)
+        self.assertTrue(resp.data["detached"])
+        self.assertTrue(Job.objects.get(id=resp.data["id"]).detached)
+
+    @override_settings(ABANDONED_JOB_POLICY="deprioritize", ABANDONED_AFTER_SECS=300, JOB_SCHEDULER="fifo")
+    def test_unwatched_jobs_run_after_watched_ones(self) -> None:
+        unwatched = Job.objects.create(status=Job.Status.QUEUED)
+        detached = Job.objects.create(status=Job.Status.QUEUED, detached=True)
+        watched = Job.objects.create(status=Job.Status.QUEUED)
+        Job.objects.filter(id__in=[unwatched.id, detached.id]).update(last_seen_at=_ago(600))
+
+        order = [claim_next_job().id for _ in range(3)]
+
+        self.assertEqual(order, [detached.id, watched.id, unwatched.id])
+
+    @override_settings(ABANDONED_JOB_POLICY="cancel", ABANDONED_CANCEL_AFTER_SECS=1800, ESTIMATE_DEFAULT_RUN_SECS=60)
+    def test_cancel_policy_cancels_long_unwatched_jobs(self) -> None:
+        abandoned = Job.objects.create(status=Job.Status.QUEUED)
+        detached = Job.objects.create(status=Job.Status.QUEUED, detached=True)
+        recent = Job.objects.create(status=Job.Status.QUEUED)
+        Job.objects.filter(id__in=[abandoned.id, detached.id]).update(last_seen_at=_ago(3600))
+        Job.objects.filter(id=recent.id).update(last_seen_at=_ago(600))
+        AdmissionCounter.objects.create(name=JOBS_COUNTER, inflight=3, inflight_cost=3.0)
+
+        cancelled, saved_secs = cancel_abandoned_jobs()
+
+        self.assertEqual((cancelled, saved_secs), (1, 60.0))
+        statuses = dict(Job.objects.values_list("id", "status"))
+        self.assertEqual(statuses[abandoned.id], Job.Status.CANCELLED)
+        self.assertEqual(statuses[detached.id], Job.Status.QUEUED)
+        self.assertEqual(statuses[recent.id], Job.Status.QUEUED)
+        self.assertEqual(AdmissionCounter.objects.get(name=JOBS_COUNTER).inflight, 2)
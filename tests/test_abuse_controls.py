@@ -9,20 +9,13 @@ from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from apps.jobs.models import Job
-
-
-def _make_zip(files: dict[str, bytes]) -> bytes:
-    buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for name, content in files.items():
-            zf.writestr(name, content)
-    return buf.getvalue()
+from tests.helpers import make_zip
 
 
 class AbuseControlTests(TestCase):
     def test_queue_full_rejects(self) -> None:
         client = APIClient()
-        file_data = _make_zip({"workflow.knime": b"<root></root>"})
+        file_data = make_zip({"workflow.knime": b"<root></root>"})
         upload = SimpleUploadedFile("test.zip", file_data, content_type="application/zip")
         with override_settings(MAX_QUEUED_JOBS=0):
             resp = client.post("/api/jobs", data={"bundle": upload}, format="multipart")
@@ -33,7 +26,7 @@ class AbuseControlTests(TestCase):
 
     def test_upload_too_large_returns_413(self) -> None:
         client = APIClient()
-        file_data = _make_zip({"workflow.knime": b"x" * 1024})
+        file_data = make_zip({"workflow.knime": b"x" * 1024})
         upload = SimpleUploadedFile("big.zip", file_data, content_type="application/zip")
         with override_settings(MAX_UPLOAD_BYTES=10):
             resp = client.post("/api/jobs", data={"bundle": upload}, format="multipart")
@@ -41,7 +34,7 @@ class AbuseControlTests(TestCase):
 
     def test_too_many_files_rejected(self) -> None:
         client = APIClient()
-        file_data = _make_zip(
+        file_data = make_zip(
             {
                 "workflow.knime": b"<root></root>",
                 "a.xml": b"<a></a>",
@@ -54,7 +47,7 @@ class AbuseControlTests(TestCase):
 
     def test_zip_bomb_rejected(self) -> None:
         client = APIClient()
-        file_data = _make_zip({"workflow.knime": b"x" * 50})
+        file_data = make_zip({"workflow.knime": b"x" * 50})
         upload = SimpleUploadedFile("bomb.zip", file_data, content_type="application/zip")
         with override_settings(MAX_UNPACKED_BYTES=10):
             resp = client.post("/api/jobs", data={"bundle": upload}, format="multipart")
@@ -62,7 +55,7 @@ class AbuseControlTests(TestCase):
 
     def test_path_traversal_rejected(self) -> None:
         client = APIClient()
-        file_data = _make_zip(
+        file_data = make_zip(
             {
                 "workflow.knime": b"<root></root>",
                 "../evil.txt": b"nope",
@@ -84,7 +77,7 @@ class AbuseControlTests(TestCase):
     def test_queue_counts_running(self) -> None:
         Job.objects.create(status=Job.Status.RUNNING)
         client = APIClient()
-        file_data = _make_zip({"workflow.knime": b"<root></root>"})
+        file_data = make_zip({"workflow.knime": b"<root></root>"})
         upload = SimpleUploadedFile("test.zip", file_data, content_type="application/zip")
         with override_settings(MAX_QUEUED_JOBS=1):
             resp = client.post("/api/jobs", data={"bundle": upload}, format="multipart")
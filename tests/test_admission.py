@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import datetime
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.admission import JOBS_COUNTER, admit, finish_job, reconcile, record_job_run, reserve_blob_bytes
+from apps.jobs.models import AdmissionCounter, Job, WorkerHeartbeat
+from tests.helpers import submit_bundle
+
+
+class AdmissionCounterTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _inflight(self) -> int:
+        return AdmissionCounter.objects.get(name=JOBS_COUNTER).inflight
+
+    def test_terminal_transition_frees_slot(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, MAX_QUEUED_JOBS=1):
+            first = submit_bundle(self.client)
+            rejected = submit_bundle(self.client)
+            self.assertEqual(self._inflight(), 1)
+
+            self.assertTrue(finish_job(first.data["id"], status=Job.Status.SUCCEEDED, finished_at=timezone.now()))
+            # A second terminal transition for the same job must not release again.
+            self.assertFalse(finish_job(first.data["id"], status=Job.Status.FAILED))
+            self.assertEqual(self._inflight(), 0)
+            second = submit_bundle(self.client)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(rejected.status_code, 429)
+        self.assertEqual(second.status_code, 201)
+
+    def test_invalid_bundle_releases_slot(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, MAX_QUEUED_JOBS=1):
+            invalid = submit_bundle(self.client, {"notes.txt": "no workflow"})
+            valid = submit_bundle(self.client)
+
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(valid.status_code, 201)
+        self.assertEqual(self._inflight(), 1)
+
+    def test_reconcile_corrects_drift(self) -> None:
+        Job.objects.create(status=Job.Status.QUEUED)
+        Job.objects.create(status=Job.Status.RUNNING)
+        Job.objects.create(status=Job.Status.FAILED)
+        AdmissionCounter.objects.create(name=JOBS_COUNTER, inflight=7)
+
+        drift = reconcile()
+
+        self.assertEqual(drift, 5)
+        self.assertEqual(self._inflight(), 2)
+        self.assertIsNotNone(AdmissionCounter.objects.get(name=JOBS_COUNTER).reconciled_at)
+
+    @override_settings(BLOB_MAX_BYTES_PER_CLIENT=100, BLOB_RETENTION_DAYS=7)
+    def test_reconcile_keeps_blob_charges(self) -> None:
+        self.assertTrue(reserve_blob_bytes("c1", 100))
+
+        reconcile()
+
+        self.assertFalse(reserve_blob_bytes("c1", 100))
+        # Once the blob window has expired the idle row is forgotten.
+        AdmissionCounter.objects.exclude(name=JOBS_COUNTER).update(
+            blob_window_at=timezone.now() - datetime.timedelta(days=8)
+        )
+        reconcile()
+        self.assertFalse(AdmissionCounter.objects.exclude(name=JOBS_COUNTER).exists())
+
+
+@override_settings(ADMISSION_POLICY="adaptive", ADMISSION_WAIT_SLO_SECS=60, ADMISSION_COST_UNIT_BYTES=1024)
+class AdaptiveAdmissionTests(TestCase):
+    def test_rejects_on_predicted_wait_with_retry_after(self) -> None:
+        # One live worker at 10 s per cost unit: the 60 s SLO allows 6 queued units.
+        WorkerHeartbeat.objects.create(worker_id="w1", last_seen_at=timezone.now(), secs_per_cost=10.0)
+
+        big = admit(10 * 1024)
+        resp = submit_bundle(APIClient(), filename="small.zip")
+
+        self.assertTrue(big.admitted)
+        self.assertEqual(big.cost, 11.0)
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp.data["error"]["code"], "queue_wait_exceeded")
+        self.assertEqual(resp.data["error"]["details"]["estimated_wait_seconds"], 110.0)
+        self.assertEqual(resp["Retry-After"], "50")
+
+    def test_cheap_jobs_admitted_beyond_static_limit(self) -> None:
+        WorkerHeartbeat.objects.create(worker_id="w1", last_seen_at=timezone.now(), secs_per_cost=1.0)
+        with override_settings(MAX_QUEUED_JOBS=2):
+            decisions = [admit(0) for _ in range(5)]
+        self.assertTrue(all(d.admitted for d in decisions))
+
+    def test_falls_back_to_static_limit_without_throughput(self) -> None:
+        WorkerHeartbeat.objects.create(worker_id="w1", last_seen_at=timezone.now())
+        with override_settings(MAX_QUEUED_JOBS=1):
+            first, second = admit(0), admit(0)
+        self.assertTrue(first.admitted)
+        self.assertFalse(second.admitted)
+        self.assertEqual(second.policy, "static")
+
+    def test_run_times_fold_into_ewma(self) -> None:
+        with override_settings(ADMISSION_EWMA_ALPHA=0.5):
+            record_job_run("w1", 2.0, 20.0)
+            record_job_run("w1", 1.0, 20.0)
+        hb = WorkerHeartbeat.objects.get(worker_id="w1")
+        self.assertAlmostEqual(hb.secs_per_cost, 15.0)
+        self.assertEqual(hb.jobs_finished, 2)
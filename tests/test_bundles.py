@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jobs.blobs import blob_path, delete_stale_blobs
+from apps.jobs.models import AdmissionCounter, Job
+
+
+FILES = {
+    "workflow.knime": b"<root></root>",
+    "CSV Reader (#1)/settings.xml": b"<settings></settings>",
+}
+
+
+def _manifest(files: dict[str, bytes]) -> list[dict]:
+    return [{"path": p, "sha256": hashlib.sha256(c).hexdigest(), "size": len(c)} for p, c in files.items()]
+
+
+class DeltaUploadTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _missing(self, files: dict[str, bytes]) -> list[str]:
+        resp = self.client.post("/api/bundles/missing", data={"files": _manifest(files)}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data["missing"]
+
+    def _upload_blobs(self, files: dict[str, bytes], digests: list[str]):
+        by_digest = {hashlib.sha256(c).hexdigest(): c for c in files.values()}
+        data = {d: SimpleUploadedFile(d, by_digest[d]) for d in digests}
+        return self.client.post("/api/blobs", data=data, format="multipart")
+
+    def _create(self, files: dict[str, bytes]):
+        payload = {"filename": "discounts.zip", "files": _manifest(files)}
+        return self.client.post("/api/bundles", data=payload, format="json")
+
+    def test_only_changed_files_are_requested(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            missing = self._missing(FILES)
+            self.assertEqual(len(missing), 2)
+            self.assertEqual(self._upload_blobs(FILES, missing).status_code, 200)
+            first = self._create(FILES)
+            self.assertEqual(first.status_code, 201, first.data)
+
+            changed = {**FILES, "CSV Reader (#1)/settings.xml": b"<settings><x/></settings>"}
+            missing = self._missing(changed)
+            self.assertEqual(missing, [hashlib.sha256(changed["CSV Reader (#1)/settings.xml"]).hexdigest()])
+            self._upload_blobs(changed, missing)
+            second = self._create(changed)
+            # Same files assemble into byte-identical bundles.
+            third = self._create(changed)
+
+        self.assertEqual(second.status_code, 201, second.data)
+        self.assertEqual(Job.objects.count(), 3)
+        self.assertNotEqual(first.data["input_sha256"], second.data["input_sha256"])
+        self.assertEqual(second.data["input_sha256"], third.data["input_sha256"])
+
+    def test_create_requires_all_blobs(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            resp = self._create(FILES)
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["error"]["code"], "blobs_missing")
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_blob_content_must_match_digest(self) -> None:
+        digest = hashlib.sha256(b"expected").hexdigest()
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            resp = self.client.post(
+                "/api/blobs", data={digest: SimpleUploadedFile(digest, b"tampered")}, format="multipart"
+            )
+            self.assertFalse(blob_path(digest).exists())
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["error"]["code"], "blob_checksum_mismatch")
+
+    def test_manifest_rejects_unsafe_paths(self) -> None:
+        files = {**FILES, "../evil.xml": b"<a/>"}
+        resp = self.client.post("/api/bundles/missing", data={"files": _manifest(files)}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_stale_blobs_are_deleted(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            self._upload_blobs(FILES, self._missing(FILES))
+            old = blob_path(hashlib.sha256(FILES["workflow.knime"]).hexdigest())
+            past = time.time() - 10 * 24 * 60 * 60
+            os.utime(old, (past, past))
+            deleted = delete_stale_blobs(time.time() - 7 * 24 * 60 * 60)
+            remaining = self._missing(FILES)
+
+        self.assertEqual(deleted, 1)
+        self.assertEqual(remaining, [hashlib.sha256(FILES["workflow.knime"]).hexdigest()])
+
+    def test_unused_blob_bytes_are_capped_per_client(self) -> None:
+        cap = sum(len(c) for c in FILES.values())
+        extra = {"other.xml": b"<other/>"}
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, BLOB_MAX_BYTES_PER_CLIENT=cap):
+            self.assertEqual(self._upload_blobs(FILES, self._missing(FILES)).status_code, 200)
+            over = self._upload_blobs(extra, self._missing(extra))
+            self.assertFalse(blob_path(hashlib.sha256(extra["other.xml"]).hexdigest()).exists())
+            self.assertEqual(self._create(FILES).status_code, 201)
+            # Blobs used by a bundle are refunded.
+            after_bundle = self._upload_blobs(extra, self._missing(extra))
+
+        self.assertEqual(over.status_code, 429)
+        self.assertEqual(over.data["error"]["code"], "blob_quota_exceeded")
+        self.assertEqual(after_bundle.status_code, 200)
+        self.assertEqual(AdmissionCounter.objects.exclude(name="jobs").get().blob_bytes, len(extra["other.xml"]))
+
+    def test_blob_swept_after_missing_check_reports_missing(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            self._upload_blobs(FILES, self._missing(FILES))
+            gone = hashlib.sha256(FILES["workflow.knime"]).hexdigest()
+            blob_path(gone).unlink()
+            with patch("apps.jobs.views.blobs.missing_blobs", return_value=[]):
+                resp = self._create(FILES)
+
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["error"]["details"]["missing"], [gone])
+        self.assertEqual(Job.objects.count(), 0)
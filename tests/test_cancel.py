@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import tempfile
+from unittest.mock import patch
+
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.admission import JOBS_COUNTER, cancel_job
+from apps.jobs.management.commands.k2p_worker import Command
+from apps.jobs.models import AdmissionCounter, Job
+from apps.jobs.runner import RunnerCancelled
+from apps.jobs.scheduling import claim_next_job
+from tests.helpers import submit_bundle
+
+
+class JobCancelTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_cancel_queued_job_frees_slot(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, MAX_QUEUED_JOBS=1):
+            first = submit_bundle(self.client)
+            resp = self.client.delete(f"/api/jobs/{first.data['id']}")
+            again = self.client.post(f"/api/jobs/{first.data['id']}/cancel")
+            second = submit_bundle(self.client)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["status"], Job.Status.CANCELLED)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(AdmissionCounter.objects.get(name=JOBS_COUNTER).inflight, 1)
+        self.assertEqual(str(claim_next_job().id), second.data["id"])
+
+    def test_cancel_running_job_stops_runner(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, RESULT_STORAGE_ROOT=self._tmp.name):
+            job_id = submit_bundle(self.client).data["id"]
+            cmd = Command()
+
+            def run_job(job_id, workflow_path, out_dir, *, should_cancel=None, **kwargs):
+                # The cancel request arrives while the container is running.
+                resp = self.client.post(f"/api/jobs/{job_id}/cancel")
+                self.assertEqual(resp.status_code, 202)
+                self.assertEqual(resp.data["status"], Job.Status.RUNNING)
+                self.assertTrue(should_cancel())
+                raise RunnerCancelled("cancelled", exit_code=137)
+
+            with patch("apps.jobs.management.commands.k2p_worker.DockerRunner.run_job", side_effect=run_job):
+                cmd._run_one(runner=cmd._build_runner())
+
+        job = Job.objects.get(id=job_id)
+        self.assertEqual(job.status, Job.Status.CANCELLED)
+        self.assertEqual(job.error_code, "cancelled")
+        self.assertIsNotNone(job.cancel_requested_at)
+        self.assertEqual(AdmissionCounter.objects.get(name=JOBS_COUNTER).inflight, 0)
+
+    def test_claim_does_not_resurrect_job_cancelled_after_read(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, JOB_SCHEDULER="fifo"):
+            first = submit_bundle(self.client).data["id"]
+            second = submit_bundle(self.client).data["id"]
+        read = []
+
+        def first_then_cancel(qs):
+            job = real_first(qs)
+            if job is not None and not read:
+                read.append(job.id)
+                # The cancel commits between the worker's read and its claim.
+                cancel_job(job.id)
+            return job
+
+        real_first = QuerySet.first
+        with patch.object(QuerySet, "first", first_then_cancel):
+            claimed = claim_next_job()
+
+        self.assertEqual(str(claimed.id), second)
+        self.assertEqual(Job.objects.get(id=first).status, Job.Status.CANCELLED)
+        self.assertEqual(Job.objects.get(id=second).status, Job.Status.RUNNING)
+
+    def test_cancel_finished_job_conflicts(self) -> None:
+        job = Job.objects.create(status=Job.Status.SUCCEEDED, finished_at=timezone.now())
+
+        resp = self.client.post(f"/api/jobs/{job.id}/cancel")
+
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["error"]["code"], "job_finished")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import datetime
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.models import Job
+from apps.jobs.scheduling import claim_next_job
+from tests.helpers import submit_bundle
+
+
+class FairShareTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _submit(self, ip: str, **headers):
+        return submit_bundle(self.client, headers={"X-Real-IP": ip, **headers})
+
+    def test_per_client_cap_does_not_block_other_clients(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, MAX_INFLIGHT_PER_CLIENT=1):
+            first = self._submit("10.0.0.1")
+            second = self._submit("10.0.0.1")
+            other = self._submit("10.0.0.2")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 429)
+        self.assertEqual(second.data["error"]["code"], "client_limit")
+        self.assertEqual(other.status_code, 201)
+        hashes = set(Job.objects.values_list("client_hash", flat=True))
+        self.assertEqual(len(hashes), 2)
+        self.assertNotIn("10.0.0.1", "".join(hashes))
+
+    def test_api_key_identity_only_when_configured(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, FAIR_SHARE_API_KEY_HEADER="X-Api-Key"):
+            self._submit("10.0.0.1", **{"X-Api-Key": "team-a"})
+            self._submit("10.0.0.2", **{"X-Api-Key": "team-a"})
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            self._submit("10.0.0.3", **{"X-Api-Key": "team-a"})
+
+        self.assertEqual(Job.objects.values("client_hash").distinct().count(), 2)
+
+    def test_claims_round_robin_across_clients(self) -> None:
+        base = timezone.now() - datetime.timedelta(minutes=10)
+        heavy = [Job.objects.create(status=Job.Status.QUEUED, client_hash="a" * 64) for _ in range(3)]
+        light = Job.objects.create(status=Job.Status.QUEUED, client_hash="b" * 64)
+        for i, job in enumerate([*heavy, light]):
+            Job.objects.filter(id=job.id).update(created_at=base + datetime.timedelta(seconds=i))
+
+        order = [claim_next_job().id for _ in range(4)]
+
+        self.assertEqual(order, [heavy[0].id, light.id, heavy[1].id, heavy[2].id])
+        self.assertIsNone(claim_next_job())
+
+    def test_fifo_scheduler(self) -> None:
+        first = Job.objects.create(status=Job.Status.QUEUED, client_hash="a" * 64)
+        second = Job.objects.create(status=Job.Status.QUEUED, client_hash="a" * 64)
+        Job.objects.filter(id=second.id).update(created_at=first.created_at + datetime.timedelta(seconds=1))
+        with override_settings(JOB_SCHEDULER="fifo"):
+            claimed = claim_next_job()
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.status, Job.Status.RUNNING)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import datetime
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.models import Job
+from apps.jobs.nodemeta import load_node_meta
+from tests.helpers import make_zip
+
+
+class JobByHashTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _upload(self, data: bytes | None = None) -> Job:
+        data = data or make_zip(
+            {
+                "workflow.knime": "<root></root>",
+                "CSV Reader (#1)/settings.xml": '<config><entry key="factory" value="org.knime.F"/></config>',
+            }
+        )
+        upload = SimpleUploadedFile("discounts.zip", data, content_type="application/zip")
+        resp = self.client.post("/api/jobs", data={"bundle": upload}, format="multipart")
+        self.assertEqual(resp.status_code, 201, resp.data)
+        return Job.objects.get(id=resp.data["id"])
+
+    def _by_hash(self, sha256: str, **extra):
+        return self.client.post("/api/jobs/by-hash", data={"sha256": sha256, **extra}, format="json")
+
+    def test_unknown_hash_asks_for_upload(self) -> None:
+        resp = self._by_hash("a" * 64)
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(resp.data["error"]["code"], "unknown_hash")
+
+    def test_in_flight_job_is_returned(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            job = self._upload()
+            resp = self._by_hash(job.input_sha256)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["match"], "in_flight")
+        self.assertEqual(resp.data["job"]["id"], str(job.id))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_other_clients_jobs_are_cloned_not_returned(self) -> None:
+        def by_hash_from(ip: str):
+            return self.client.post(
+                "/api/jobs/by-hash", data={"sha256": job.input_sha256}, format="json", headers={"X-Real-IP": ip}
+            )
+
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            job = self._upload()
+            Job.objects.filter(id=job.id).update(last_seen_at=timezone.now() - datetime.timedelta(hours=1))
+            while_queued = by_hash_from("10.0.0.2")
+            # The second client now gets its own clone back.
+            again = by_hash_from("10.0.0.2")
+            Job.objects.filter(id=job.id).update(status=Job.Status.SUCCEEDED, finished_at=timezone.now())
+            after_success = by_hash_from("10.0.0.3")
+
+        for resp in (while_queued, after_success):
+            self.assertEqual(resp.status_code, 201, resp.data)
+            self.assertEqual(resp.data["match"], "cloned")
+            self.assertNotEqual(Job.objects.get(id=resp.data["job"]["id"]).client_hash, job.client_hash)
+        self.assertEqual(again.data["match"], "in_flight")
+        self.assertEqual(again.data["job"]["id"], while_queued.data["job"]["id"])
+        job.refresh_from_db()
+        self.assertLess(job.last_seen_at, timezone.now() - datetime.timedelta(minutes=30))
+
+    def test_recent_success_is_returned_and_rerun_clones_input(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            job = self._upload()
+            Job.objects.filter(id=job.id).update(status=Job.Status.SUCCEEDED, finished_at=timezone.now())
+
+            found = self._by_hash(job.input_sha256)
+            rerun = self._by_hash(job.input_sha256, rerun=True)
+            clone = Job.objects.get(id=rerun.data["job"]["id"])
+            clone_input_exists = (Path(self._tmp.name) / clone.input_key).is_file()
+
+        self.assertEqual(found.status_code, 200)
+        self.assertEqual(found.data["match"], "succeeded")
+        self.assertEqual(found.data["job"]["id"], str(job.id))
+
+        self.assertEqual(rerun.status_code, 201)
+        self.assertEqual(rerun.data["match"], "cloned")
+        self.assertNotEqual(clone.id, job.id)
+        self.assertEqual(clone.status, Job.Status.QUEUED)
+        self.assertEqual(clone.input_sha256, job.input_sha256)
+        self.assertTrue(clone_input_exists)
+        self.assertEqual([n.factory for n in load_node_meta(clone)], ["org.knime.F"])
+
+    def test_success_outside_retention_window_is_cloned(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, RETENTION_SUCCEEDED_DAYS=7):
+            job = self._upload()
+            Job.objects.filter(id=job.id).update(
+                status=Job.Status.SUCCEEDED,
+                finished_at=timezone.now() - datetime.timedelta(days=8),
+            )
+            resp = self._by_hash(job.input_sha256)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data["match"], "cloned")
+
+    def test_fingerprint_ignores_zip_packaging(self) -> None:
+        repacked = io.BytesIO()
+        with zipfile.ZipFile(repacked, "w", compression=zipfile.ZIP_STORED) as zf:
+            zf.writestr("CSV Reader (#1)/", "")
+            zf.writestr(
+                zipfile.ZipInfo("CSV Reader (#1)/settings.xml", date_time=(2020, 5, 1, 12, 0, 0)),
+                '<config><entry key="factory" value="org.knime.F"/></config>',
+            )
+            zf.writestr("__MACOSX/._workflow.knime", "junk")
+            zf.writestr(".DS_Store", "junk")
+            zf.writestr("workflow.knime", "<root></root>")
+
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            job = self._upload()
+            other = self._upload(repacked.getvalue())
+            resp = self.client.post(
+                "/api/jobs/by-hash", data={"fingerprint": job.content_fingerprint}, format="json"
+            )
+
+        self.assertNotEqual(job.input_sha256, other.input_sha256)
+        self.assertEqual(len(job.content_fingerprint), 64)
+        self.assertEqual(job.content_fingerprint, other.content_fingerprint)
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data["match"], "in_flight")
+        self.assertEqual(resp.data["job"]["id"], str(other.id))
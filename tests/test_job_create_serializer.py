@@ -10,7 +10,8 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 from rest_framework import serializers
 
-from apps.jobs.models import JobSettingsMeta
+from apps.jobs.models import JobNodeMeta
+from apps.jobs.nodemeta import NodeMeta, load_node_meta
 from apps.jobs.serializers import JobCreateSerializer
 
 
@@ -62,11 +63,11 @@ class JobCreateSerializerTests(TestCase):
 
         self.assertTrue(job.input_key.startswith(f"jobs/{job.id}/"))
         self.assertTrue(job.input_key.endswith("/discounts.zip"))
-        meta = JobSettingsMeta.objects.get(job=job)
-        self.assertEqual(meta.file_name, "CSV Reader (#1)/settings.xml")
-        self.assertEqual(meta.factory, "org.knime.Factory")
-        self.assertEqual(meta.node_name, "CSV Reader")
-        self.assertEqual(meta.name, "CSV Reader")
+        self.assertEqual(
+            load_node_meta(job),
+            [NodeMeta("CSV Reader (#1)/settings.xml", "org.knime.Factory", "CSV Reader", "CSV Reader")],
+        )
+        self.assertEqual(JobNodeMeta.objects.get(job=job).node_count, 1)
         logger.info.assert_called()
         payload = logger.info.call_args[0][0]
         self.assertIn('"event": "job_created"', payload)
@@ -90,7 +91,7 @@ class JobCreateSerializerTests(TestCase):
             with override_settings(JOB_STORAGE_ROOT=tmpdir):
                 job = ser.save()
 
-        meta = JobSettingsMeta.objects.get(job=job, file_name="settings.xml")
+        meta = next(n for n in load_node_meta(job) if n.file_name == "settings.xml")
         self.assertEqual(meta.factory, "org.knime.base.node.meta.xvalidation.XValidatePartitionerFactory")
         self.assertEqual(meta.node_name, "X-Partitioner")
         self.assertEqual(meta.name, "X-Partitioner")
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import datetime
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.events import EventBatch, delete_old_events, record_event
+from apps.jobs.management.commands.k2p_worker import Command
+from apps.jobs.models import Job, JobEvent
+from tests.helpers import WORKFLOW, make_zip
+
+
+class JobEventsTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def _kinds(self, job_id) -> list[str]:
+        return [e["kind"] for e in self.client.get(f"/api/jobs/{job_id}/events").json()["events"]]
+
+    def _post(self, data: bytes) -> int:
+        upload = SimpleUploadedFile("w.zip", data, content_type="application/zip")
+        return self.client.post("/api/jobs", data={"bundle": upload}, format="multipart").status_code
+
+    def test_ingest_and_worker_run_build_the_timeline(self) -> None:
+        bundle = make_zip(WORKFLOW)
+
+        def run_job(*args, on_start=None, **kwargs):
+            on_start()
+            return {"exit_code": 0}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(JOB_STORAGE_ROOT=tmpdir, RESULT_STORAGE_ROOT=tmpdir):
+                self.assertEqual(self._post(bundle), 201)
+                job_id = str(Job.objects.get().id)
+                self.assertEqual(self._kinds(job_id), ["created", "validated", "queued"])
+
+                cmd = Command()
+                with patch("apps.jobs.management.commands.k2p_worker.DockerRunner.run_job", side_effect=run_job):
+                    cmd._run_one(runner=cmd._build_runner())
+                (Path(tmpdir) / "jobs" / job_id / "out.txt").write_text("ok", encoding="utf-8")
+                self.client.get(f"/api/jobs/{job_id}/result.zip")
+
+        events = self.client.get(f"/api/jobs/{job_id}/events").json()["events"]
+        self.assertEqual(
+            [e["kind"] for e in events],
+            ["created", "validated", "queued", "claimed", "extracted", "container_started", "finished", "downloaded"],
+        )
+        self.assertEqual(events[0]["payload"], {"size": len(bundle)})
+        self.assertEqual(events[6]["payload"], {"status": "SUCCEEDED", "error_code": "", "exit_code": 0})
+        self.assertEqual(events[7]["payload"], {"format": "zip"})
+        self.assertTrue(all(e["source"] and e["monotonic_ns"] > 0 for e in events))
+
+    def test_rejected_bundle(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(JOB_STORAGE_ROOT=tmpdir):
+                self.assertEqual(self._post(b"not a zip"), 400)
+
+        events = self.client.get(f"/api/jobs/{Job.objects.get().id}/events").json()["events"]
+        self.assertEqual([e["kind"] for e in events], ["created", "rejected"])
+        self.assertEqual(events[1]["payload"], {"error_code": "invalid_zip"})
+
+    def test_events_outlive_their_job_until_retention(self) -> None:
+        job_id = Job.objects.create().id
+        batch = EventBatch()
+        batch.add(job_id, JobEvent.Kind.CREATED)
+        batch.add(job_id, JobEvent.Kind.QUEUED)
+        batch.flush()
+        record_event(job_id, JobEvent.Kind.CLEANED_UP, status="SUCCEEDED")
+        Job.objects.filter(id=job_id).delete()
+
+        self.assertEqual(self._kinds(job_id), ["created", "queued", "cleaned_up"])
+        self.assertEqual(self.client.get("/api/jobs/00000000-0000-0000-0000-000000000000/events").status_code, 404)
+
+        JobEvent.objects.filter(kind=JobEvent.Kind.CREATED).update(at=timezone.now() - datetime.timedelta(days=40))
+        self.assertEqual(delete_old_events(timezone.now() - datetime.timedelta(days=30)), 1)
+        self.assertEqual(self._kinds(job_id), ["queued", "cleaned_up"])
+
+    def test_admin_search_finds_events_of_a_deleted_job(self) -> None:
+        job_id = Job.objects.create().id
+        record_event(job_id, JobEvent.Kind.CLEANED_UP, status="SUCCEEDED")
+        record_event(Job.objects.create().id, JobEvent.Kind.CREATED)
+        Job.objects.filter(id=job_id).delete()
+
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        resp = self.client.get(reverse("admin:jobs_jobevent_changelist"), {"q": str(job_id)})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([e.job_id for e in resp.context["cl"].result_list], [job_id])
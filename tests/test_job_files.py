@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jobs.artifacts import record_artifacts
+from apps.jobs.models import Job
+
+
+class JobFilesTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.job = Job.objects.create(status=Job.Status.SUCCEEDED, result_key="")
+        self.out_dir = Path(self._tmp.name) / f"jobs/{self.job.id}"
+        (self.out_dir / "_work").mkdir(parents=True)
+        (self.out_dir / "_work" / "workflow.knime").write_text("<root></root>", encoding="utf-8")
+        (self.out_dir / "discounts__g01.py").write_text("print('hello world')\n", encoding="utf-8")
+        record_artifacts(self.job, self.out_dir)
+
+    def _get(self, url: str, **headers):
+        with override_settings(RESULT_STORAGE_ROOT=self._tmp.name):
+            return self.client.get(url, headers=headers)
+
+    def test_manifest_lists_results_without_scratch(self) -> None:
+        resp = self._get(f"/api/jobs/{self.job.id}/files")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([f["path"] for f in resp.data["files"]], ["discounts__g01.py"])
+        entry = resp.data["files"][0]
+        self.assertEqual(entry["size"], 21)
+        self.assertEqual(entry["sha256"], hashlib.sha256(b"print('hello world')\n").hexdigest())
+        self.assertTrue(entry["content_type"].startswith("text/x-python"))
+
+    def test_file_download_with_etag_and_range(self) -> None:
+        url = f"/api/jobs/{self.job.id}/files/discounts__g01.py"
+
+        full = self._get(url)
+        etag = full["ETag"]
+        partial = self._get(url, Range="bytes=6-10")
+        suffix = self._get(url, Range="bytes=-6")
+        cached = self._get(url, **{"If-None-Match": etag})
+        unsatisfiable = self._get(url, Range="bytes=100-")
+
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(b"".join(full.streaming_content), b"print('hello world')\n")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial["Content-Range"], "bytes 6-10/21")
+        self.assertEqual(b"".join(partial.streaming_content), b"'hell")
+        self.assertEqual(b"".join(suffix.streaming_content), b"rld')\n")
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_file_names_with_url_and_header_metacharacters(self) -> None:
+        name = 'Table "Q1" #2?.csv'
+        (self.out_dir / name).write_text("a,b\n", encoding="utf-8")
+        record_artifacts(self.job, self.out_dir)
+
+        entry = next(f for f in self._get(f"/api/jobs/{self.job.id}/files").data["files"] if f["path"] == name)
+        resp = self._get(entry["url"], Range="bytes=0-")
+
+        self.assertEqual(entry["url"], f"/api/jobs/{self.job.id}/files/Table%20%22Q1%22%20%232%3F.csv")
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(b"".join(resp.streaming_content), b"a,b\n")
+        self.assertEqual(resp["Content-Disposition"], r'inline; filename="Table \"Q1\" #2?.csv"')
+
+    def test_only_manifest_paths_are_served(self) -> None:
+        scratch = self._get(f"/api/jobs/{self.job.id}/files/_work/workflow.knime")
+        traversal = self._get(f"/api/jobs/{self.job.id}/files/../../etc/passwd")
+
+        self.assertEqual(scratch.status_code, 404)
+        self.assertEqual(scratch.data["error"]["code"], "file_not_found")
+        self.assertEqual(traversal.status_code, 404)
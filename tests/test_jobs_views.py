@@ -7,9 +7,11 @@ from pathlib import Path
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 
-from apps.jobs.models import Job
+from apps.jobs.metrics_api import INGEST_PHASE_SECONDS
+from apps.jobs.models import Job, JobDiagnostics
+from apps.jobs.views import JobsCreateView
 
 
 class JobsViewsTests(TestCase):
@@ -22,6 +24,15 @@ class JobsViewsTests(TestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertEqual(resp.data["error"]["code"], "invalid_request")
 
+    def test_create_job_rejects_malformed_content_length(self) -> None:
+        # Called directly: django_prometheus' middleware parses the header first in the full stack.
+        upload = SimpleUploadedFile("discounts.zip", b"PK", content_type="application/zip")
+        request = APIRequestFactory().post("/api/jobs", {"bundle": upload}, format="multipart", CONTENT_LENGTH="12abc")
+        resp = JobsCreateView.as_view()(request)
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["error"]["code"], "invalid_request")
+        self.assertEqual(Job.objects.count(), 0)
+
     def test_create_and_get_job(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
             with override_settings(JOB_STORAGE_ROOT=tmpdir):
@@ -45,6 +56,36 @@ class JobsViewsTests(TestCase):
         self.assertEqual(detail.data["id"], job_id)
         self.assertEqual(detail.data["status"], Job.Status.QUEUED)
 
+    def test_create_reports_ingest_phases(self) -> None:
+        def stored() -> float:
+            samples = INGEST_PHASE_SECONDS.collect()[0].samples
+            return sum(
+                x.value
+                for x in samples
+                if x.name.endswith("_count") and x.labels == {"phase": "store", "size": "<1MiB", "entries": "<100"}
+            )
+
+        before = stored()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with override_settings(JOB_STORAGE_ROOT=tmpdir, DEBUG=True):
+                upload = SimpleUploadedFile(
+                    "w.zip", self._make_zip({"workflow.knime": "<root></root>"}), content_type="application/zip"
+                )
+                resp = self.client.post("/api/jobs", data={"bundle": upload}, format="multipart")
+
+        self.assertEqual(resp.status_code, 201)
+        phases = [part.split(";")[0] for part in resp["Server-Timing"].split(", ")]
+        self.assertEqual(
+            phases,
+            ["admission", "parse", "validate", "job_insert", "zip_validate", "store", "xml_validate", "node_meta", "job_update", "respond"],
+        )
+        self.assertEqual(stored() - before, 1)
+
+        with override_settings(DEBUG=False):
+            upload = SimpleUploadedFile("notes.txt", b"nope", content_type="text/plain")
+            resp = self.client.post("/api/jobs", data={"bundle": upload}, format="multipart")
+        self.assertNotIn("Server-Timing", resp)
+
     def test_create_rejects_when_queue_full(self) -> None:
         Job.objects.create(status=Job.Status.QUEUED)
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -104,11 +145,8 @@ class JobsViewsTests(TestCase):
             self.assertIn("out.txt", zf.namelist())
 
     def test_logs_returns_stdout_stderr(self) -> None:
-        job = Job.objects.create(
-            status=Job.Status.RUNNING,
-            stdout_tail="hello",
-            stderr_tail="boom",
-        )
+        job = Job.objects.create(status=Job.Status.RUNNING)
+        JobDiagnostics.objects.create(job=job, stdout_tail="hello", stderr_tail="boom")
         resp = self.client.get(f"/api/jobs/{job.id}/logs")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data["stdout_tail"], "hello")
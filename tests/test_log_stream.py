@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import logging
+import stat
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jobs.models import Job, JobDiagnostics
+from apps.jobs.runner import DockerRunner, LogRing
+from apps.jobs.tracing import PhaseTrace
+
+# Stands in for the docker CLI: "image inspect" and "create" succeed, "start" prints a lot and exits.
+FAKE_DOCKER = """#!/bin/sh
+if [ "$1" = "start" ]; then
+  i=0
+  while [ $i -lt 2000 ]; do echo "line $i"; i=$((i+1)); done
+  echo "warning: slow node" >&2
+  sleep 0.3
+  echo "done"
+fi
+exit 0
+"""
+
+
+def _events(resp) -> list[tuple[str, str]]:
+    body = b"".join(resp.streaming_content).decode()
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line.startswith(("event", "data")))
+        if "event" in fields:
+            events.append((fields["event"], fields["data"]))
+    return events
+
+
+class LogCaptureTests(SimpleTestCase):
+    def test_ring_keeps_only_the_tail(self) -> None:
+        ring = LogRing(max_bytes=100)
+        for i in range(1000):
+            ring.write(f"line {i}\n".encode())
+
+        self.assertEqual(ring.total_bytes, sum(len(f"line {i}\n") for i in range(1000)))
+        self.assertLessEqual(len(ring.tail()), 100)
+        self.assertTrue(ring.tail().endswith("line 999"))
+        self.assertEqual(ring.tail(max_lines=2), "line 998\nline 999")
+
+    def test_runner_streams_output_to_disk_and_ring(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            docker = root / "docker"
+            docker.write_text(FAKE_DOCKER, encoding="utf-8")
+            docker.chmod(docker.stat().st_mode | stat.S_IEXEC)
+            (root / "in").mkdir()
+            runner = DockerRunner(
+                docker_bin=str(docker),
+                image="k2p:test",
+                timeout_s=30,
+                cpu="1",
+                memory="1g",
+                pids_limit="64",
+                command=None,
+                args_template=None,
+                container_repo_root=root,
+                container_job_storage_root=root,
+                container_result_storage_root=root,
+                host_repo_root="",
+                host_job_storage_root="",
+                host_result_storage_root="",
+                logger=logging.getLogger("test"),
+                log_tail_bytes=200,
+                log_publish_s=0.05,
+            )
+            published = []
+            trace = PhaseTrace()
+
+            result = runner.run_job(
+                "job-1",
+                root / "in",
+                root / "out",
+                log_dir=root / "logs",
+                on_log=lambda o, e: published.append((o, e)),
+                trace=trace,
+            )
+
+            stdout_log = (root / "logs" / "stdout.log").read_text(encoding="utf-8")
+            self.assertEqual(len(stdout_log.splitlines()), 2001)
+            self.assertTrue(result["stdout_tail"].endswith("line 1999\ndone"))
+            self.assertLessEqual(len(result["stdout_tail"]), 200)
+            self.assertEqual(result["stderr_tail"], "warning: slow node")
+            # Published mid-run, before "done" was printed.
+            self.assertTrue(published)
+            self.assertTrue(published[0][0].endswith("line 1999"))
+            self.assertEqual(list(trace.phases), ["image_check", "container_create", "k2p_run", "artifact_scan"])
+            self.assertGreaterEqual(trace.phases["k2p_run"], 0.3)
+
+
+class LogStreamViewTests(TestCase):
+    def test_finished_job_sends_logs_then_end(self) -> None:
+        job = Job.objects.create(status=Job.Status.FAILED)
+        JobDiagnostics.objects.create(job=job, stdout_tail="out", stderr_tail="boom")
+
+        resp = APIClient().get(f"/api/jobs/{job.id}/logs/stream", headers={"Accept": "text/event-stream"})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            _events(resp),
+            [
+                ("logs", '{"status": "FAILED", "stdout_tail": "out", "stderr_tail": "boom"}'),
+                ("end", '{"status": "FAILED"}'),
+            ],
+        )
+
+    @override_settings(LOG_STREAM_POLL_SECS=0.01)
+    def test_running_job_follows_published_tails(self) -> None:
+        job = Job.objects.create(status=Job.Status.RUNNING)
+        JobDiagnostics.objects.create(job=job, stdout_tail="step 1")
+        updates = iter(
+            [
+                lambda: JobDiagnostics.objects.filter(job=job).update(stdout_tail="step 1\nstep 2"),
+                lambda: None,
+                lambda: Job.objects.filter(id=job.id).update(status=Job.Status.SUCCEEDED),
+            ]
+        )
+
+        def tick(_seconds):
+            next(updates)()
+
+        with patch("apps.jobs.views.time.sleep", side_effect=tick):
+            resp = APIClient().get(f"/api/jobs/{job.id}/logs/stream")
+            events = _events(resp)
+
+        self.assertEqual([name for name, _ in events], ["logs", "logs", "logs", "end"])
+        self.assertIn("step 2", events[1][1])
+        self.assertIn("SUCCEEDED", events[2][1])
+
+    @override_settings(LOG_STREAM_MAX_PER_PROCESS=1)
+    def test_streams_per_process_are_capped(self) -> None:
+        job = Job.objects.create(status=Job.Status.RUNNING)
+        url = f"/api/jobs/{job.id}/logs/stream"
+
+        first = APIClient().get(url)
+        busy = APIClient().get(url, headers={"Accept": "text/event-stream"})
+        # A finished stream frees its slot.
+        Job.objects.filter(id=job.id).update(status=Job.Status.SUCCEEDED)
+        _events(first)
+        again = APIClient().get(url)
+        _events(again)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(busy.status_code, 503)
+        self.assertEqual(busy.json()["error"]["code"], "log_stream_busy")
+        self.assertEqual(busy["Retry-After"], "1")
+        self.assertEqual(again.status_code, 200)
+
+    def test_unknown_job_is_404_json(self) -> None:
+        resp = APIClient().get(
+            "/api/jobs/00000000-0000-0000-0000-000000000000/logs/stream", headers={"Accept": "text/event-stream"}
+        )
+
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import re
+import runpy
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+API_DIR = Path(__file__).resolve().parents[1] / "api"
+
+# Stands in for a gunicorn worker: counts jobs through the real metrics_api counter.
+WORKER = """
+import sys
+import django
+django.setup()
+from apps.jobs.metrics_api import JOB_CREATED_TOTAL
+JOB_CREATED_TOTAL.inc(int(sys.argv[1]))
+"""
+
+
+def _env(**extra: str) -> dict[str, str]:
+    env = {**os.environ, "PYTHONPATH": str(API_DIR), "DJANGO_SETTINGS_MODULE": "k2pweb.settings", "DEBUG": "1", **extra}
+    env.pop("PYTEST_CURRENT_TEST", None)
+    return env
+
+
+class MultiprocessMetricsTests(TestCase):
+    def test_metrics_sums_counters_of_all_worker_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = _env(PROMETHEUS_MULTIPROC_DIR=tmp)
+            for count in (1, 2, 3):
+                subprocess.run([sys.executable, "-c", WORKER, str(count)], env=env, check=True)
+
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": tmp}):
+                resp = self.client.get("/metrics")
+
+        body = resp.content.decode()
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("k2p_job_created_total 6.0", body)
+        # The database gauges are still there, once.
+        self.assertEqual(body.count("# TYPE k2p_job_queue_depth gauge"), 1)
+
+
+class GunicornHookTests(SimpleTestCase):
+    def test_start_clears_stale_files_and_exit_drops_live_gauges(self) -> None:
+        hooks = runpy.run_path(str(API_DIR / "gunicorn.conf.py"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp)
+            (path / "counter_1.db").write_bytes(b"")
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": tmp}):
+                hooks["on_starting"](None)
+                self.assertEqual(list(path.iterdir()), [])
+
+                (path / "counter_42.db").write_bytes(b"")
+                (path / "gauge_livesum_42.db").write_bytes(b"")
+                hooks["child_exit"](None, SimpleNamespace(pid=42))
+
+            self.assertEqual(sorted(p.name for p in path.iterdir()), ["counter_42.db"])
+
+
+class GunicornMultiprocessTests(SimpleTestCase):
+    def test_request_counts_cover_every_worker(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = _env(PROMETHEUS_MULTIPROC_DIR=f"{tmp}/prom", SQLITE_PATH=f"{tmp}/db.sqlite3")
+            subprocess.run(
+                [sys.executable, "manage.py", "migrate", "-v0"],
+                cwd=API_DIR,
+                env={k: v for k, v in env.items() if k != "PROMETHEUS_MULTIPROC_DIR"},
+                check=True,
+            )
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "k2pweb.wsgi:application", "--config", "gunicorn.conf.py"]
+                + ["--bind", f"127.0.0.1:{port}", "--workers", "3"],
+                cwd=API_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                base = f"http://127.0.0.1:{port}"
+                deadline = time.monotonic() + 30
+                while True:
+                    try:
+                        urllib.request.urlopen(f"{base}/healthz", timeout=5).read()
+                        break
+                    except OSError:
+                        if time.monotonic() > deadline:
+                            raise
+                        time.sleep(0.2)
+                for _ in range(29):
+                    urllib.request.urlopen(f"{base}/healthz", timeout=5).read()
+
+                totals = []
+                for _ in range(3):
+                    body = urllib.request.urlopen(f"{base}/metrics", timeout=5).read().decode()
+                    match = re.search(r'^django_http_requests_total_by_method_total\{method="GET"\} (\S+)$', body, re.M)
+                    totals.append(float(match.group(1)))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        # 30 health checks plus the scrapes so far, whichever worker answers.
+        self.assertEqual(totals, [31.0, 32.0, 33.0])
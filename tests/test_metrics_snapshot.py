@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.jobs.metrics_api import JobsDbMetricsCollector, job_metrics_snapshot
+from apps.jobs.models import Job, MetricsSnapshot
+
+
+class MetricsSnapshotTests(TestCase):
+    def test_served_from_snapshot_until_ttl(self) -> None:
+        now = timezone.now()
+        Job.objects.create(status=Job.Status.QUEUED)
+        self.assertEqual(job_metrics_snapshot(15, now).data["by_status"], {"QUEUED": 1})
+
+        Job.objects.create(status=Job.Status.QUEUED)
+        with self.assertNumQueries(1):
+            snap = job_metrics_snapshot(15, now + datetime.timedelta(seconds=10))
+        self.assertEqual(snap.data["by_status"], {"QUEUED": 1})
+
+        snap = job_metrics_snapshot(15, now + datetime.timedelta(seconds=20))
+        self.assertEqual(snap.data["by_status"], {"QUEUED": 2})
+        self.assertEqual(snap.refreshed_at, now + datetime.timedelta(seconds=20))
+
+    def test_stale_snapshot_served_while_another_process_refreshes(self) -> None:
+        now = timezone.now()
+        MetricsSnapshot.objects.create(
+            name="jobs", data={"by_status": {"FAILED": 3}}, refreshed_at=now - datetime.timedelta(seconds=60), claimed_at=now
+        )
+        Job.objects.create(status=Job.Status.QUEUED)
+
+        snap = job_metrics_snapshot(15, now + datetime.timedelta(seconds=1))
+
+        self.assertEqual(snap.data["by_status"], {"FAILED": 3})
+
+    def test_zero_ttl_queries_every_time(self) -> None:
+        Job.objects.create(status=Job.Status.SUCCEEDED, finished_at=timezone.now())
+
+        snap = job_metrics_snapshot(0, timezone.now())
+
+        self.assertEqual(snap.data["by_status"], {"SUCCEEDED": 1})
+        self.assertFalse(MetricsSnapshot.objects.exists())
+
+    @override_settings(METRICS_DB_CACHE_SECS=15)
+    def test_collector_reports_staleness_and_refresh_cost(self) -> None:
+        Job.objects.create(status=Job.Status.QUEUED)
+        MetricsSnapshot.objects.create(
+            name="jobs",
+            data={"by_status": {"QUEUED": 5}, "last_finished": 0},
+            refreshed_at=timezone.now() - datetime.timedelta(seconds=5),
+            refresh_secs=0.25,
+        )
+
+        samples = {
+            s.name: s.value
+            for family in JobsDbMetricsCollector().collect()
+            for s in family.samples
+            if not s.labels
+        }
+
+        self.assertEqual(samples["k2p_job_queue_depth"], 5)
+        self.assertEqual(samples["k2p_metrics_snapshot_refresh_seconds"], 0.25)
+        self.assertGreaterEqual(samples["k2p_metrics_snapshot_age_seconds"], 5)
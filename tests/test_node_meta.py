@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.jobs.admission import finish_job
+from apps.jobs.models import FactoryUsage, Job, JobNodeMeta, NodeFactory
+from apps.jobs.nodemeta import NodeMeta, copy_node_meta, load_node_meta, parse_settings_xml, store_node_meta
+
+
+class NodeMetaTests(TestCase):
+    def test_large_bundle_is_one_row_with_interned_factories(self) -> None:
+        nodes = [
+            NodeMeta(f"Node {i} (#{i})/settings.xml", f"org.knime.F{i % 3}" if i % 10 else None, f"Node {i % 3}", f"N{i}")
+            for i in range(1500)
+        ]
+        first = Job.objects.create()
+        second = Job.objects.create()
+
+        store_node_meta(first, nodes)
+        store_node_meta(second, nodes[:10])
+        copy_node_meta(first, Job.objects.create())
+
+        self.assertEqual(JobNodeMeta.objects.count(), 3)
+        self.assertEqual(NodeFactory.objects.count(), 3)
+        self.assertEqual(JobNodeMeta.objects.get(job=first).node_count, 1500)
+        self.assertEqual(load_node_meta(first), nodes)
+        self.assertEqual(load_node_meta(second), nodes[:10])
+
+    def test_parse_settings_xml(self) -> None:
+        xml = (
+            b"<config>"
+            b'<entry key="factory" type="xstring" value="org.knime.Factory"/>'
+            b'<entry key="node-name" type="xstring" value="CSV Reader"/>'
+            b"</config>"
+        )
+
+        self.assertEqual(
+            parse_settings_xml("a/settings.xml", xml), NodeMeta("a/settings.xml", "org.knime.Factory", "CSV Reader", None)
+        )
+        self.assertEqual(parse_settings_xml("b/settings.xml", b"<broken"), NodeMeta("b/settings.xml", None, None, None))
+        self.assertEqual(load_node_meta(Job.objects.create()), [])
+
+
+class FactoryUsageTests(TestCase):
+    def _nodes(self, *factories: str) -> list[NodeMeta]:
+        return [NodeMeta(f"n{i}/settings.xml", f, None, None) for i, f in enumerate(factories)]
+
+    def test_ingest_clone_and_failure_update_daily_rows(self) -> None:
+        first = Job.objects.create()
+        store_node_meta(first, self._nodes("org.knime.A", "org.knime.A", "org.knime.B", None))
+        clone = Job.objects.create()
+        copy_node_meta(first, clone)
+        store_node_meta(Job.objects.create(), self._nodes("org.knime.B"))
+
+        self.assertTrue(finish_job(clone.id, status=Job.Status.FAILED))
+        # A repeated terminal transition is not counted again.
+        self.assertFalse(finish_job(clone.id, status=Job.Status.FAILED))
+
+        rows = {
+            u.factory.name: (u.job_count, u.node_count, u.failure_count)
+            for u in FactoryUsage.objects.select_related("factory")
+        }
+        self.assertEqual(rows, {"org.knime.A": (2, 4, 1), "org.knime.B": (3, 3, 1)})
+        self.assertEqual(FactoryUsage.objects.values("day").distinct().count(), 1)
+
+    def test_summary_endpoint_is_staff_only(self) -> None:
+        store_node_meta(Job.objects.create(), self._nodes("org.knime.A", "org.knime.B", "org.knime.B"))
+        store_node_meta(Job.objects.create(), self._nodes("org.knime.B"))
+        url = reverse("admin:jobs_factoryusage_summary")
+
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        resp = self.client.get(url, {"days": 7, "limit": 1})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["factories"], [{"factory": "org.knime.B", "jobs": 2, "nodes": 3, "failures": 0}])
+        self.assertEqual(self.client.get(url, {"days": "x"}).json()["error"]["code"], "invalid_request")
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import datetime
+import unittest
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.jobs.models import Job, JobArtifact, JobDiagnostics, JobEvent, JobNodeMeta
+from apps.jobs.partitions import (
+    PARTITIONED,
+    convert,
+    default_partition,
+    drop_expired_partitions,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    parse_bound,
+    partition_name,
+    partitioning_enabled,
+    period_end,
+    period_start,
+)
+from apps.jobs.scheduling import claim_next_job
+
+UTC = datetime.timezone.utc
+
+
+class PartitionPeriodTests(SimpleTestCase):
+    def test_day_and_week_bounds(self) -> None:
+        # Sunday evening in UTC+2 is still Sunday in UTC; its week starts on Monday the 12th.
+        moment = datetime.datetime(2026, 10, 18, 23, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+
+        day = period_start(moment, "day")
+        week = period_start(moment, "week")
+
+        self.assertEqual(day, datetime.datetime(2026, 10, 18, tzinfo=UTC))
+        self.assertEqual(period_end(day, "day"), datetime.datetime(2026, 10, 19, tzinfo=UTC))
+        self.assertEqual(week, datetime.datetime(2026, 10, 12, tzinfo=UTC))
+        self.assertEqual(period_end(week, "week"), datetime.datetime(2026, 10, 19, tzinfo=UTC))
+        self.assertEqual(partition_name("jobs_job", week), "jobs_job_p20261012")
+
+    def test_parse_bound(self) -> None:
+        bound = parse_bound("FOR VALUES FROM ('2026-10-12 00:00:00+00') TO ('2026-10-19 00:00:00+00')")
+
+        self.assertEqual(
+            bound,
+            (datetime.datetime(2026, 10, 12, tzinfo=UTC), datetime.datetime(2026, 10, 19, tzinfo=UTC)),
+        )
+        self.assertIsNone(parse_bound("DEFAULT"))
+
+
+@unittest.skipIf(connection.vendor == "postgresql", "partitioning is available on Postgres")
+class PartitioningFallbackTests(TestCase):
+    @override_settings(JOB_PARTITION_PERIOD="day")
+    def test_off_without_postgres(self) -> None:
+        self.assertFalse(partitioning_enabled())
+        with self.assertRaises(CommandError):
+            call_command("k2p_partitions", "status")
+
+
+# The DDL runs in the test's transaction (Postgres DDL is transactional), so the
+# conversion is rolled back with it.
+@unittest.skipUnless(connection.vendor == "postgresql", "needs Postgres: TEST_DB_ENGINE=postgres and DB_*")
+@override_settings(JOB_PARTITION_PERIOD="day", JOB_PARTITION_PREMAKE=2)
+class PostgresPartitioningTests(TestCase):
+    table = Job._meta.db_table
+
+    def _job(self, created_at: datetime.datetime, **fields) -> Job:
+        job = Job.objects.create(**fields)
+        Job.objects.filter(id=job.id).update(created_at=created_at)
+        job.created_at = created_at
+        return job
+
+    def _rows_in(self, partition: str) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(partition)}")
+            return cursor.fetchone()[0]
+
+    def test_convert_keeps_rows_and_queue_working(self) -> None:
+        now = timezone.now()
+        old_at = now - datetime.timedelta(days=3)
+        old = self._job(old_at, status=Job.Status.SUCCEEDED)
+        # Written before the copy of the job's created_at existed: convert fills it in.
+        JobDiagnostics.objects.create(job=old, stderr_tail="boom")
+        JobDiagnostics.objects.filter(job=old).update(job_created_at=None)
+        JobArtifact.objects.create(job=old, path="out.py", size=1, sha256="0" * 64, content_type="text/plain")
+        queued = self._job(now - datetime.timedelta(minutes=1), status=Job.Status.QUEUED)
+
+        moved = convert("day", now)
+
+        diagnostics = JobDiagnostics._meta.db_table
+        self.assertEqual(
+            moved,
+            {self.table: 2, JobArtifact._meta.db_table: 1, diagnostics: 1, JobNodeMeta._meta.db_table: 0},
+        )
+        self.assertTrue(all(is_partitioned(model._meta.db_table) for model in PARTITIONED))
+        # Three days back through the current day plus two ahead.
+        self.assertEqual(len(list_partitions(self.table)), 6)
+        self.assertEqual(default_partition(self.table), f"{self.table}_default")
+        self.assertEqual(self._rows_in(partition_name(diagnostics, period_start(old_at, "day"))), 1)
+        self.assertEqual(Job.objects.get(id=old.id).diagnostics.stderr_tail, "boom")
+        self.assertEqual(claim_next_job().id, queued.id)
+        self.assertEqual(Job.objects.create().status, Job.Status.QUEUED)
+        # The (job, path) unique index carries the partition key along.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            JobArtifact.objects.create(job=old, path="out.py", size=1, sha256="0" * 64, content_type="text/plain")
+
+    def test_ensure_moves_rows_out_of_default(self) -> None:
+        now = timezone.now()
+        convert("day", now)
+        later = now + datetime.timedelta(days=10)
+        job = self._job(later)
+        default = default_partition(self.table)
+        self.assertEqual(self._rows_in(default), 1)
+
+        created = ensure_partitions(later, ahead=0)
+
+        day = period_start(later, "day")
+        self.assertEqual(created, [partition_name(model._meta.db_table, day) for model in PARTITIONED])
+        self.assertEqual(self._rows_in(default), 0)
+        self.assertEqual(self._rows_in(created[0]), 1)
+        self.assertEqual(Job.objects.get(id=job.id).created_at, later)
+        # Already covered: nothing more to create.
+        self.assertEqual(ensure_partitions(later, ahead=0), [])
+
+    def test_drop_expired_keeps_in_flight_partitions(self) -> None:
+        now = timezone.now()
+        done_at = now - datetime.timedelta(days=5)
+        done = self._job(done_at, status=Job.Status.SUCCEEDED)
+        JobDiagnostics.objects.create(job=done)
+        running = self._job(now - datetime.timedelta(days=4), status=Job.Status.RUNNING)
+        JobDiagnostics.objects.create(job=running)
+        convert("day", now)
+        swept = []
+
+        with CaptureQueriesContext(connection) as ctx:
+            dropped = drop_expired_partitions(now - datetime.timedelta(days=3), sweep=swept.append)
+
+        day = period_start(done_at, "day")
+        self.assertEqual(dropped, [partition_name(model._meta.db_table, day) for model in PARTITIONED])
+        self.assertEqual(swept, [done.id])
+        self.assertFalse(Job.objects.filter(id=done.id).exists())
+        self.assertFalse(JobDiagnostics.objects.filter(job_id=done.id).exists())
+        self.assertTrue(Job.objects.filter(id=running.id).exists())
+        self.assertTrue(JobDiagnostics.objects.filter(job_id=running.id).exists())
+        # Metadata only: no row is deleted, updated or inserted.
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("DELETE", "UPDATE", "INSERT"))]
+        self.assertEqual(writes, [])
+        self.assertFalse(JobEvent.objects.exists())
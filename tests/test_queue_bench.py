@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import datetime
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.jobs.management.commands.k2p_queue_bench import Command
+from apps.jobs.models import Job
+
+
+class QueueBenchTests(TestCase):
+    def test_reports_each_step_and_rolls_back(self) -> None:
+        out = StringIO()
+
+        call_command("k2p_queue_bench", history=300, steps=3, queued=5, clients=10, repeat=1, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:4]], ["100", "200", "300"])
+        self.assertEqual(lines[-1], "Seeded rows rolled back.")
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_seeded_history_keeps_its_creation_times(self) -> None:
+        now = timezone.now()
+
+        Command()._seed(random.Random(0), ["a" * 64], now, 50, 10)
+
+        created = Job.objects.values_list("created_at", flat=True)
+        self.assertLess(min(created), now - datetime.timedelta(days=7))
+        self.assertLess(max(created), now)
+        self.assertEqual(Job.objects.filter(created_at__gte=now).count(), 0)
+        self.assertTrue(Job._meta.get_field("created_at").auto_now_add)
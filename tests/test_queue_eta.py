@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.estimates import ALL_SIZES_BUCKET, refresh_runtime_model, size_bucket
+from apps.jobs.models import Job, RuntimeEstimate
+from apps.jobs.scheduling import claim_next_job
+
+
+class QueueEtaTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def _queued(self, client_hash: str, offset_s: int) -> Job:
+        job = Job.objects.create(status=Job.Status.QUEUED, client_hash=client_hash)
+        created = timezone.now() - datetime.timedelta(minutes=10) + datetime.timedelta(seconds=offset_s)
+        Job.objects.filter(id=job.id).update(created_at=created)
+        job.refresh_from_db()
+        return job
+
+    def test_runtime_model_fits_per_size_bucket(self) -> None:
+        now = timezone.now()
+        for run_s, size in [(10, 1000), (20, 1000), (30, 1000), (300, 10_000_000)]:
+            Job.objects.create(
+                status=Job.Status.SUCCEEDED,
+                input_size=size,
+                started_at=now - datetime.timedelta(seconds=run_s),
+                finished_at=now,
+            )
+        Job.objects.create(status=Job.Status.FAILED, started_at=now, finished_at=now)
+
+        samples = refresh_runtime_model(now)
+
+        self.assertEqual(samples, 4)
+        small = RuntimeEstimate.objects.get(size_bucket=size_bucket(1000))
+        self.assertEqual(small.sample_count, 3)
+        self.assertAlmostEqual(small.p50_run_secs, 20.0, places=3)
+        self.assertEqual(RuntimeEstimate.objects.get(size_bucket=ALL_SIZES_BUCKET).sample_count, 4)
+
+    @override_settings(JOB_SCHEDULER="fifo", ESTIMATE_DEFAULT_RUN_SECS=60)
+    def test_detail_reports_position_and_eta(self) -> None:
+        self._queued("a" * 64, 0)
+        second = self._queued("a" * 64, 1)
+
+        before = timezone.now()
+        data = self.client.get(f"/api/jobs/{second.id}").data
+
+        self.assertEqual(data["queue_position"], 2)
+        start = datetime.datetime.fromisoformat(data["estimated_start_at"])
+        finish = datetime.datetime.fromisoformat(data["estimated_finish_at"])
+        self.assertAlmostEqual((start - before).total_seconds(), 60, delta=5)
+        self.assertAlmostEqual((finish - start).total_seconds(), 60, delta=1)
+
+    @override_settings(JOB_SCHEDULER="fifo", ESTIMATE_DEFAULT_RUN_SECS=60)
+    def test_jobs_ahead_are_costed_by_their_size_bucket(self) -> None:
+        big, small = 50 * 1024 * 1024, 10 * 1024
+        RuntimeEstimate.objects.bulk_create(
+            [
+                RuntimeEstimate(size_bucket=ALL_SIZES_BUCKET, sample_count=20, p50_run_secs=30, p90_run_secs=300),
+                RuntimeEstimate(size_bucket=size_bucket(big), sample_count=5, p50_run_secs=600, p90_run_secs=900),
+                RuntimeEstimate(size_bucket=size_bucket(small), sample_count=15, p50_run_secs=10, p90_run_secs=20),
+            ]
+        )
+        for offset_s, size in enumerate([big, big, small]):
+            Job.objects.filter(id=self._queued("a" * 64, offset_s).id).update(input_size=size)
+        job = self._queued("b" * 64, 10)
+        Job.objects.filter(id=job.id).update(input_size=small)
+
+        before = timezone.now()
+        data = self.client.get(f"/api/jobs/{job.id}").data
+
+        self.assertEqual(data["queue_position"], 4)
+        start = datetime.datetime.fromisoformat(data["estimated_start_at"])
+        finish = datetime.datetime.fromisoformat(data["estimated_finish_at"])
+        self.assertAlmostEqual((start - before).total_seconds(), 600 + 600 + 10, delta=5)
+        self.assertAlmostEqual((finish - start).total_seconds(), 10, delta=1)
+
+    def test_finished_job_has_no_eta(self) -> None:
+        job = Job.objects.create(status=Job.Status.SUCCEEDED)
+        data = self.client.get(f"/api/jobs/{job.id}").data
+        self.assertIsNone(data["queue_position"])
+        self.assertIsNone(data["estimated_start_at"])
+
+    def test_fair_position_matches_claim_order(self) -> None:
+        jobs = [
+            self._queued("a" * 64, 0),
+            self._queued("a" * 64, 1),
+            self._queued("a" * 64, 2),
+            self._queued("b" * 64, 3),
+            self._queued("c" * 64, 4),
+        ]
+        positions = {j.id: self.client.get(f"/api/jobs/{j.id}").data["queue_position"] for j in jobs}
+
+        claimed = [claim_next_job().id for _ in jobs]
+
+        self.assertEqual([positions[job_id] for job_id in claimed], [1, 2, 3, 4, 5])
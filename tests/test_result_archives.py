@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jobs.archives import zstd_available
+from apps.jobs.artifacts import record_artifacts
+from apps.jobs.models import Job
+
+
+class ResultArchiveTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.job = Job.objects.create(status=Job.Status.SUCCEEDED)
+        self.out_dir = Path(self._tmp.name) / f"jobs/{self.job.id}"
+        (self.out_dir / "_work").mkdir(parents=True)
+        (self.out_dir / "_work" / "workflow.knime").write_text("<root></root>", encoding="utf-8")
+        (self.out_dir / "discounts__g01.py").write_text("print('ok')\n" * 100, encoding="utf-8")
+        record_artifacts(self.job, self.out_dir)
+
+    def _get(self, query: str = "", **headers):
+        with override_settings(RESULT_STORAGE_ROOT=self._tmp.name):
+            return self.client.get(f"/api/jobs/{self.job.id}/result.zip{query}", headers=headers)
+
+    def test_zip_is_cached_and_holds_only_artifacts(self) -> None:
+        first = self._get()
+        data = b"".join(first.streaming_content)
+        cached = self.out_dir / "_archives" / "result.zip"
+        second = self._get()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(cached.is_file())
+        self.assertEqual(b"".join(second.streaming_content), data)
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertEqual(zf.namelist(), ["discounts__g01.py"])
+
+    def test_format_parameter_and_accept_select_tar_gz(self) -> None:
+        by_param = self._get("?format=tar.gz")
+        by_accept = self._get(Accept="application/gzip")
+        stored = self._get("?format=zip-stored")
+
+        self.assertEqual(by_param["Content-Type"], "application/gzip")
+        self.assertIn(f"{self.job.id}.tar.gz", by_param["Content-Disposition"])
+        with tarfile.open(fileobj=io.BytesIO(b"".join(by_param.streaming_content)), mode="r:gz") as tar:
+            self.assertEqual(tar.getnames(), ["discounts__g01.py"])
+        self.assertEqual(by_accept["Content-Type"], "application/gzip")
+        with zipfile.ZipFile(io.BytesIO(b"".join(stored.streaming_content))) as zf:
+            self.assertEqual(zf.infolist()[0].compress_type, zipfile.ZIP_STORED)
+
+    def test_unknown_format_rejected(self) -> None:
+        resp = self._get("?format=rar")
+
+        self.assertEqual(resp.status_code, 406)
+        self.assertEqual(resp.data["error"]["code"], "format_unavailable")
+
+    @skipIf(zstd_available(), "zstandard is installed")
+    def test_zstd_unavailable_without_extra(self) -> None:
+        resp = self._get("?format=tar.zst")
+
+        self.assertEqual(resp.status_code, 406)
+        self.assertNotIn("tar.zst", resp.data["error"]["details"]["available"])
+
+    def test_bench_command_reports_formats(self) -> None:
+        out = io.StringIO()
+        with override_settings(RESULT_STORAGE_ROOT=self._tmp.name):
+            call_command("k2p_archive_bench", stdout=out)
+
+        self.assertIn("1 jobs", out.getvalue())
+        self.assertIn("zip-stored", out.getvalue())
+        self.assertIn("tar.gz", out.getvalue())
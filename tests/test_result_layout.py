@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from apps.jobs.management.commands.k2p_worker import Command
+from apps.jobs.models import Job
+
+
+class ResultLayoutTests(TestCase):
+    def setUp(self) -> None:
+        self._jobs = tempfile.TemporaryDirectory()
+        self._results = tempfile.TemporaryDirectory()
+        self.addCleanup(self._jobs.cleanup)
+        self.addCleanup(self._results.cleanup)
+        self.job = Job.objects.create(status=Job.Status.QUEUED)
+        self.job.input_key = f"jobs/{self.job.id}/discounts.zip"
+        self.job.save(update_fields=["input_key"])
+        input_path = Path(self._jobs.name) / self.job.input_key
+        input_path.parent.mkdir(parents=True)
+        with zipfile.ZipFile(input_path, "w") as zf:
+            zf.writestr("workflow.knime", "<root></root>")
+        self.job_dir = Path(self._jobs.name) / f"jobs/{self.job.id}"
+        self.out_dir = Path(self._results.name) / f"jobs/{self.job.id}"
+
+    def _run(self) -> None:
+        def run_job(job_id, workflow_path, out_dir, *, log_dir=None, **kwargs):
+            self.assertTrue((workflow_path / "workflow.knime").is_file())
+            (out_dir / "discounts.py").write_text("print('ok')\n", encoding="utf-8")
+            log_dir.mkdir(parents=True, exist_ok=True)
+            (log_dir / "stdout.log").write_text("converted\n", encoding="utf-8")
+            return {"exit_code": 0, "artifacts": ["discounts.py"]}
+
+        cmd = Command()
+        with override_settings(JOB_STORAGE_ROOT=self._jobs.name, RESULT_STORAGE_ROOT=self._results.name):
+            with patch("apps.jobs.management.commands.k2p_worker.DockerRunner.run_job", side_effect=run_job):
+                cmd._run_one(runner=cmd._build_runner())
+
+    def test_results_hold_only_artifacts(self) -> None:
+        self._run()
+
+        self.assertEqual(Job.objects.get(id=self.job.id).status, Job.Status.SUCCEEDED)
+        self.assertFalse((self.job_dir / "_work").exists())
+        self.assertTrue((self.job_dir / "logs" / "stdout.log").is_file())
+        results = sorted(p.relative_to(self.out_dir).as_posix() for p in self.out_dir.rglob("*") if p.is_file())
+        self.assertEqual(results, ["_archives/result.zip", "discounts.py"])
+        self.assertEqual(list(self.job.artifacts.values_list("path", flat=True)), ["discounts.py"])
+
+    def test_logs_included_on_opt_in(self) -> None:
+        with override_settings(RESULT_INCLUDE_LOGS=True):
+            self._run()
+
+        self.assertEqual(
+            list(self.job.artifacts.order_by("path").values_list("path", flat=True)),
+            ["discounts.py", "logs/stdout.log"],
+        )
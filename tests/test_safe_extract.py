@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from apps.jobs.security import ZipLimits, ZipValidationError, safe_extract_zip
+
+LIMITS = ZipLimits(max_files=100, max_path_depth=10, max_unpacked_bytes=10 * 1024 * 1024, max_file_bytes=5 * 1024 * 1024)
+
+
+def _write_zip(path: Path, files: dict[str, bytes]) -> Path:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return path
+
+
+def _tree(root: Path) -> dict[str, bytes]:
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob("*") if p.is_file()}
+
+
+class FastExtractTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+
+    def test_fast_mode_matches_sequential(self) -> None:
+        zip_path = _write_zip(
+            self.root / "bundle.zip",
+            {
+                "wf/workflow.knime": b"<root></root>",
+                "wf/CSV Reader (#1)/settings.xml": b"<settings/>",
+                "wf/data/big.bin": os.urandom(2 * 1024 * 1024),
+                "wf/empty/": b"",
+                "__MACOSX/wf/._workflow.knime": b"junk",
+            },
+        )
+
+        sequential = safe_extract_zip(zip_path, self.root / "seq", limits=LIMITS)
+        # Force the thread pool path for the large entry.
+        with patch("apps.jobs.security.SMALL_ENTRY_BYTES", 1024):
+            fast = safe_extract_zip(zip_path, self.root / "fast", limits=LIMITS, fast=True)
+
+        self.assertEqual(sorted(fast), sorted(sequential))
+        self.assertEqual(_tree(self.root / "fast"), _tree(self.root / "seq"))
+        self.assertTrue((self.root / "fast" / "wf" / "empty").is_dir())
+        self.assertFalse((self.root / "fast" / "__MACOSX").exists())
+
+    def test_fast_mode_refuses_symlinked_directory(self) -> None:
+        zip_path = _write_zip(self.root / "bundle.zip", {"wf/settings.xml": b"<settings/>"})
+        dest = self.root / "dest"
+        outside = self.root / "outside"
+        dest.mkdir()
+        outside.mkdir()
+        (dest / "wf").symlink_to(outside)
+
+        with self.assertRaises(ZipValidationError) as ctx:
+            safe_extract_zip(zip_path, dest, limits=LIMITS, fast=True)
+
+        self.assertEqual(ctx.exception.code, "zip_path_traversal")
+        self.assertEqual(list(outside.iterdir()), [])
+
+    def test_fast_mode_refuses_symlinked_file(self) -> None:
+        zip_path = _write_zip(self.root / "bundle.zip", {"settings.xml": b"<settings/>"})
+        dest = self.root / "dest"
+        dest.mkdir()
+        victim = self.root / "victim.txt"
+        victim.write_text("keep", encoding="utf-8")
+        (dest / "settings.xml").symlink_to(victim)
+
+        with self.assertRaises(ZipValidationError):
+            safe_extract_zip(zip_path, dest, limits=LIMITS, fast=True)
+
+        self.assertEqual(victim.read_text(encoding="utf-8"), "keep")
+
+    def test_fast_mode_keeps_validation(self) -> None:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("../evil.txt", b"x")
+        zip_path = self.root / "evil.zip"
+        zip_path.write_bytes(buf.getvalue())
+
+        with self.assertRaises(ZipValidationError) as ctx:
+            safe_extract_zip(zip_path, self.root / "dest", limits=LIMITS, fast=True)
+
+        self.assertEqual(ctx.exception.code, "zip_path_unsafe")
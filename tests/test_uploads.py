@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import datetime
+import hashlib
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.models import AdmissionCounter, Job, UploadSession
+from apps.jobs.uploads import delete_expired_sessions, upload_part_path
+from tests.helpers import make_zip
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.data = make_zip(
+            {
+                "workflow.knime": "<root></root>",
+                "CSV Reader (#1)/settings.xml": "<settings></settings>",
+            }
+        )
+
+    def _open(self, **extra) -> dict:
+        payload = {"filename": "discounts.zip", "size": len(self.data), **extra}
+        resp = self.client.post("/api/uploads", data=payload, format="json")
+        self.assertEqual(resp.status_code, 201, resp.data)
+        return resp.data
+
+    def _put(self, upload_id: str, offset: int, chunk: bytes, **headers):
+        return self.client.generic(
+            "PUT",
+            f"/api/uploads/{upload_id}",
+            data=chunk,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": str(offset), **headers},
+        )
+
+    def test_chunked_upload_commits_into_job(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open(sha256=hashlib.sha256(self.data).hexdigest())
+            half = len(self.data) // 2
+            first = self._put(session["id"], 0, self.data[:half])
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first.data["offset"], half)
+            second = self._put(
+                session["id"],
+                half,
+                self.data[half:],
+                **{"Upload-Chunk-SHA256": hashlib.sha256(self.data[half:]).hexdigest()},
+            )
+            self.assertEqual(second.status_code, 200)
+
+            resp = self.client.post(f"/api/uploads/{session['id']}/commit")
+            self.assertEqual(resp.status_code, 201, resp.data)
+            self.assertFalse(upload_part_path(session["id"]).exists())
+
+            # A retried commit (lost response) returns the same job.
+            again = self.client.post(f"/api/uploads/{session['id']}/commit")
+
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data["id"], resp.data["id"])
+        job = Job.objects.get(id=resp.data["id"])
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.original_filename, "discounts.zip")
+        self.assertEqual(job.input_sha256, hashlib.sha256(self.data).hexdigest())
+
+    def test_offset_mismatch_reports_resume_point(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open()
+            self._put(session["id"], 0, self.data[:10])
+            resp = self._put(session["id"], 20, self.data[20:30])
+            state = self.client.get(f"/api/uploads/{session['id']}")
+
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["error"]["code"], "offset_mismatch")
+        self.assertEqual(resp.data["error"]["details"]["offset"], 10)
+        self.assertEqual(state.data["offset"], 10)
+
+    def test_corrupted_chunk_is_rejected_without_advancing(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open()
+            resp = self._put(session["id"], 0, self.data[:10], **{"Upload-Chunk-SHA256": "0" * 64})
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["error"]["code"], "chunk_checksum_mismatch")
+        self.assertEqual(UploadSession.objects.get(id=session["id"]).received_bytes, 0)
+
+    def test_commit_rejects_sha256_mismatch(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open(sha256="0" * 64)
+            self._put(session["id"], 0, self.data)
+            resp = self.client.post(f"/api/uploads/{session['id']}/commit")
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data["error"]["code"], "checksum_mismatch")
+        self.assertEqual(Job.objects.get().error_code, "checksum_mismatch")
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_concurrent_commit_is_refused_until_the_job_is_recorded(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open()
+            self._put(session["id"], 0, self.data)
+            UploadSession.objects.filter(id=session["id"]).update(commit_started_at=timezone.now())
+            busy = self.client.post(f"/api/uploads/{session['id']}/commit")
+            late_chunk = self._put(session["id"], 0, self.data)
+
+            # A claim left by a crashed commit is taken over once stale.
+            UploadSession.objects.filter(id=session["id"]).update(
+                commit_started_at=timezone.now() - datetime.timedelta(hours=1)
+            )
+            resp = self.client.post(f"/api/uploads/{session['id']}/commit")
+
+        self.assertEqual(busy.status_code, 409)
+        self.assertEqual(busy.data["error"]["code"], "upload_committing")
+        self.assertEqual(late_chunk.status_code, 409)
+        self.assertEqual(resp.status_code, 201, resp.data)
+        self.assertEqual(Job.objects.count(), 1)
+
+    @override_settings(MAX_QUEUED_JOBS=0)
+    def test_rejected_commit_releases_its_claim(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open()
+            self._put(session["id"], 0, self.data)
+            resp = self.client.post(f"/api/uploads/{session['id']}/commit")
+
+        self.assertEqual(resp.status_code, 429)
+        self.assertIsNone(UploadSession.objects.get(id=session["id"]).commit_started_at)
+
+    def test_commit_requires_complete_upload(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open()
+            self._put(session["id"], 0, self.data[:10])
+            resp = self.client.post(f"/api/uploads/{session['id']}/commit")
+
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["error"]["code"], "upload_incomplete")
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_oversize_session_rejected(self) -> None:
+        with override_settings(MAX_UPLOAD_BYTES=10):
+            resp = self.client.post("/api/uploads", data={"filename": "big.zip", "size": 11}, format="json")
+        self.assertEqual(resp.status_code, 413)
+
+    def test_open_session_bytes_are_capped_per_client(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name, UPLOAD_MAX_STAGED_BYTES_PER_CLIENT=len(self.data) * 2):
+            first = self._open()
+            second = self._open()
+            over = self.client.post("/api/uploads", data={"filename": "w.zip", "size": len(self.data)}, format="json")
+
+            # Committing one session and expiring the other give their bytes back.
+            self._put(first["id"], 0, self.data)
+            self.assertEqual(self.client.post(f"/api/uploads/{first['id']}/commit").status_code, 201)
+            UploadSession.objects.filter(id=second["id"]).update(
+                expires_at=timezone.now() - datetime.timedelta(seconds=1)
+            )
+            delete_expired_sessions()
+            self._open()
+            self._open()
+
+        self.assertEqual(over.status_code, 429)
+        self.assertEqual(over.data["error"]["code"], "upload_quota_exceeded")
+        self.assertEqual(AdmissionCounter.objects.exclude(name="jobs").get().upload_bytes, len(self.data) * 2)
+
+    def test_expired_sessions_are_swept(self) -> None:
+        with override_settings(JOB_STORAGE_ROOT=self._tmp.name):
+            session = self._open()
+            self._put(session["id"], 0, self.data[:10])
+            UploadSession.objects.filter(id=session["id"]).update(
+                expires_at=timezone.now() - datetime.timedelta(seconds=1)
+            )
+            resp = self._put(session["id"], 10, self.data[10:20])
+            self.assertEqual(resp.status_code, 410)
+
+            other = self._open()
+            self._put(other["id"], 0, self.data[:10])
+            self.assertTrue(upload_part_path(other["id"]).exists())
+            UploadSession.objects.filter(id=other["id"]).update(
+                expires_at=timezone.now() - datetime.timedelta(seconds=1)
+            )
+            deleted = delete_expired_sessions()
+            self.assertFalse(upload_part_path(other["id"]).exists())
+
+        self.assertEqual(deleted, 1)
+        self.assertFalse(UploadSession.objects.exists())
@@ -6,12 +6,14 @@ import zipfile
 from pathlib import Path
 from unittest.mock import patch
 
-from django.test import TestCase, override_settings
+from django.test import SimpleTestCase, TestCase, override_settings
 
 from apps.jobs.management.commands.k2p_worker import Command
+from apps.jobs.metrics_worker import JOB_PHASE_SECONDS
 from apps.jobs.models import Job
 from apps.jobs.runner import RunnerError
 from apps.jobs.security import ZipValidationError
+from apps.jobs.tracing import PhaseTrace
 
 
 class WorkerLogsTests(TestCase):
@@ -35,6 +37,11 @@ class WorkerLogsTests(TestCase):
         events = {p.get("event") for p in payloads}
         self.assertIn("job_picked", events)
         self.assertIn("job_finished", events)
+        finished = next(p for p in payloads if p.get("event") == "job_finished")
+        self.assertEqual(
+            list(finished["phase_seconds"]),
+            ["claim", "input_check", "extract", "workflow_discovery", "artifact_record", "archive_build", "finish"],
+        )
 
     def test_job_failed_logged(self) -> None:
         job = Job.objects.create(status=Job.Status.QUEUED, input_key="jobs/y/test.zip")
@@ -74,6 +81,7 @@ class WorkerLogsTests(TestCase):
         job.refresh_from_db()
         self.assertEqual(job.status, Job.Status.FAILED)
         self.assertIn("timeout", job.error_message)
+        self.assertEqual(job.diagnostics.stderr_tail, "timeout")
 
     def test_zip_validation_error_marks_failed(self) -> None:
         job = Job.objects.create(status=Job.Status.QUEUED, input_key="jobs/a/test.zip")
@@ -93,3 +101,22 @@ class WorkerLogsTests(TestCase):
         job.refresh_from_db()
         self.assertEqual(job.status, Job.Status.FAILED)
         self.assertEqual(job.error_code, "zip_bomb")
+
+
+class PhaseTraceTests(SimpleTestCase):
+    def test_phase_is_recorded_when_it_raises_and_repeats_add_up(self) -> None:
+        def observed() -> float:
+            samples = JOB_PHASE_SECONDS.collect()[0].samples
+            return next(
+                (x.value for x in samples if x.name.endswith("_count") and x.labels["phase"] == "test_phase"), 0.0
+            )
+
+        before = observed()
+        trace = PhaseTrace(JOB_PHASE_SECONDS)
+        trace.record("test_phase", 1.5)
+        with self.assertRaises(ValueError), trace.phase("test_phase"):
+            raise ValueError()
+
+        self.assertGreaterEqual(trace.phases["test_phase"], 1.5)
+        self.assertEqual(trace.log_fields(), {"test_phase": round(trace.phases["test_phase"], 4)})
+        self.assertEqual(observed() - before, 2)
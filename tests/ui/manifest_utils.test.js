@@ -6,6 +6,11 @@ import {
   normalizeRel,
   isUnsafeRel,
   extractSettingsPathsFromWorkflowXml,
+  toHex,
+  sha256Hex,
+  contentFingerprint,
+  fmtDuration,
+  nextPollDelayMs,
 } from "../../api/static/ui/manifest_utils.js";
 
 describe("manifest utils", () => {
@@ -45,4 +50,35 @@ describe("manifest utils", () => {
     expect(paths).toContain("Line Plot (#2)/settings.xml");
     expect(paths).not.toContain("(#1)/settings.xml");
   });
+
+  it("toHex and sha256Hex produce lowercase hex digests", async () => {
+    expect(toHex(new Uint8Array([0, 15, 255]).buffer)).toBe("000fff");
+    const digest = await sha256Hex(new TextEncoder().encode("abc"));
+    expect(digest).toBe("ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad");
+  });
+
+  it("contentFingerprint ignores entry order and matches the server", async () => {
+    const entries = [
+      { path: "workflow.knime", sha256: "b71e4d17274636b97179ba2d97c742735b6510eb54f22893d3a2daff2ceb28db" },
+      { path: "CSV Reader (#1)/settings.xml", sha256: "6deef9106dc5d174e93366d6ceb9676f65b9f8bc79010c4278b51814dc588779" },
+    ];
+    const expected = "bdfd266b8cb451c36bce3511a2b2ba56e23c3b9c71e80d72b8ad7d0be67d9b21";
+    expect(await contentFingerprint(entries)).toBe(expected);
+    expect(await contentFingerprint([...entries].reverse())).toBe(expected);
+  });
+
+  it("fmtDuration rounds to readable units", () => {
+    expect(fmtDuration(42)).toBe("42s");
+    expect(fmtDuration(600)).toBe("10 min");
+    expect(fmtDuration(3900)).toBe("1 h 5 min");
+  });
+
+  it("nextPollDelayMs backs off with the predicted wait", () => {
+    const now = Date.parse("2026-01-01T00:00:00Z");
+    const queued = { status: "QUEUED", estimated_start_at: "2026-01-01T00:02:00Z" };
+    expect(nextPollDelayMs(queued, now)).toBe(30000);
+    expect(nextPollDelayMs({ ...queued, estimated_start_at: "2026-01-01T00:00:08Z" }, now)).toBe(2000);
+    expect(nextPollDelayMs({ status: "RUNNING", estimated_finish_at: "2025-12-31T23:59:00Z" }, now)).toBe(1000);
+    expect(nextPollDelayMs({ status: "QUEUED" }, now)).toBe(1000);
+  });
 });